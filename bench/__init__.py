@@ -0,0 +1 @@
+"""bench パッケージ（合成データ生成・ベンチマーク）."""
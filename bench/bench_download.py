@@ -0,0 +1,169 @@
+"""
+download_ran_tdoc_lists のスループット（meetings/sec）をローカル・スタンドインで計測する。
+
+bench/fake_3gpp_server.py をスレッドで起動し、遅延・帯域制限・HTTP エラー・接続断の
+各条件で fetch_meeting を全会合ぶん回す。一覧 HTML の解析（BeautifulSoup / 正規表現
+フォールバック）単体の時間も測る。結果は JSON に保存する。
+
+例:
+  python bench/bench_download.py --root out/raw_90_110 --out out/bench/download.json
+  python bench/bench_download.py --scenarios clean,latency --latency 0.1 --out out/bench/dl.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+# プロジェクトルートを path に追加して各スクリプトを import
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import download_ran_tdoc_lists as dl  # noqa: E402
+from bench.bench_pipeline import git_revision  # noqa: E402
+from bench.fake_3gpp_server import FakeTdocServer, FaultConfig, render_listing  # noqa: E402
+
+SCENARIOS = ("clean", "regex", "latency", "bandwidth", "errors", "drops")
+
+
+def scenario_faults(name: str, args) -> FaultConfig:
+    """シナリオ名 → 注入する障害."""
+    base = dict(filler=args.filler, seed=args.seed)
+    if name == "latency":
+        return FaultConfig(latency=args.latency, **base)
+    if name == "bandwidth":
+        return FaultConfig(bandwidth=args.bandwidth, **base)
+    if name == "errors":
+        return FaultConfig(error_rate=args.error_rate, **base)
+    if name == "drops":
+        return FaultConfig(drop_rate=args.drop_rate, **base)
+    return FaultConfig(**base)
+
+
+@contextlib.contextmanager
+def listing_parser(use_bs4: bool):
+    """find_tdoc_href_from_listing の BeautifulSoup 使用有無を一時的に切り替える."""
+    saved = dl.BeautifulSoup
+    if not use_bs4:
+        dl.BeautifulSoup = None
+    try:
+        yield
+    finally:
+        dl.BeautifulSoup = saved
+
+
+def run_scenario(name: str, root: Path, args) -> dict:
+    """1 シナリオ分のダウンロードを実行し、スループットと status 内訳を返す."""
+    use_bs4 = name != "regex" and dl.BeautifulSoup is not None
+    with FakeTdocServer(root, scenario_faults(name, args)) as srv, \
+            tempfile.TemporaryDirectory() as tmp, listing_parser(use_bs4):
+        meetings = srv.meetings()
+        statuses: Counter[str] = Counter()
+        total_bytes = 0
+        t0 = time.perf_counter()
+        for n in meetings:
+            row = dl.fetch_meeting(n, Path(tmp), timeout=args.timeout, sleep=0.0,
+                                   overwrite=True, base_url=srv.base_url)
+            statuses[row.status] += 1
+            if row.status == "OK":
+                total_bytes += row.bytes
+        wall = time.perf_counter() - t0
+        stats = dict(srv.stats)
+    return {
+        "scenario": name,
+        "parser": "bs4" if use_bs4 else "regex",
+        "meetings": len(meetings),
+        "wall_s": round(wall, 6),
+        "meetings_per_s": round(len(meetings) / wall, 3) if wall > 0 else None,
+        "mb_per_s": round(total_bytes / wall / (1024 * 1024), 3) if wall > 0 else None,
+        "bytes": total_bytes,
+        "statuses": dict(statuses),
+        "server": stats,
+    }
+
+
+def bench_listing_parse(filler: int, iterations: int) -> list[dict]:
+    """一覧 HTML 解析単体の時間（1 回あたり ms）を BeautifulSoup / 正規表現で比較する."""
+    html = render_listing("http://127.0.0.1/ftp/tsg_ran/TSG_RAN/", "100",
+                          ["TDoc_List_Meeting_RAN#100.xlsx"], filler)
+    results = []
+    for use_bs4 in (True, False):
+        if use_bs4 and dl.BeautifulSoup is None:
+            continue
+        with listing_parser(use_bs4):
+            assert dl.find_tdoc_href_from_listing(html, 100), "TDoc List が見つからない"
+            t0 = time.perf_counter()
+            for _ in range(iterations):
+                dl.find_tdoc_href_from_listing(html, 100)
+            wall = time.perf_counter() - t0
+        results.append({
+            "parser": "bs4" if use_bs4 else "regex",
+            "filler_rows": filler,
+            "html_bytes": len(html.encode("utf-8")),
+            "ms_per_parse": round(wall / iterations * 1000, 4),
+        })
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="ダウンロードのスループット計測（ローカル）")
+    ap.add_argument("--root", default="out/raw_90_110", help="配信する xlsx のフォルダ")
+    ap.add_argument("--out", required=True, help="結果 JSON のパス")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS),
+                    help=f"実行するシナリオ（デフォルト {','.join(SCENARIOS)}）")
+    ap.add_argument("--latency", type=float, default=0.05, help="latency シナリオの遅延秒")
+    ap.add_argument("--bandwidth", type=int, default=4 * 1024 * 1024,
+                    help="bandwidth シナリオの帯域上限（バイト/秒）")
+    ap.add_argument("--error-rate", type=float, default=0.2, help="errors シナリオの確率")
+    ap.add_argument("--drop-rate", type=float, default=0.2, help="drops シナリオの確率")
+    ap.add_argument("--filler", type=int, default=300, help="一覧のダミー行数")
+    ap.add_argument("--parse-iterations", type=int, default=50, help="一覧解析の反復回数")
+    ap.add_argument("--timeout", type=int, default=30, help="HTTP タイムアウト秒")
+    ap.add_argument("--seed", type=int, default=0, help="障害注入の乱数シード")
+    args = ap.parse_args()
+
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"ERROR: フォルダが見つかりません: {root}", file=sys.stderr)
+        sys.exit(1)
+    names = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in names if s not in SCENARIOS]
+    if unknown:
+        print(f"ERROR: 不明なシナリオ: {unknown}（{SCENARIOS}）", file=sys.stderr)
+        sys.exit(1)
+
+    results = []
+    for name in names:
+        r = run_scenario(name, root, args)
+        results.append(r)
+        print(f"{name:<10} [{r['parser']}] {r['meetings']} 会合 {r['wall_s']:.2f}s "
+              f"{r['meetings_per_s']} meetings/s {r['mb_per_s']} MB/s {r['statuses']}")
+    parse = bench_listing_parse(args.filler, args.parse_iterations)
+    for r in parse:
+        print(f"listing parse [{r['parser']}] {r['ms_per_parse']} ms "
+              f"({r['filler_rows']} 行, {r['html_bytes']} bytes)")
+
+    payload = {
+        "meta": {
+            "git": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "root": str(root),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "root")},
+        },
+        "results": results,
+        "listing_parse": parse,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"results: {out}")
+
+
+if __name__ == "__main__":
+    main()
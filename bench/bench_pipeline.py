@@ -0,0 +1,271 @@
+"""
+パイプライン各段の処理時間・メモリを合成コーパスで計測し、JSON に保存する。
+
+計測段:
+  load_liaison_rows   TDoc_List xlsx 群 → LS 行（build_liaison_excel）
+  canonicalize        組織名の正規化（util.org_canon、excel 段）
+  write_liaison_xlsx  liaison.xlsx 書き出し（write_only・1 パス）
+  read_liaison_xlsx   liaison.xlsx 読み込み（build_liaison_data の入口）
+  build_edges / validate_edges / node_table / data_js / edge_matrix / trends / frames / template_render
+  aggregate_chunks    liaison.xlsx → edges をチャンク集約で（read_liaison_xlsx + build_edges の代替。
+                      --tracemalloc で alloc_peak を比べる）
+  reply_chains        liaison.xlsx → 返信チェーン・応答会合数（build_reply_chains）
+
+例:
+  python bench/bench_pipeline.py --scales 1,10,100 --out out/bench/results.json
+  python bench/bench_pipeline.py --scales 1 --out out/bench/new.json --compare out/bench/old.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+# プロジェクトルートを path に追加して各スクリプトを import
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import build_liaison_data  # noqa: E402
+import build_liaison_excel  # noqa: E402
+import build_reply_chains  # noqa: E402
+from bench.gen_synthetic_tdoc_lists import SyntheticSpec, generate_corpus  # noqa: E402
+from util.instrument import RssSampler, current_rss  # noqa: E402
+from util.edge_matrix import EdgeMatrix  # noqa: E402
+from util.org_canon import OrgCanonicalizer  # noqa: E402
+from util.playback_frames import build_frames  # noqa: E402
+from util.trend_analytics import analyze  # noqa: E402
+from util.viewer_template_builder import ViewerTemplateBuilder  # noqa: E402
+
+CHUNK_ROWS = 5000
+
+
+def _mb(n: int | None) -> float | None:
+    return None if n is None else round(n / (1024 * 1024), 3)
+
+
+def measure(name: str, fn, *, use_tracemalloc: bool) -> tuple[object, dict]:
+    """fn() を実行し、(戻り値, 計測結果) を返す。標準出力は捨てる."""
+    rss_before = current_rss()
+    if use_tracemalloc:
+        tracemalloc.start()
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    with RssSampler() as sampler, contextlib.redirect_stdout(io.StringIO()):
+        value = fn()
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    alloc_peak = None
+    if use_tracemalloc:
+        alloc_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return value, {
+        "stage": name,
+        "wall_s": round(wall, 6),
+        "cpu_s": round(cpu, 6),
+        "rss_before_mb": _mb(rss_before),
+        "rss_peak_mb": _mb(sampler.peak),
+        "rss_delta_mb": _mb(sampler.peak - rss_before
+                            if sampler.peak is not None and rss_before is not None else None),
+        "alloc_peak_mb": _mb(alloc_peak),
+    }
+
+
+def run_scale(scale: int, base: SyntheticSpec, workdir: Path, *,
+              reuse: bool, use_tracemalloc: bool) -> list[dict]:
+    """1 スケール分のコーパスを用意して全段を計測する."""
+    spec = SyntheticSpec(**{**base.__dict__, "meetings": base.meetings * scale})
+    corpus = workdir / f"corpus_x{scale}"
+    if not (reuse and (corpus / "files.txt").exists()):
+        print(f"[x{scale}] 合成コーパス生成: {spec.meetings} 会合 × {spec.rows_per_meeting} 行")
+        generate_corpus(spec, corpus)
+    files = [corpus / name for name in
+             (corpus / "files.txt").read_text(encoding="utf-8").split()]
+    bytes_in = sum(p.stat().st_size for p in files)
+    out_xlsx = workdir / f"liaison_x{scale}.xlsx"
+    viewer = workdir / f"viewer_x{scale}"
+    viewer.mkdir(parents=True, exist_ok=True)
+    results: list[dict] = []
+
+    def record(name, fn, rows=None):
+        value, res = measure(name, fn, use_tracemalloc=use_tracemalloc)
+        res["scale"] = scale
+        res["rows"] = rows(value) if rows else None
+        results.append(res)
+        print(f"[x{scale}] {name:<20} wall={res['wall_s']:.3f}s cpu={res['cpu_s']:.3f}s "
+              f"rss_peak={res['rss_peak_mb']}MB rows={res['rows']}")
+        return value
+
+    def load():
+        frames = [
+            build_liaison_excel.load_liaison_rows(
+                str(p), build_liaison_excel.extract_meeting_id(str(p)))
+            for p in files
+        ]
+        return build_liaison_excel.concat_liaison_frames(frames)
+
+    result = record("load_liaison_rows", load, len)
+    results[-1]["bytes_read"] = bytes_in
+    result = record("canonicalize", lambda: build_liaison_excel.canonicalize_liaison(
+        result, OrgCanonicalizer()), len)
+    record("write_liaison_xlsx",
+           lambda: build_liaison_excel.write_liaison_excel(result, out_xlsx))
+    results[-1]["bytes_written"] = out_xlsx.stat().st_size
+    df = record("read_liaison_xlsx", lambda: build_liaison_data.read_liaison(out_xlsx), len)
+    # data 段は別プロセスなのでキャッシュも別（実行時と同じく新しいインスタンス）
+    canon = OrgCanonicalizer()
+    edges_by_meeting, edges_total = record(
+        "build_edges", lambda: build_liaison_data.build_edges(df, precision=6, canon=canon),
+        lambda v: len(v[0]))
+    record("validate_edges",
+           lambda: build_liaison_data.validate_edges(df, edges_by_meeting, canon))
+
+    def aggregate_chunks():
+        acc = build_liaison_data.EdgeAccumulator(OrgCanonicalizer())
+        for chunk in build_liaison_data.iter_liaison_chunks(out_xlsx, CHUNK_ROWS):
+            acc.add(chunk)
+        return acc.edges(precision=6)
+
+    chunked = record("aggregate_chunks", aggregate_chunks, lambda v: len(v[0]))
+    if not chunked[0].equals(edges_by_meeting) or not chunked[1].equals(edges_total):
+        print(f"[x{scale}] WARN: aggregate_chunks の結果が build_edges と一致しません", file=sys.stderr)
+
+    meetings = sorted(df["RAN"].unique().tolist())
+    node_table = record("node_table",
+                        lambda: build_liaison_data.build_node_table(edges_by_meeting), len)
+
+    def data_js():
+        content = build_liaison_data.render_data_js(meetings, edges_by_meeting, edges_total,
+                                                    node_table)
+        (viewer / "data.js").write_text(content, encoding="utf-8")
+        return content
+
+    record("data_js", data_js)
+    results[-1]["bytes_written"] = (viewer / "data.js").stat().st_size
+
+    def edge_matrix():
+        matrix = EdgeMatrix.from_edges(edges_by_meeting, edges_total)
+        matrix.save(viewer)
+        return matrix
+
+    matrix = record("edge_matrix", edge_matrix, lambda m: len(m.row))
+    record("trends", lambda: analyze(matrix))
+
+    def frames():
+        content = build_liaison_data.render_frames_js(build_frames(matrix))
+        (viewer / "frames.js").write_text(content, encoding="utf-8")
+        return content
+
+    record("frames", frames)
+    results[-1]["bytes_written"] = (viewer / "frames.js").stat().st_size
+
+    def template():
+        builder = ViewerTemplateBuilder()
+        (viewer / "index.html").write_text(builder.render_index_html(), encoding="utf-8")
+        (viewer / "viewer.css").write_text(builder.render_viewer_css(), encoding="utf-8")
+        (viewer / "app.js").write_text(builder.render_app_js(), encoding="utf-8")
+
+    record("template_render", template)
+
+    def reply_chains():
+        links, _ = build_reply_chains.build_links(build_reply_chains.read_liaison_links(out_xlsx))
+        build_reply_chains.chain_table(links)
+        build_reply_chains.latency_table(links)
+        return links
+
+    record("reply_chains", reply_chains, len)
+    return results
+
+
+def git_revision() -> str:
+    try:
+        r = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                           capture_output=True, text=True, timeout=10)
+        return r.stdout.strip() if r.returncode == 0 else ""
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def compare_results(old: dict, new: dict, threshold: float) -> int:
+    """old/new の wall_s を段ごとに比較して表示し、閾値超えの件数を返す."""
+    old_map = {(r["scale"], r["stage"]): r for r in old.get("results", [])}
+    n_regress = 0
+    print(f"比較: {old.get('meta', {}).get('git', '?')} → {new['meta']['git'] or '?'}")
+    for r in new["results"]:
+        o = old_map.get((r["scale"], r["stage"]))
+        if not o or not o["wall_s"]:
+            continue
+        ratio = r["wall_s"] / o["wall_s"]
+        mark = ""
+        if ratio > threshold:
+            mark = "  REGRESSION"
+            n_regress += 1
+        mem = ""
+        if o.get("alloc_peak_mb") and r.get("alloc_peak_mb") is not None:
+            mem = f" alloc {o['alloc_peak_mb']:.1f}MB → {r['alloc_peak_mb']:.1f}MB"
+        print(f"  x{r['scale']:<4} {r['stage']:<20} {o['wall_s']:.3f}s → {r['wall_s']:.3f}s "
+              f"(x{ratio:.2f}){mem}{mark}")
+    return n_regress
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="パイプライン各段のベンチマーク（合成データ）")
+    ap.add_argument("--scales", default="1,10,100", help="会合数の倍率（デフォルト 1,10,100）")
+    ap.add_argument("--out", required=True, help="結果 JSON のパス")
+    ap.add_argument("--workdir", default="out/bench", help="合成コーパス・中間生成物の置き場")
+    ap.add_argument("--meetings", type=int, default=21, help="倍率 1 の会合数（デフォルト 21）")
+    ap.add_argument("--rows", type=int, default=900, help="1 会合あたりの行数（デフォルト 900）")
+    ap.add_argument("--ls-fraction", type=float, default=0.04, help="LS 行の割合")
+    ap.add_argument("--nodes", type=int, default=120, help="組織ノード数")
+    ap.add_argument("--seed", type=int, default=0, help="乱数シード")
+    ap.add_argument("--reuse", action="store_true", help="生成済みコーパスがあれば再利用する")
+    ap.add_argument("--tracemalloc", action="store_true",
+                    help="tracemalloc で Python 側の確保ピークも測る（遅くなる）")
+    ap.add_argument("--compare", default="", help="比較対象の過去結果 JSON")
+    ap.add_argument("--threshold", type=float, default=1.2,
+                    help="--compare で REGRESSION と見なす wall 比（デフォルト 1.2）")
+    args = ap.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    base = SyntheticSpec(meetings=args.meetings, rows_per_meeting=args.rows,
+                         ls_fraction=args.ls_fraction, nodes=args.nodes, seed=args.seed)
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    results: list[dict] = []
+    for scale in scales:
+        results.extend(run_scale(scale, base, workdir, reuse=args.reuse,
+                                 use_tracemalloc=args.tracemalloc))
+
+    payload = {
+        "meta": {
+            "git": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "spec": base.__dict__,
+            "scales": scales,
+        },
+        "results": results,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"results: {out}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare_results(old, payload, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
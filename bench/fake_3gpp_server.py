@@ -0,0 +1,269 @@
+"""
+3GPP FTP（www.3gpp.org/ftp/tsg_ran/TSG_RAN/）のローカル・スタンドインサーバ。
+
+--root の TDoc_List_Meeting_RAN#xxx(-e).xlsx から TSGR_xxx[e]/Docs/ のディレクトリ一覧 HTML を
+組み立てて返し、xlsx 本体も配信する。
+遅延・帯域制限・HTTP エラー・接続断を注入できる。
+
+例:
+  python bench/fake_3gpp_server.py --root out/raw_90_110 --port 8765 --latency 0.05
+  python download_ran_tdoc_lists.py --range 90-110 --outdir out/raw_local \\
+      --base-url http://127.0.0.1:8765/ftp/tsg_ran/TSG_RAN/ --sleep 0
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+BASE_PATH = "/ftp/tsg_ran/TSG_RAN/"
+TDOC_FILE_RE = re.compile(r"TDoc_List_Meeting_RAN#(?P<num>\d+)(?P<suffix>-e)?\.xlsx$",
+                          re.IGNORECASE)
+FOLDER_RE = re.compile(r"^TSGR_(?P<folder>\d+e?)/Docs/(?P<name>[^/]*)$")
+
+
+@dataclass
+class FaultConfig:
+    """注入する障害。確率はリクエスト単位（一覧・ファイル共通）。"""
+
+    latency: float = 0.0
+    bandwidth: int = 0
+    error_rate: float = 0.0
+    error_codes: list[int] = field(default_factory=lambda: [403, 404, 500, 503])
+    drop_rate: float = 0.0
+    filler: int = 300
+    seed: int = 0
+
+
+def scan_root(root: Path) -> dict[str, dict[str, Path]]:
+    """root 直下の TDoc List を {フォルダ名(例 '90e'): {ファイル名: パス}} にまとめる."""
+    folders: dict[str, dict[str, Path]] = {}
+    for p in sorted(root.glob("*.xlsx")):
+        m = TDOC_FILE_RE.match(p.name)
+        if not m:
+            continue
+        folder = m.group("num") + ("e" if m.group("suffix") else "")
+        folders.setdefault(folder, {})[p.name] = p
+    return folders
+
+
+def render_listing(base_url: str, folder: str, names: list[str], filler: int) -> str:
+    """3GPP FTP の Docs 一覧に似せた HTML（RP-xxxxxx.zip のダミー行 + TDoc List）."""
+    docs_url = f"{base_url}TSGR_{folder}/Docs/"
+    lines = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset=\"utf-8\">",
+        f"<title>Index of {html.escape(BASE_PATH)}TSGR_{folder}/Docs/</title></head>",
+        "<body>",
+        f"<h1>Index of {html.escape(BASE_PATH)}TSGR_{folder}/Docs/</h1>",
+        "<table><thead><tr><th>Name</th><th>Date</th><th>Size</th></tr></thead><tbody>",
+        f"<tr><td><a href=\"{base_url}TSGR_{folder}/\">[To Parent Directory]</a></td></tr>",
+    ]
+    num = int(folder.rstrip("e"))
+    for i in range(filler):
+        fname = f"RP-{num:03d}{i:04d}.zip"
+        lines.append(
+            f"<tr><td><a href=\"{docs_url}{fname}\">{fname}</a></td>"
+            f"<td>2025/01/01 12:00</td><td>{12000 + i * 37}</td></tr>"
+        )
+    for name in names:
+        lines.append(
+            f"<tr><td><a href=\"{docs_url}{quote(name)}\">{html.escape(name)}</a></td>"
+            f"<td>2025/01/01 12:00</td><td>-</td></tr>"
+        )
+    lines.extend(["</tbody></table>", "</body></html>"])
+    return "\n".join(lines)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeTdocServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_bytes(self, code: int, body: bytes, content_type: str) -> None:
+        srv = self.server
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if srv.roll(srv.faults.drop_rate):
+            # 途中まで送って接続を切る（クライアント側は ChunkedEncodingError 等になる）
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            srv.count("dropped")
+            return
+        bw = srv.faults.bandwidth
+        if bw <= 0:
+            self.wfile.write(body)
+            return
+        chunk = max(1024, bw // 20)
+        for i in range(0, len(body), chunk):
+            t0 = time.perf_counter()
+            self.wfile.write(body[i:i + chunk])
+            wait = len(body[i:i + chunk]) / bw - (time.perf_counter() - t0)
+            if wait > 0:
+                time.sleep(wait)
+
+    def do_GET(self) -> None:  # noqa: N802
+        srv = self.server
+        srv.count("requests")
+        if srv.faults.latency > 0:
+            time.sleep(srv.faults.latency)
+        if srv.roll(srv.faults.error_rate):
+            code = srv.choice(srv.faults.error_codes)
+            srv.count(f"http_{code}")
+            self._send_bytes(code, f"HTTP {code}".encode(), "text/plain")
+            return
+
+        path = unquote(urlsplit(self.path).path)
+        m = FOLDER_RE.match(path[len(BASE_PATH):]) if path.startswith(BASE_PATH) else None
+        files = srv.folders.get(m.group("folder")) if m else None
+        if files is None:
+            self._send_bytes(404, b"Not Found", "text/plain")
+            return
+        name = m.group("name")
+        if name == "":
+            body = render_listing(srv.base_url, m.group("folder"), sorted(files),
+                                  srv.faults.filler).encode("utf-8")
+            self._send_bytes(200, body, "text/html; charset=utf-8")
+            return
+        if name not in files:
+            self._send_bytes(404, b"Not Found", "text/plain")
+            return
+        srv.count("files")
+        self._send_bytes(200, files[name].read_bytes(),
+                         "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+
+class FakeTdocServer(ThreadingHTTPServer):
+    """root の xlsx を 3GPP FTP 風に配信するサーバ。start()/stop() でスレッド起動・停止."""
+
+    daemon_threads = True
+
+    def __init__(self, root: Path, faults: FaultConfig | None = None, *,
+                 host: str = "127.0.0.1", port: int = 0, verbose: bool = False) -> None:
+        super().__init__((host, port), _Handler)
+        self.root = Path(root)
+        self.folders = scan_root(self.root)
+        self.faults = faults or FaultConfig()
+        self.verbose = verbose
+        self.stats: dict[str, int] = {}
+        self._rng = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def meetings(self) -> list[int]:
+        return sorted({int(f.rstrip("e")) for f in self.folders})
+
+    def roll(self, p: float) -> bool:
+        if p <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < p
+
+    def choice(self, items: list[int]) -> int:
+        with self._lock:
+            return self._rng.choice(items)
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def start(self) -> "FakeTdocServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeTdocServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def parse_codes(expr: str) -> list[int]:
+    try:
+        codes = [int(c) for c in expr.split(",") if c.strip()]
+    except ValueError:
+        raise ValueError(f"--error-codes は 403,500 形式で指定してください: {expr!r}") from None
+    if not codes:
+        raise ValueError(f"--error-codes が空です: {expr!r}")
+    return codes
+
+
+def add_fault_args(ap: argparse.ArgumentParser) -> None:
+    """サーバ CLI とスループット計測で共通の障害注入オプション."""
+    ap.add_argument("--latency", type=float, default=0.0, help="リクエストごとの遅延秒")
+    ap.add_argument("--bandwidth", type=int, default=0,
+                    help="応答本文の帯域上限（バイト/秒、0 で無制限）")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="HTTP エラーを返す確率")
+    ap.add_argument("--error-codes", default="403,404,500,503", help="返す HTTP エラーコード")
+    ap.add_argument("--drop-rate", type=float, default=0.0, help="本文途中で接続を切る確率")
+    ap.add_argument("--filler", type=int, default=300,
+                    help="一覧に混ぜるダミー RP-xxxxxx.zip 行数（デフォルト 300）")
+    ap.add_argument("--seed", type=int, default=0, help="障害注入の乱数シード")
+
+
+def faults_from_args(args) -> FaultConfig:
+    return FaultConfig(
+        latency=args.latency, bandwidth=args.bandwidth, error_rate=args.error_rate,
+        error_codes=parse_codes(args.error_codes), drop_rate=args.drop_rate,
+        filler=args.filler, seed=args.seed,
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="3GPP FTP のローカル・スタンドインサーバ")
+    ap.add_argument("--root", default="out/raw_90_110", help="配信する xlsx のフォルダ")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--verbose", action="store_true", help="アクセスログを表示する")
+    add_fault_args(ap)
+    args = ap.parse_args()
+
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"ERROR: フォルダが見つかりません: {root}", file=sys.stderr)
+        sys.exit(1)
+    srv = FakeTdocServer(root, faults_from_args(args), host=args.host, port=args.port,
+                         verbose=args.verbose)
+    meetings = srv.meetings()
+    span = f"{meetings[0]}-{meetings[-1]}" if meetings else "-"
+    print(f"serving {len(srv.folders)} folders (meetings {span}) at {srv.base_url}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        print(f"stats: {srv.stats}")
+
+
+if __name__ == "__main__":
+    main()
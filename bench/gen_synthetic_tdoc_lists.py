@@ -0,0 +1,205 @@
+"""
+合成 TDoc_List ワークブックを生成する（ベンチマーク・オフライン検証用）。
+
+3GPP から再ダウンロードせずに、会合数・行数・LS 比率・宛先数分布・ノード数を
+指定して TDoc_List_Meeting_RAN#xxx(.xlsx) / #xxx-e(.xlsx) を作る。
+出力フォルダには build_liaison_excel.py の --list に渡せる files.txt も書き出す。
+
+例:
+  python bench/gen_synthetic_tdoc_lists.py --outdir out/synth --meetings 21 --rows 900
+  python bench/gen_synthetic_tdoc_lists.py --outdir out/synth_x10 --meetings 210 \\
+      --recipients "1:0.6,2:0.2,3:0.1,9:0.1" --nodes 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from openpyxl import Workbook
+
+# 実データ（RAN#90〜#110）の TDoc_List と同じ列構成
+COLUMNS = [
+    "TDoc", "Title", "Source", "Contact", "Contact ID", "Type", "For", "Abstract",
+    "Secretary Remarks", "Agenda item sort order", "Agenda item", "Agenda item description",
+    "TDoc sort order within agenda item", "TDoc Status", "Reservation date", "Uploaded",
+    "Is revision of", "Revised to", "Release", "Spec", "Version", "Related WIs", "CR",
+    "CR revision", "CR category", "TSG CR Pack", "UICC", "ME", "RAN", "CN",
+    "Clauses Affected", "Reply to", "To", "Cc", "Original LS", "Reply in",
+]
+
+# 実データで頻出する組織名（ノード数が足りない分は ORG-nnnn で補う）
+KNOWN_NODES = [
+    "RAN1", "RAN2", "RAN3", "RAN4", "RAN5", "SA", "SA1", "SA2", "SA3", "SA4", "SA5", "SA6",
+    "CT", "CT1", "CT3", "CT4", "CT6", "PCG", "ITU-R WP5D", "ITU-R WP4B", "ITU-R WP1C",
+    "ITU-T SG13", "ITU-T SG20", "5GAA WG4", "NGMN", "GSMA", "ETSI TC LI", "ETSI TC RT",
+    "APT Wireless Group", "5G-ACIA", "O-RAN", "ATIS", "CCSA", "TSDSI", "TTA", "TTC",
+]
+
+OTHER_TYPES = [
+    ("discussion", 33), ("CR pack", 22), ("WI status report", 13), ("WID new", 5),
+    ("WID revised", 4), ("report", 4), ("pCR", 2), ("draft TR", 2), ("other", 4),
+]
+
+DEFAULT_RECIPIENTS = "1:0.75,2:0.16,3:0.03,4:0.02,6:0.01,9:0.02,12:0.01"
+
+
+def parse_distribution(expr: str) -> tuple[list[int], list[float]]:
+    """'1:0.7,2:0.2,5:0.1' 形式を (値, 重み) に分解する."""
+    values: list[int] = []
+    weights: list[float] = []
+    for part in expr.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        k, _, w = part.partition(":")
+        try:
+            values.append(int(k))
+            weights.append(float(w) if w else 1.0)
+        except ValueError:
+            raise ValueError(f"分布は 1:0.7,2:0.3 形式で指定してください: {expr!r}") from None
+    if not values or min(values) < 1 or sum(weights) <= 0:
+        raise ValueError(f"分布が不正です: {expr!r}")
+    return values, weights
+
+
+@dataclass
+class SyntheticSpec:
+    meetings: int = 21
+    start: int = 90
+    rows_per_meeting: int = 900
+    ls_fraction: float = 0.04
+    ls_in_share: float = 0.75
+    recipients: str = DEFAULT_RECIPIENTS
+    nodes: int = 120
+    e_fraction: float = 0.4
+    reply_fraction: float = 0.3
+    seed: int = 0
+
+
+def build_node_pool(n: int) -> list[str]:
+    """ノード名のプールを返す。n が実名リストより大きければ ORG-nnnn で補う."""
+    pool = KNOWN_NODES[:n]
+    pool.extend(f"ORG-{i:04d}" for i in range(max(0, n - len(KNOWN_NODES))))
+    return pool
+
+
+def meeting_filename(num: int, e_meeting: bool) -> str:
+    return f"TDoc_List_Meeting_RAN#{num}{'-e' if e_meeting else ''}.xlsx"
+
+
+def generate_meeting_rows(spec: SyntheticSpec, num: int, rng: random.Random,
+                          pool: list[str], pending: list[str]) -> Iterator[list]:
+    """1 会合分の TDoc_List 行（COLUMNS 順）を返す。pending は未返信 LS in の TDoc 番号."""
+    # 上位ノードほど出現しやすい Zipf 風の重み
+    node_weights = [1.0 / (i + 1) for i in range(len(pool))]
+    k_values, k_weights = parse_distribution(spec.recipients)
+    other_types = [t for t, _ in OTHER_TYPES]
+    other_weights = [w for _, w in OTHER_TYPES]
+    idx = COLUMNS.index
+
+    for seq in range(spec.rows_per_meeting):
+        row: list = [None] * len(COLUMNS)
+        tdoc = f"RP-{num:03d}{seq:04d}"
+        row[idx("TDoc")] = tdoc
+        row[idx("Contact")] = "Synthetic Contact"
+        row[idx("Contact ID")] = 10000 + seq % 500
+        row[idx("Agenda item sort order")] = seq % 60
+        row[idx("Agenda item")] = f"{seq % 9 + 1}.{seq % 4 + 1}"
+        row[idx("TDoc sort order within agenda item")] = seq
+        row[idx("TDoc Status")] = rng.choice(["noted", "agreed", "approved", "available"])
+        row[idx("Release")] = f"Rel-{15 + num % 6}"
+
+        if rng.random() < spec.ls_fraction:
+            topic = rng.randrange(1000)
+            if rng.random() < spec.ls_in_share:
+                src = rng.choices(pool, node_weights)[0]
+                row[idx("Type")] = "LS in"
+                row[idx("Source")] = src
+                row[idx("To")] = "RAN, " + rng.choices(pool, node_weights)[0]
+                row[idx("Title")] = f"LS on topic {topic}"
+                row[idx("Original LS")] = f"{src[:2].upper()}-{num:03d}{seq:04d}"
+                pending.append(tdoc)
+            else:
+                k = rng.choices(k_values, k_weights)[0]
+                tos = rng.sample(pool, min(k, len(pool)))
+                row[idx("Type")] = "LS out"
+                row[idx("Source")] = "RAN"
+                row[idx("To")] = ", ".join(tos)
+                if pending and rng.random() < spec.reply_fraction:
+                    orig = pending.pop(rng.randrange(len(pending)))
+                    row[idx("Reply to")] = orig
+                    row[idx("Title")] = f"Reply LS on topic {topic}"
+                else:
+                    row[idx("Title")] = f"LS on topic {topic}"
+        else:
+            row[idx("Type")] = rng.choices(other_types, other_weights)[0]
+            row[idx("Source")] = rng.choices(pool, node_weights)[0]
+            row[idx("Title")] = f"Document {seq} for meeting {num}"
+        yield row
+
+
+def write_workbook(path: Path, rows: Iterator[list]) -> int:
+    """write_only モードで TDoc_List シートを書き出し、データ行数を返す."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("TDoc_List")
+    ws.append(COLUMNS)
+    n = 0
+    for row in rows:
+        ws.append(row)
+        n += 1
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return n
+
+
+def generate_corpus(spec: SyntheticSpec, outdir: Path) -> list[Path]:
+    """spec に従って会合ごとの xlsx と files.txt を outdir に書き出す."""
+    rng = random.Random(spec.seed)
+    pool = build_node_pool(spec.nodes)
+    pending: list[str] = []
+    paths: list[Path] = []
+    for num in range(spec.start, spec.start + spec.meetings):
+        path = outdir / meeting_filename(num, rng.random() < spec.e_fraction)
+        write_workbook(path, generate_meeting_rows(spec, num, rng, pool, pending))
+        paths.append(path)
+    names = sorted(p.name for p in paths)
+    (outdir / "files.txt").write_text("\n".join(names) + "\n", encoding="utf-8")
+    return paths
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="合成 TDoc_List ワークブックを生成")
+    ap.add_argument("--outdir", required=True, help="出力フォルダ")
+    ap.add_argument("--meetings", type=int, default=21, help="会合数（デフォルト 21）")
+    ap.add_argument("--start", type=int, default=90, help="最初の会合番号（デフォルト 90）")
+    ap.add_argument("--rows", type=int, default=900, help="1 会合あたりの行数（デフォルト 900）")
+    ap.add_argument("--ls-fraction", type=float, default=0.04,
+                    help="LS in/out 行の割合（デフォルト 0.04）")
+    ap.add_argument("--ls-in-share", type=float, default=0.75,
+                    help="LS のうち LS in の割合（デフォルト 0.75）")
+    ap.add_argument("--recipients", default=DEFAULT_RECIPIENTS,
+                    help="LS out 宛先数の分布 k:重み,...（デフォルトは実データ近似）")
+    ap.add_argument("--nodes", type=int, default=120, help="組織ノード数（デフォルト 120）")
+    ap.add_argument("--e-fraction", type=float, default=0.4,
+                    help="e 会合（-e 付き）の割合（デフォルト 0.4）")
+    ap.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = ap.parse_args()
+
+    spec = SyntheticSpec(
+        meetings=args.meetings, start=args.start, rows_per_meeting=args.rows,
+        ls_fraction=args.ls_fraction, ls_in_share=args.ls_in_share,
+        recipients=args.recipients, nodes=args.nodes, e_fraction=args.e_fraction,
+        seed=args.seed,
+    )
+    parse_distribution(spec.recipients)
+    outdir = Path(args.outdir)
+    paths = generate_corpus(spec, outdir)
+    print(f"wrote {len(paths)} workbooks + files.txt: {outdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+spec（JSON）に並べた複数の viewer（会合範囲・向き・組織の絞り込み）を
+1 プロセスでまとめて作る。
+
+- liaison.xlsx の読み込みと (meeting, dir, from, to, k) ごとの件数集約は 1 回だけ行い、
+  各 viewer はその件数表を絞り込んでから edges を作る
+  （絞り込んだ入力で build_liaison_html.py を実行した結果と同じ edges になる）
+- viewer ごとの書き出し（edges CSV / data.js / edge_matrix.* / trends.js / frames.js / index.html）は
+  --workers 個のプロセスで並行に行う
+- 静的ファイル（viewer.css / app.js）は中身のハッシュ付きの名前で
+  <outdir>/assets/ に 1 つだけ置き、各 viewer の index.html から ../assets/ で参照する
+
+spec の例（viewers.json）:
+  {"viewers": [
+    {"name": "full"},
+    {"name": "last5", "last": 5},
+    {"name": "r100_104", "range": "100-104"},
+    {"name": "sa_in", "range": "100-110", "dir": "in", "orgs": ["SA", "SA2"]}
+  ]}
+  range: 会合番号の範囲（両端含む）
+  last: 直近 N 会合（range と併用すると範囲内の直近 N）
+  dir: in か out
+  orgs: RAN の相手側がこれらの組織のエッジだけ（組織名は正規化して照合）
+
+例:
+  python build_liaison_batch.py --input out/liaison_90_110.xlsx --spec viewers.json \\
+      --outdir out/viewers --precision 6 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from build_liaison_data import (
+    DIRS,
+    LIAISON_COLUMNS,
+    EdgeAccumulator,
+    edge_counts,
+    edges_from_counts,
+    iter_liaison_chunks,
+    meeting_counts,
+    read_liaison,
+    validate_counts,
+    write_viewer_data,
+)
+from download_ran_tdoc_lists import parse_range
+from util.edge_matrix import meeting_sort_key
+from util.instrument import Profiler, add_profile_args
+from util.org_canon import OrgCanonicalizer, add_canon_args
+from util.viewer_template_builder import ViewerTemplateBuilder
+
+ASSET_DIR = "assets"
+_NAME_RE = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]*")
+
+
+@dataclass(frozen=True)
+class ViewerSpec:
+    """spec の 1 エントリ。絞り込みを何も指定しなければ入力全体."""
+
+    name: str
+    meetings: tuple[int, ...] = ()
+    last: int = 0
+    dir: str = ""
+    orgs: tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ViewerSpec":
+        unknown = set(d) - {"name", "range", "last", "dir", "orgs"}
+        if unknown:
+            raise ValueError(f"未知のキー {sorted(unknown)}: {d}")
+        name = str(d.get("name", ""))
+        if not _NAME_RE.fullmatch(name) or name == ASSET_DIR:
+            raise ValueError(f"name は英数字・_ . - のフォルダ名で指定してください"
+                             f"（{ASSET_DIR} は不可）: {name!r}")
+        last = d.get("last", 0)
+        if not isinstance(last, int) or last < 0:
+            raise ValueError(f"{name}: last は 0 以上の整数: {last!r}")
+        dir_ = d.get("dir", "")
+        if dir_ not in ("", *DIRS):
+            raise ValueError(f"{name}: dir は {' / '.join(DIRS)}: {dir_!r}")
+        orgs = d.get("orgs", [])
+        if isinstance(orgs, str) or not all(isinstance(o, str) for o in orgs):
+            raise ValueError(f"{name}: orgs は組織名のリスト: {orgs!r}")
+        meetings = tuple(parse_range(d["range"])) if d.get("range") else ()
+        return cls(name=name, meetings=meetings, last=last, dir=dir_, orgs=tuple(orgs))
+
+
+def load_spec(path: str | Path) -> list[ViewerSpec]:
+    """spec JSON（{"viewers": [...]} または [...]）を読む。name の重複は ValueError."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    entries = data.get("viewers") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"viewers が空か、リストではありません: {path}")
+    specs = [ViewerSpec.from_dict(d) for d in entries]
+    names = [s.name for s in specs]
+    dup = sorted({n for n in names if names.count(n) > 1})
+    if dup:
+        raise ValueError(f"name が重複しています: {dup}")
+    return specs
+
+
+def select_meetings(spec: ViewerSpec, meetings: list) -> list:
+    """
+    spec の会合範囲に入る会合（meetings の並びのまま）。
+    範囲も last も無ければ meetings そのもの。last は会合番号の数値順で直近 N 件。
+    """
+    if not spec.meetings and not spec.last:
+        return list(meetings)
+    picked = [m for m in meetings if pd.notna(m)]
+    if spec.meetings:
+        wanted = set(spec.meetings)
+        picked = [m for m in picked if meeting_sort_key(m)[0] in wanted]
+    if spec.last:
+        keep = set(sorted(picked, key=meeting_sort_key)[-spec.last:])
+        picked = [m for m in picked if m in keep]
+    return picked
+
+
+def filter_counts(spec: ViewerSpec, counts: pd.DataFrame, code_meetings: list, nodes: list[str],
+                  selected: list, canon: OrgCanonicalizer | None) -> pd.DataFrame:
+    """共有の件数表（edge_counts 形式）から spec に合う行だけを残す."""
+    mask = np.ones(len(counts), dtype=bool)
+    if spec.meetings or spec.last:
+        chosen = set(selected)
+        codes = [i for i, m in enumerate(code_meetings) if pd.notna(m) and m in chosen]
+        mask &= counts["meeting"].isin(codes).to_numpy()
+    if spec.dir:
+        mask &= (counts["dir"] == DIRS.index(spec.dir)).to_numpy()
+    if spec.orgs:
+        wanted = {o.strip() for o in spec.orgs} if canon is None else \
+            {c for o in spec.orgs for c in (canon.canonical(o, 0), canon.canonical_source(o, 0))}
+        # ノードラベルは "組織 (src)" / "組織 (dst)" / "RAN"
+        codes = [i for i, n in enumerate(nodes) if n != "RAN" and n.rsplit(" (", 1)[0] in wanted]
+        mask &= (counts["from"].isin(codes) | counts["to"].isin(codes)).to_numpy()
+    return counts[mask]
+
+
+def write_assets(outdir: Path, builder: ViewerTemplateBuilder, debug: bool) -> dict[str, str]:
+    """
+    静的ファイルを <outdir>/assets/ にハッシュ付きの名前で書き、
+    viewer フォルダからの相対パスを返す。
+    同じ名前のファイルは中身も同じなので、既にあれば書かない。
+    """
+    asset_dir = outdir / ASSET_DIR
+    asset_dir.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for name, content in builder.render_static_assets(debug=debug).items():
+        hashed = builder.hashed_name(name, content)
+        if not (asset_dir / hashed).exists():
+            (asset_dir / hashed).write_text(content, encoding="utf-8")
+        paths[name] = f"../{ASSET_DIR}/{hashed}"
+    return paths
+
+
+def build_viewer(task: dict, prof: Profiler | None = None) -> tuple[str, str, int, str]:
+    """
+    viewer 1 つ分を書く（ProcessPoolExecutor から呼べるようトップレベルに置く）。
+    並行実行で表示が混ざらないよう、標準出力はまとめて
+    (name, 出力, edges_by_meeting 行数, エラー) で返す。エラーが無ければ空文字列。
+    """
+    if prof is None:
+        prof = Profiler("build_liaison_batch", enabled=False)
+    outdir = Path(task["outdir"])
+    buf = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buf):
+            edges_by_meeting, edges_total = edges_from_counts(
+                task["counts"], task["code_meetings"], task["nodes"], task["precision"])
+            write_viewer_data(outdir, task["meetings"], edges_by_meeting, edges_total, prof,
+                              trend_window=task["trend_window"], top_k=task["top_k"])
+            builder = ViewerTemplateBuilder(task["asset_paths"])
+            (outdir / "index.html").write_text(builder.render_index_html(), encoding="utf-8")
+            print(f"index.html: {outdir / 'index.html'}")
+    except Exception as e:  # 1 つの viewer の失敗で残りの viewer を止めない
+        return task["name"], buf.getvalue(), 0, f"{type(e).__name__}: {e}"
+    return task["name"], buf.getvalue(), len(edges_by_meeting), ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="spec の複数 viewer を 1 回の読み込み・集約からまとめて生成"
+    )
+    parser.add_argument("--input", required=True, help="正規化 Liaison Excel")
+    parser.add_argument("--spec", required=True, help="viewer の一覧（JSON）")
+    parser.add_argument("--outdir", required=True, help="出力フォルダ（viewer ごとに <outdir>/<name>/）")
+    parser.add_argument("--precision", type=int, default=None,
+                        help="weight_split の丸め桁数（例: 6）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="viewer を書き出すプロセス数（デフォルト 1 = 逐次）")
+    parser.add_argument("--chunk-rows", type=int, default=0,
+                        help="N 行ずつ読んで集約する（0 = 一括読み込み）")
+    parser.add_argument("--trend-window", type=int, default=4,
+                        help="Trends の移動合計・傾きに使う直近の会合数（デフォルト 4）")
+    parser.add_argument("--top-k", type=int, default=10,
+                        help="Trends に出す増加・減少エッジの件数（デフォルト 10）")
+    parser.add_argument("--unmapped-report", default="",
+                        help="別名表に無かった組織名と出現回数の CSV 出力先")
+    parser.add_argument("--debug", action="store_true",
+                        help="app.js に plotly_click デバッグログを埋め込む")
+    add_canon_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    prof = Profiler.from_args(args, "build_liaison_batch")
+    canon = OrgCanonicalizer.from_args(args)
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"ERROR: 入力ファイルが見つかりません: {input_path}", file=sys.stderr)
+        sys.exit(1)
+    if args.chunk_rows < 0 or args.workers < 1:
+        print("ERROR: --chunk-rows は 0 以上、--workers は 1 以上", file=sys.stderr)
+        sys.exit(1)
+    try:
+        specs = load_spec(args.spec)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: spec を読めません: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # 読み込みと件数集約は全 viewer で 1 回だけ
+    with prof.span("aggregate", cprofile=True, chunk_rows=args.chunk_rows) as sp:
+        try:
+            if args.chunk_rows:
+                acc = EdgeAccumulator(canon)
+                for chunk in iter_liaison_chunks(input_path, args.chunk_rows):
+                    acc.add(chunk)
+                counts, code_meetings, nodes = acc.edge_counts()
+                ls_counts = acc.meeting_counts if acc.meeting_counts is not None else \
+                    meeting_counts(pd.DataFrame(columns=LIAISON_COLUMNS))
+                meetings = sorted(acc.meetings())
+                sp.rows = acc.rows
+            else:
+                df = read_liaison(input_path)
+                counts, code_meetings, nodes = edge_counts(df, canon)
+                ls_counts = meeting_counts(df, canon)
+                meetings = sorted(df["RAN"].unique().tolist())
+                sp.rows = len(df)
+        except (KeyError, ValueError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        sp.bytes_read = input_path.stat().st_size
+    print(f"読み込み行数: {sp.rows} / 件数表 {len(counts)} 行 / ノード {len(nodes)} / "
+          f"会合 {len([m for m in meetings if pd.notna(m)])}")
+
+    print("検算（入力全体）:")
+    with prof.span("validate_edges", cprofile=True):
+        validate_counts(ls_counts, edges_from_counts(counts, code_meetings, nodes, args.precision)[0])
+    if canon is not None:
+        print(f"  {canon.summary()}")
+        canon.print_unmapped()
+        if args.unmapped_report:
+            canon.write_unmapped(args.unmapped_report)
+            print(f"未対応の組織名: {args.unmapped_report}")
+
+    outdir = Path(args.outdir)
+    with prof.span("assets") as sp:
+        asset_paths = write_assets(outdir, ViewerTemplateBuilder(), args.debug)
+    print(f"静的ファイル: {', '.join(p.rsplit('/', 1)[-1] for p in asset_paths.values())} "
+          f"→ {outdir / ASSET_DIR}")
+
+    tasks = []
+    for spec in specs:
+        selected = select_meetings(spec, meetings)
+        picked = filter_counts(spec, counts, code_meetings, nodes, selected, canon)
+        if not selected:
+            print(f"  WARN: {spec.name}: 範囲に入る会合がありません（空の viewer を書きます）",
+                  file=sys.stderr)
+        elif picked.empty:
+            print(f"  WARN: {spec.name}: 絞り込みに合うエッジがありません"
+                  "（空の viewer を書きます）", file=sys.stderr)
+        tasks.append({
+            "name": spec.name,
+            "outdir": str(outdir / spec.name),
+            "counts": picked,
+            "code_meetings": code_meetings,
+            "nodes": nodes,
+            "meetings": selected,
+            "precision": args.precision,
+            "trend_window": args.trend_window,
+            "top_k": args.top_k,
+            "asset_paths": asset_paths,
+        })
+
+    workers = min(args.workers, len(tasks))
+    with prof.span("viewers", workers=workers) as sp:
+        if workers <= 1:
+            results = []
+            for task in tasks:
+                with prof.span(task["name"], "viewer"):
+                    results.append(build_viewer(task, prof))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(build_viewer, tasks))
+        sp.rows = sum(n for _, _, n, _ in results)
+    failed = []
+    for name, log, n, error in results:
+        print(f"[{name}] edges_by_meeting {n} 行")
+        print(log, end="")
+        if error:
+            print(f"ERROR: {name}: {error}", file=sys.stderr)
+            failed.append(name)
+    print(f"viewer {len(results) - len(failed)} 個: {outdir}")
+    prof.finish(args)
+    if failed:
+        print(f"ERROR: 失敗した viewer: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,32 @@
-"""Liaison Excel → data.js / edges_by_meeting.csv / edges_total.csv（edge_key 付き）を生成する。"""
+"""
+Liaison Excel → data.js / edges_by_meeting.csv / edges_total.csv（edge_key 付き）を生成する。
+data.js にはノードクリック用のノード別集計（nodeTable）も入れる。
+あわせてエッジ × 会合行列（edge_matrix.*）と Trends 表示用の trends.js、
+タイムライン再生用の frames.js（会合ごとのリンク値とノードの固定位置）を書き出す。
+
+--chunk-rows N を付けると liaison シートを N 行ずつ読み、(meeting, dir, from, to, k) ごとの
+件数だけを持ち続ける（メモリは入力行数ではなくエッジ数に比例）。
+出力は一括読み込みと同一。
+"""
 
 import argparse
+import hashlib
 import json
+import math
 import sys
 from pathlib import Path
+from typing import Iterator
 
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
+
+from util.edge_matrix import MATRIX_FILES, EdgeMatrix
+from util.instrument import Profiler, add_profile_args
+from util.org_canon import OrgCanonicalizer, add_canon_args
+from util.playback_frames import build_frames
+from util.trend_analytics import analyze
+from util.viewer_template_builder import ViewerTemplateBuilder
 
 
 def _src_label(src: str) -> str:
@@ -20,78 +41,338 @@ def _edge_key(dir_: str, from_: str, to_: str) -> str:
     return f"{dir_}|||{from_}|||{to_}"
 
 
-def build_edges(df: pd.DataFrame, precision: int | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+DIRS = ["in", "out"]
+LIAISON_COLUMNS = ["RAN", "Source", "Type", "To"]
+EDGE_KEYS = ["meeting", "dir", "from", "to"]
+NODE_TOP = 10
+DATA_JS_PREFIX = "window.LIAISON_DATA = "
+PATCH_FILE = "data_patch.js"  # build_liaison_delta.py が書く差分パッチ
+
+
+def read_liaison(path: str | Path) -> pd.DataFrame:
+    """liaison シートを読み、RAN / Source / Type / To を category（共有辞書 + コード）で返す."""
+    df = pd.read_excel(path, sheet_name="liaison", engine="openpyxl", usecols=LIAISON_COLUMNS)
+    return df.astype({c: "category" for c in LIAISON_COLUMNS})
+
+
+# pd.read_excel が既定で欠損とみなす文字列（チャンク読み込みでも同じ扱いにする）
+_NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+
+def _cell(v):
+    if v is None or (isinstance(v, str) and v in _NA_STRINGS):
+        return np.nan
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def iter_liaison_chunks(path: str | Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
     """
-    liaison 行から edges_by_meeting と edges_total を構築。
-    edge_key = dir + "|||" + from + "|||" + to を付与。
+    liaison シートを chunk_rows 行ずつ読む（openpyxl の read_only でストリーミング）。
+    値の扱いは read_liaison と同じ
+    （空セル・既定の NA 文字列は欠損、4 列とも空の行は読まない）。
     """
-    rows: list[dict] = []
-
-    for _, r in df.iterrows():
-        meeting = r["RAN"]
-        typ = r["Type"]
-        if typ == "LS in":
-            src = str(r["Source"]).strip() if pd.notna(r["Source"]) else ""
-            from_ = _src_label(src)
-            to_ = "RAN"
-            rows.append({
-                "meeting": meeting, "dir": "in",
-                "from": from_, "to": to_,
-                "raw_count": 1, "weight_raw": 1.0, "weight_split": 1.0,
-            })
-        else:
-            tos = [t.strip() for t in str(r["To"]).split(",") if t.strip()]
-            if not tos:
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb["liaison"].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        missing = [c for c in LIAISON_COLUMNS if c not in header]
+        if missing:
+            raise ValueError(f"liaison シートに列 {missing} がありません: {path}")
+        idx = [header.index(c) for c in LIAISON_COLUMNS]
+        buf: list[list] = []
+        for r in rows:
+            vals = [_cell(r[i]) if i < len(r) else np.nan for i in idx]
+            if all(isinstance(v, float) and np.isnan(v) for v in vals):
                 continue
-            k = len(tos)
-            for t in tos:
-                to_ = _dst_label(t)
-                rows.append({
-                    "meeting": meeting, "dir": "out",
-                    "from": "RAN", "to": to_,
-                    "raw_count": 1, "weight_raw": 1.0, "weight_split": 1.0 / k,
-                })
-
-    edge_df = pd.DataFrame(rows)
-    agg = edge_df.groupby(["meeting", "dir", "from", "to"], as_index=False).agg(
-        raw_count=("raw_count", "sum"),
-        weight_raw=("weight_raw", "sum"),
-        weight_split=("weight_split", "sum"),
-    )
-
-    def add_edge_key(a: pd.DataFrame) -> pd.DataFrame:
-        a = a.copy()
-        a["edge_key"] = a.apply(
-            lambda r: _edge_key(str(r["dir"]), str(r["from"]), str(r["to"])),
-            axis=1
-        )
-        if precision is not None:
-            a["weight_split"] = a["weight_split"].round(precision)
-        return a
-
-    edges_by_meeting = add_edge_key(agg)
-    edges_total = add_edge_key(
-        agg.groupby(["dir", "from", "to"], as_index=False).agg(
-            raw_count=("raw_count", "sum"),
-            weight_raw=("weight_raw", "sum"),
-            weight_split=("weight_split", "sum"),
-        )
-    )
+            buf.append(vals)
+            if len(buf) >= chunk_rows:
+                yield pd.DataFrame(buf, columns=LIAISON_COLUMNS, dtype=object).astype("category")
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=LIAISON_COLUMNS, dtype=object).astype("category")
+    finally:
+        wb.close()
+
+
+def _split_recipients(to) -> list[str]:
+    """LS out の To をカンマ分割する（NaN は str 化して "nan" の 1 件になる）."""
+    return [t.strip() for t in str(to).split(",") if t.strip()]
+
+
+def _recipient_lists(values: list, freq: np.ndarray | None,
+                     canon: OrgCanonicalizer | None) -> list[list[str]]:
+    """
+    To の辞書値ごとの宛先リスト。
+    canon があれば括弧を考慮して分割し、組織名を正規化する。
+    freq（辞書値ごとの行数）は未対応名の集計に使う。None なら集計しない。
+    """
+    if canon is None:
+        return [_split_recipients(v) for v in values]
+    if freq is None:
+        freq = np.zeros(len(values), dtype=np.int64)
+    return [canon.split(str(v), int(n)) for v, n in zip(values, freq)]
+
+
+def _intern(s: pd.Series) -> tuple[np.ndarray, list]:
+    """
+    列を (整数コード, 値の辞書) に変換する。辞書は昇順なのでコード順 = 文字列順。
+    欠損はコード len(辞書) で、辞書末尾の NaN を指す。
+    """
+    cat = s.astype("category")
+    values = list(cat.cat.categories)
+    codes = cat.cat.codes.to_numpy().astype(np.int32)
+    codes[codes < 0] = len(values)
+    return codes, values + [np.nan]
+
+
+class _EdgeCodes:
+    """liaison 行をエッジ単位の整数コードに展開したもの（ノード辞書は全行で共有）."""
+
+    def __init__(self, df: pd.DataFrame, canon: OrgCanonicalizer | None = None) -> None:
+        m_codes, m_values = _intern(df["RAN"])
+        valid = np.asarray([not pd.isna(v) for v in m_values])[m_codes]
+        is_in = (df["Type"] == "LS in").to_numpy(dtype=bool)
+
+        # ラベル化は行ではなく一意値ごとに 1 回だけ行う
+        s_codes, s_values = _intern(df["Source"])
+        t_codes, t_values = _intern(df["To"])
+        src_names = [str(v).strip() if pd.notna(v) else "" for v in s_values]
+        if canon is not None:
+            s_freq = np.bincount(s_codes, minlength=len(s_values))
+            src_names = [canon.canonical_source(v, int(n)) for v, n in zip(src_names, s_freq)]
+        t_freq = np.bincount(t_codes, minlength=len(t_values))
+        src_labels = [_src_label(v) for v in src_names]
+        dst_lists = [[_dst_label(t) for t in lst]
+                     for lst in _recipient_lists(t_values, t_freq, canon)]
+        nodes = sorted({"RAN", *src_labels, *(x for lst in dst_lists for x in lst)})
+        node_index = {n: i for i, n in enumerate(nodes)}
+
+        src_node = np.asarray([node_index[x] for x in src_labels], dtype=np.int32)
+        k_cat = np.asarray([len(lst) for lst in dst_lists], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(k_cat)[:-1]]).astype(np.int64)
+        flat = np.asarray([node_index[x] for lst in dst_lists for x in lst], dtype=np.int32)
+
+        # LS in: 1 行 = 1 エッジ
+        rows_in = np.flatnonzero(is_in & valid)
+        # LS out: To の k 件に展開（k=0 の行は捨てる）
+        rows_out = np.flatnonzero(~is_in & valid)
+        k_row = k_cat[t_codes[rows_out]]
+        rep = np.repeat(rows_out, k_row)
+        within = np.arange(len(rep)) - np.repeat(np.cumsum(k_row) - k_row, k_row)
+        dst = flat[np.repeat(offsets[t_codes[rows_out]], k_row) + within] if len(rep) else \
+            np.empty(0, dtype=np.int32)
+
+        ran = node_index["RAN"]
+        self.meetings = m_values
+        self.nodes = nodes
+        self.meeting = np.concatenate([m_codes[rows_in], m_codes[rep]]).astype(np.int32)
+        self.dir = np.concatenate([np.zeros(len(rows_in), np.int8), np.ones(len(rep), np.int8)])
+        self.src = np.concatenate([src_node[s_codes[rows_in]], np.full(len(rep), ran, np.int32)])
+        self.dst = np.concatenate([np.full(len(rows_in), ran, np.int32), dst])
+        # 宛先数 k（LS in は 1）。weight_split = 1/k は集約の最後に件数から求める
+        self.k = np.concatenate([np.ones(len(rows_in), np.int64), np.repeat(k_row, k_row)])
+        # 検算用: 行ごとの To 展開数
+        self.k_row_all = k_cat[t_codes]
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"meeting": self.meeting, "dir": self.dir, "from": self.src,
+                             "to": self.dst, "k": self.k})
+
+
+def _decode(codes: pd.DataFrame, meetings: list, nodes: list[str],
+            precision: int | None) -> pd.DataFrame:
+    """コードのまま集約した表をラベルに戻し、edge_key を付与する（出力境界）."""
+    out = pd.DataFrame(index=codes.index)
+    if "meeting" in codes:
+        out["meeting"] = pd.Series(np.asarray(meetings, dtype=object)[codes["meeting"]],
+                                   index=codes.index, dtype="str")
+    node_arr = np.asarray(nodes, dtype=object)
+    out["dir"] = pd.Series(np.asarray(DIRS, dtype=object)[codes["dir"]], index=codes.index,
+                           dtype="str")
+    out["from"] = pd.Series(node_arr[codes["from"]], index=codes.index, dtype="str")
+    out["to"] = pd.Series(node_arr[codes["to"]], index=codes.index, dtype="str")
+    out["raw_count"] = codes["raw_count"].astype(np.int64)
+    out["weight_raw"] = codes["weight_raw"].astype(np.float64)
+    out["weight_split"] = codes["weight_split"]
+    out["edge_key"] = out["dir"] + "|||" + out["from"] + "|||" + out["to"]
+    if precision is not None:
+        out["weight_split"] = out["weight_split"].round(precision)
+    return out.reset_index(drop=True)
+
+
+def _aggregate(ec: _EdgeCodes) -> pd.DataFrame:
+    """(meeting, dir, from, to, k) ごとの件数（count）。整数だけなので足す順序によらず厳密."""
+    return ec.frame().groupby(EDGE_KEYS + ["k"], as_index=False).size().rename(
+        columns={"size": "count"})
+
+
+def _reduce_k(counts: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """
+    (keys, k) ごとの件数 → keys ごとの raw_count と weight_split = Σ 件数 / k。
+    k が複数ある組だけ math.fsum（正しく丸めた和）で取り直すので、結果は行の並びや
+    チャンクの切り方によらない（一括集約とチャンク集約が 1 ulp まで一致する）。
+    """
+    c = counts.groupby(keys + ["k"], as_index=False)["count"].sum()
+    c["term"] = c["count"] / c["k"]
+    out = c.groupby(keys, as_index=False).agg(
+        raw_count=("count", "sum"), n_k=("k", "size"), weight_split=("term", "sum"))
+    multi = (out["n_k"] > 1).to_numpy()
+    if multi.any():
+        sub = c.merge(out.loc[multi, keys], on=keys)
+        exact = sub.groupby(keys)["term"].agg(math.fsum)
+        out.loc[multi, "weight_split"] = exact.reindex(
+            pd.MultiIndex.from_frame(out.loc[multi, keys])).to_numpy()
+    # weight_raw は 1.0 の和なので件数と厳密に一致する
+    out.insert(len(keys) + 1, "weight_raw", out["raw_count"].astype(np.float64))
+    return out.drop(columns="n_k")
+
+
+def edge_counts(df: pd.DataFrame, canon: OrgCanonicalizer | None = None
+                ) -> tuple[pd.DataFrame, list, list[str]]:
+    """
+    liaison 行 → (meeting, dir, from, to, k) ごとの件数表（整数コード）と、コードの辞書
+    （meetings: 昇順 + 末尾 NaN、nodes: 昇順）。
+    行の部分集合（会合・向き・組織の絞り込み）を edges_from_counts に渡すと、
+    絞り込んだ入力で build_edges した結果と同じになる。
+    """
+    ec = _EdgeCodes(df, canon)
+    return _aggregate(ec), ec.meetings, ec.nodes
+
+
+def edges_from_counts(counts: pd.DataFrame, meetings: list, nodes: list[str],
+                      precision: int | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """edge_counts 形式の件数表（コード）から edges_by_meeting と edges_total を作る."""
+    edges_by_meeting = _decode(_reduce_k(counts, EDGE_KEYS), meetings, nodes, precision)
+    edges_total = _decode(_reduce_k(counts, EDGE_KEYS[1:]), meetings, nodes, precision)
     return edges_by_meeting, edges_total
 
 
-def validate_edges(df: pd.DataFrame, edges_by_meeting: pd.DataFrame) -> None:
+def build_edges(df: pd.DataFrame, precision: int | None = None,
+                canon: OrgCanonicalizer | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    liaison 行から edges_by_meeting と edges_total を構築。
+    edge_key = dir + "|||" + from + "|||" + to を付与。
+    canon を渡すと Source / To の組織名を正規化してからノードにする。
+
+    集約までは meeting / dir / from / to を整数コード（共有辞書）で扱い、
+    文字列と edge_key は出力直前にだけ作る。
+    """
+    return edges_from_counts(*edge_counts(df, canon), precision)
+
+
+class EdgeAccumulator:
+    """
+    チャンク集約: liaison 行をチャンクごとに受け取り、(meeting, dir, from, to, k) → 件数の
+    辞書と会合ごとの件数（meeting_counts）だけを持ち続ける。宛先に展開した表は
+    1 チャンク分しか作らず、保持するものはエッジ数（と会合数）に比例する。
+    ラベルで持つのでチャンク間で辞書を共有しなくてよい。
+    """
+
+    def __init__(self, canon: OrgCanonicalizer | None = None) -> None:
+        self.canon = canon
+        self.counts: dict[tuple, int] = {}
+        self.meeting_counts: pd.DataFrame | None = None
+        self._meetings: dict = {}
+        self.rows = 0
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        ec = _EdgeCodes(chunk, self.canon)
+        agg = _aggregate(ec)
+        meetings = np.asarray(ec.meetings, dtype=object)[agg["meeting"].to_numpy()]
+        nodes = np.asarray(ec.nodes, dtype=object)
+        dirs = np.asarray(DIRS, dtype=object)[agg["dir"].to_numpy()]
+        keys = zip(meetings, dirs, nodes[agg["from"].to_numpy()], nodes[agg["to"].to_numpy()],
+                   agg["k"].tolist())
+        for key, n in zip(keys, agg["count"].tolist()):
+            self.counts[key] = self.counts.get(key, 0) + n
+        mc = meeting_counts(chunk, self.canon)
+        self.meeting_counts = mc if self.meeting_counts is None else \
+            self.meeting_counts.add(mc, fill_value=0).astype(np.int64)
+        # data.js の meetings は一括読み込みと同じく「出現順の一意値」を sorted する
+        self._meetings.update(dict.fromkeys(chunk["RAN"].unique().tolist()))
+        self.rows += len(chunk)
+
+    def meetings(self) -> list:
+        return list(self._meetings)
+
+    def edge_counts(self) -> tuple[pd.DataFrame, list, list[str]]:
+        """件数辞書を一括集約と同じ整数コードの件数表に戻す（辞書は昇順）."""
+        keys = list(self.counts)
+        meetings = sorted({k[0] for k in keys})
+        nodes = sorted({k[2] for k in keys} | {k[3] for k in keys})
+        m_index = {m: i for i, m in enumerate(meetings)}
+        n_index = {n: i for i, n in enumerate(nodes)}
+        d_index = {d: i for i, d in enumerate(DIRS)}
+        counts = pd.DataFrame({
+            "meeting": np.asarray([m_index[k[0]] for k in keys], dtype=np.int32),
+            "dir": np.asarray([d_index[k[1]] for k in keys], dtype=np.int8),
+            "from": np.asarray([n_index[k[2]] for k in keys], dtype=np.int32),
+            "to": np.asarray([n_index[k[3]] for k in keys], dtype=np.int32),
+            "k": np.asarray([k[4] for k in keys], dtype=np.int64),
+            "count": np.asarray(list(self.counts.values()), dtype=np.int64),
+        })
+        return counts, meetings + [np.nan], nodes
+
+    def edges(self, precision: int | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """build_edges と同じ edges_by_meeting / edges_total."""
+        return edges_from_counts(*self.edge_counts(), precision)
+
+    def size(self) -> dict[str, int]:
+        """graph_size と同じ指標."""
+        keys = self.counts.keys()
+        return {
+            "nodes": len({k[2] for k in keys} | {k[3] for k in keys}),
+            "edges_total": len({k[1:4] for k in keys}),
+            "edges_by_meeting": len({k[:4] for k in keys}),
+        }
+
+
+def graph_size(df: pd.DataFrame, canon: OrgCanonicalizer | None = None) -> dict[str, int]:
+    """ノード数・エッジ数（total / meeting 別）。正規化の前後比較用."""
+    ec = _EdgeCodes(df, canon)
+    agg = _aggregate(ec)
+    return {
+        "nodes": int(len(np.union1d(ec.src, ec.dst))),
+        "edges_total": int(len(agg.drop_duplicates(["dir", "from", "to"]))),
+        "edges_by_meeting": int(len(agg.drop_duplicates(EDGE_KEYS))),
+    }
+
+
+def meeting_counts(df: pd.DataFrame, canon: OrgCanonicalizer | None = None) -> pd.DataFrame:
+    """meeting ごとの LS in 行数・LS out 行数・LS out の To 展開数（index は meeting 昇順）."""
+    t_codes, t_values = _intern(df["To"])
+    k_cat = np.asarray([len(lst) for lst in _recipient_lists(t_values, None, canon)],
+                       dtype=np.int64)
+    is_in = (df["Type"] == "LS in").to_numpy(dtype=bool)
+    is_out = (df["Type"] == "LS out").to_numpy(dtype=bool)
+    counts = pd.DataFrame({
+        "meeting": df["RAN"].to_numpy(dtype=object),
+        "n_in": is_in.astype(np.int64),
+        "n_out": is_out.astype(np.int64),
+        "out_explode": np.where(is_out, k_cat[t_codes], 0),
+    })
+    return counts.groupby("meeting").sum()
+
+
+def validate_edges(df: pd.DataFrame, edges_by_meeting: pd.DataFrame,
+                   canon: OrgCanonicalizer | None = None) -> None:
     """検算: meeting ごと・all で weight 合計が LS in/out 行数（および out explode 数）と一致するか."""
-    for meeting in sorted(df["RAN"].unique()):
-        sub = df[df["RAN"] == meeting]
-        n_in = (sub["Type"] == "LS in").sum()
-        n_out = (sub["Type"] == "LS out").sum()
-        out_explode = sum(len([t for t in str(r["To"]).split(",") if t.strip()])
-                        for _, r in sub[sub["Type"] == "LS out"].iterrows())
-        e = edges_by_meeting[edges_by_meeting["meeting"] == meeting]
-        sum_in = e[e["dir"] == "in"]["weight_raw"].sum()
-        sum_out_raw = e[e["dir"] == "out"]["weight_raw"].sum()
-        sum_out_split = e[e["dir"] == "out"]["weight_split"].sum()
+    validate_counts(meeting_counts(df, canon), edges_by_meeting)
+
+
+def validate_counts(counts: pd.DataFrame, edges_by_meeting: pd.DataFrame) -> None:
+    """validate_edges の本体。counts は meeting_counts の結果（チャンクでは合計）."""
+    sums = edges_by_meeting.groupby(["meeting", "dir"])[["weight_raw", "weight_split"]].sum()
+    for meeting, c in counts.iterrows():
+        n_in, n_out, out_explode = c["n_in"], c["n_out"], c["out_explode"]
+        sum_in = sums["weight_raw"].get((meeting, "in"), 0.0)
+        sum_out_raw = sums["weight_raw"].get((meeting, "out"), 0.0)
+        sum_out_split = sums["weight_split"].get((meeting, "out"), 0.0)
         ok_in = abs(sum_in - n_in) < 1e-6
         ok_raw = abs(sum_out_raw - out_explode) < 1e-6
         ok_split = abs(sum_out_split - n_out) < 1e-6
@@ -101,10 +382,9 @@ def validate_edges(df: pd.DataFrame, edges_by_meeting: pd.DataFrame) -> None:
         if not (ok_in and ok_raw and ok_split):
             print("    WARN: 数量不整合", file=sys.stderr)
 
-    n_in_all = (df["Type"] == "LS in").sum()
-    n_out_all = (df["Type"] == "LS out").sum()
-    out_explode_all = sum(len([t for t in str(r["To"]).split(",") if t.strip()])
-                         for _, r in df[df["Type"] == "LS out"].iterrows())
+    n_in_all = counts["n_in"].sum()
+    n_out_all = counts["n_out"].sum()
+    out_explode_all = counts["out_explode"].sum()
     sum_in_all = edges_by_meeting[edges_by_meeting["dir"] == "in"]["weight_raw"].sum()
     sum_raw_all = edges_by_meeting[edges_by_meeting["dir"] == "out"]["weight_raw"].sum()
     sum_split_all = edges_by_meeting[edges_by_meeting["dir"] == "out"]["weight_split"].sum()
@@ -113,49 +393,264 @@ def validate_edges(df: pd.DataFrame, edges_by_meeting: pd.DataFrame) -> None:
           f"LS out行={n_out_all} sum_split={sum_split_all:.2f}")
 
 
+def _num(v: float) -> int | float:
+    """JSON 用: 整数値は int、それ以外は小数 4 桁."""
+    v = round(float(v), 4)
+    return int(v) if v.is_integer() else v
+
+
+def build_node_table(edges_by_meeting: pd.DataFrame, top: int = NODE_TOP) -> dict:
+    """
+    viewer のノードクリック用に、ノードラベル → 向きごとの集計を返す
+    （viewer は O(1) で引く）。
+      in  = そのノードに入るフロー（to 側）、out = そのノードから出るフロー（from 側）
+      raw / split: 全会合の合計、series: 会合 → 合計（0 の会合は持たない。会合が増えても
+      関係の無いノードの値は変わらないので差分パッチが小さくなる）、
+      top: 相手ノード上位 top 件（[相手, raw, split]。raw 順と split 順の 2 通り）
+
+    edges_by_meeting を from 側（out）と to 側（in）の縦長表にし、会合別と相手別を
+    同じ key 列に並べて 1 回の groupby で集約する。
+    """
+    e = edges_by_meeting
+    if e.empty:
+        return {}
+    half = {"meeting": e["meeting"].to_numpy(dtype=object),
+            "raw": e["weight_raw"].to_numpy(dtype=np.float64),
+            "split": e["weight_split"].to_numpy(dtype=np.float64)}
+    long = pd.concat([
+        pd.DataFrame({"node": e["from"].to_numpy(dtype=object), "side": "out",
+                      "other": e["to"].to_numpy(dtype=object), **half}),
+        pd.DataFrame({"node": e["to"].to_numpy(dtype=object), "side": "in",
+                      "other": e["from"].to_numpy(dtype=object), **half}),
+    ], ignore_index=True)
+    keyed = pd.concat([long.assign(kind="meeting", key=long["meeting"]),
+                       long.assign(kind="other", key=long["other"])], ignore_index=True)
+    agg = keyed.groupby(["node", "side", "kind", "key"], sort=False)[["raw", "split"]].sum()
+
+    table: dict = {}
+    by_meeting = agg.xs("meeting", level="kind")
+    for (node, side, meeting), (raw, split) in zip(by_meeting.index, by_meeting.to_numpy()):
+        d = table.setdefault(node, {}).setdefault(side, {
+            "raw": 0.0, "split": 0.0,
+            "series": {"raw": {}, "split": {}},
+            "top": {"raw": [], "split": []},
+        })
+        d["raw"] += raw
+        d["split"] += split
+        d["series"]["raw"][meeting] = _num(raw)
+        d["series"]["split"][meeting] = _num(split)
+    for d in (d for sides in table.values() for d in sides.values()):
+        d["raw"], d["split"] = _num(d["raw"]), _num(d["split"])
+
+    counterparts = agg.xs("other", level="kind").reset_index()
+    for weight in ("raw", "split"):
+        ranked = counterparts.sort_values([weight, "key"], ascending=[False, True], kind="stable")
+        for node, side, other, raw, split in ranked[["node", "side", "key", "raw", "split"]].itertuples(
+                index=False, name=None):
+            lst = table[node][side]["top"][weight]
+            if len(lst) < top:
+                lst.append([other, _num(raw), _num(split)])
+    return table
+
+
+def render_data_js(meetings: list, edges_by_meeting: pd.DataFrame,
+                   edges_total: pd.DataFrame, node_table: dict | None = None) -> str:
+    """window.LIAISON_DATA を定義する data.js の中身を返す."""
+    data_js = {
+        "meetings": meetings,
+        "edgesByMeeting": edges_by_meeting.fillna("").to_dict(orient="records"),
+        "edgesTotal": edges_total.fillna("").to_dict(orient="records"),
+    }
+    if node_table is not None:
+        data_js["nodeTable"] = node_table
+    data_js["version"] = dataset_version(data_js)
+    return DATA_JS_PREFIX + json.dumps(data_js, ensure_ascii=False) + ";\n"
+
+
+def dataset_version(data: dict) -> str:
+    """data.js の中身（version を除く）の SHA-256 先頭 16 桁。差分パッチの基準版の照合用."""
+    body = {k: v for k, v in data.items() if k != "version"}
+    return hashlib.sha256(json.dumps(body, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def read_data_js(path: str | Path) -> dict:
+    """render_data_js の逆。version の無い古い data.js はその場で version を計算して付ける."""
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if not text.startswith(DATA_JS_PREFIX):
+        raise ValueError(f"window.LIAISON_DATA の定義が見つかりません: {path}")
+    data = json.loads(text[len(DATA_JS_PREFIX):].rstrip(";"))
+    data.setdefault("version", dataset_version(data))
+    return data
+
+
+def render_trends_js(trends: dict) -> str:
+    """window.LIAISON_TRENDS（viewer の Trends 表示用）を定義する trends.js の中身を返す."""
+    return "window.LIAISON_TRENDS = " + json.dumps(trends, ensure_ascii=False) + ";\n"
+
+
+def render_frames_js(frames: dict) -> str:
+    """window.LIAISON_FRAMES（viewer のタイムライン再生用）を定義する frames.js の中身を返す."""
+    return "window.LIAISON_FRAMES = " + json.dumps(frames, ensure_ascii=False) + ";\n"
+
+
+def set_patch_script(outdir: Path, enabled: bool) -> None:
+    """outdir の index.html に data_patch.js の読み込みを足す / 外す（無ければ何もしない）."""
+    index = outdir / "index.html"
+    if index.exists():
+        html = index.read_text(encoding="utf-8")
+        updated = ViewerTemplateBuilder.set_patch_script(html, enabled)
+        if updated != html:
+            index.write_text(updated, encoding="utf-8")
+
+
+def write_viewer_data(outdir: Path, meetings: list, edges_by_meeting: pd.DataFrame,
+                      edges_total: pd.DataFrame, prof: Profiler, *, trend_window: int = 4,
+                      top_k: int = 10) -> None:
+    """
+    viewer 1 つ分のデータ（edges CSV / data.js / edge_matrix.* / trends.js / frames.js）を outdir に書く。
+    build_liaison_batch.py も viewer ごとにこれを呼ぶ。
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    with prof.span("write_csv") as sp:
+        edges_by_meeting.to_csv(outdir / "edges_by_meeting.csv", index=False, encoding="utf-8-sig")
+        edges_total.to_csv(outdir / "edges_total.csv", index=False, encoding="utf-8-sig")
+        sp.rows = len(edges_by_meeting) + len(edges_total)
+        sp.bytes_written = sum((outdir / n).stat().st_size
+                               for n in ("edges_by_meeting.csv", "edges_total.csv"))
+    print(f"edges_by_meeting.csv, edges_total.csv: {outdir}")
+
+    with prof.span("node_table", cprofile=True) as sp:
+        node_table = build_node_table(edges_by_meeting)
+        sp.rows = len(node_table)
+
+    with prof.span("data_js", cprofile=True) as sp:
+        content = render_data_js(meetings, edges_by_meeting, edges_total, node_table)
+        (outdir / "data.js").write_text(content, encoding="utf-8")
+        sp.rows = len(edges_by_meeting) + len(edges_total)
+        sp.bytes_written = (outdir / "data.js").stat().st_size
+    print(f"data.js: {outdir / 'data.js'}")
+    # 前回の差分パッチは前の data.js 向けなので残さない
+    # （必要なら build_liaison_delta.py で作り直す）
+    if (outdir / PATCH_FILE).exists():
+        (outdir / PATCH_FILE).unlink()
+        print(f"{PATCH_FILE} を削除しました（data.js を再生成したため）")
+    set_patch_script(outdir, False)
+
+    with prof.span("edge_matrix", cprofile=True) as sp:
+        matrix = EdgeMatrix.from_edges(edges_by_meeting, edges_total,
+                                       [m for m in meetings if pd.notna(m)])
+        matrix.save(outdir)
+        sp.rows = len(matrix.row)
+        sp.bytes_written = sum((outdir / n).stat().st_size for n in MATRIX_FILES)
+    print(f"{', '.join(MATRIX_FILES)}: {outdir}  shape={matrix.shape} nnz={len(matrix.row)}")
+
+    with prof.span("trends", cprofile=True) as sp:
+        trends = analyze(matrix, window=trend_window, k=top_k)
+        (outdir / "trends.js").write_text(render_trends_js(trends), encoding="utf-8")
+        sp.bytes_written = (outdir / "trends.js").stat().st_size
+    print(f"trends.js: {outdir / 'trends.js'}")
+
+    with prof.span("frames", cprofile=True) as sp:
+        frames = build_frames(matrix)
+        (outdir / "frames.js").write_text(render_frames_js(frames), encoding="utf-8")
+        sp.rows = len(frames["meetings"])
+        sp.bytes_written = (outdir / "frames.js").stat().st_size
+    print(f"frames.js: {outdir / 'frames.js'}")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Liaison Excel → data.js, edges CSV")
     parser.add_argument("--input", required=True, help="正規化 Liaison Excel")
     parser.add_argument("--outdir", required=True, help="出力フォルダ")
     parser.add_argument("--precision", type=int, default=None,
                         help="weight_split の丸め桁数（例: 6）")
+    parser.add_argument("--unmapped-report", default="",
+                        help="別名表に無かった組織名と出現回数の CSV 出力先")
+    parser.add_argument("--trend-window", type=int, default=4,
+                        help="Trends の移動合計・傾きに使う直近の会合数（デフォルト 4）")
+    parser.add_argument("--top-k", type=int, default=10,
+                        help="Trends に出す増加・減少エッジの件数（デフォルト 10）")
+    parser.add_argument("--chunk-rows", type=int, default=0,
+                        help="N 行ずつ読んで集約する"
+                             "（メモリがエッジ数に比例。0 = 一括読み込み）")
+    add_canon_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    prof = Profiler.from_args(args, "build_liaison_data")
+    canon = OrgCanonicalizer.from_args(args)
 
     input_path = Path(args.input)
     if not input_path.exists():
         print(f"ERROR: 入力ファイルが見つかりません: {input_path}", file=sys.stderr)
         sys.exit(1)
 
-    df = pd.read_excel(input_path, sheet_name="liaison", engine="openpyxl")
-    print(f"読み込み行数: {len(df)}")
+    if args.chunk_rows < 0:
+        print(f"ERROR: --chunk-rows は 0 以上: {args.chunk_rows}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.chunk_rows:
+        # チャンク集約: 入力全体も宛先展開した表も持たない
+        acc = EdgeAccumulator(canon)
+        # 正規化の前後比較用
+        # （キャッシュ・集計を汚さないよう before は正規化なしで数える）
+        acc_before = EdgeAccumulator() if canon is not None else None
+        with prof.span("aggregate_chunks", cprofile=True, chunk_rows=args.chunk_rows) as sp:
+            try:
+                for chunk in iter_liaison_chunks(input_path, args.chunk_rows):
+                    acc.add(chunk)
+                    if acc_before is not None:
+                        acc_before.add(chunk)
+            except (KeyError, ValueError) as e:
+                print(f"ERROR: {e}", file=sys.stderr)
+                sys.exit(1)
+            sp.rows = acc.rows
+            sp.bytes_read = input_path.stat().st_size
+        print(f"読み込み行数: {acc.rows}（{args.chunk_rows} 行ずつ）")
+        counts = acc.meeting_counts if acc.meeting_counts is not None else meeting_counts(
+            pd.DataFrame(columns=LIAISON_COLUMNS))
+        meetings = sorted(acc.meetings())
+    else:
+        with prof.span("read_excel", cprofile=True) as sp:
+            df = read_liaison(input_path)
+            sp.rows = len(df)
+            sp.bytes_read = input_path.stat().st_size
+        print(f"読み込み行数: {len(df)}")
+        counts = meeting_counts(df, canon)
+        meetings = sorted(df["RAN"].unique().tolist())
 
-    for meeting in sorted(df["RAN"].unique()):
-        sub = df[df["RAN"] == meeting]
-        n_in = (sub["Type"] == "LS in").sum()
-        n_out = (sub["Type"] == "LS out").sum()
-        print(f"  {meeting}: LS in={n_in}, LS out={n_out}")
+    for meeting, c in counts.iterrows():
+        print(f"  {meeting}: LS in={c['n_in']}, LS out={c['n_out']}")
 
-    edges_by_meeting, edges_total = build_edges(df, precision=args.precision)
+    with prof.span("build_edges", cprofile=True) as sp:
+        if args.chunk_rows:
+            edges_by_meeting, edges_total = acc.edges(precision=args.precision)
+        else:
+            edges_by_meeting, edges_total = build_edges(df, precision=args.precision, canon=canon)
+        sp.rows = len(edges_by_meeting)
 
     print("検算（meeting ごと・all）:")
-    validate_edges(df, edges_by_meeting)
+    with prof.span("validate_edges", cprofile=True):
+        validate_counts(counts, edges_by_meeting)
 
-    outdir = Path(args.outdir)
-    outdir.mkdir(parents=True, exist_ok=True)
+    if canon is not None:
+        # 正規化の前後比較
+        # （キャッシュ・集計を汚さないよう before は正規化なしで数える）
+        before = acc_before.size() if args.chunk_rows else graph_size(df)
+        after = {"nodes": len(set(edges_total["from"]) | set(edges_total["to"])),
+                 "edges_total": len(edges_total), "edges_by_meeting": len(edges_by_meeting)}
+        print(f"  組織名の正規化: ノード {before['nodes']} → {after['nodes']} | "
+              f"エッジ(total) {before['edges_total']} → {after['edges_total']} | "
+              f"エッジ(meeting 別) {before['edges_by_meeting']} → {after['edges_by_meeting']}")
+        print(f"  {canon.summary()}")
+        canon.print_unmapped()
+        if args.unmapped_report:
+            canon.write_unmapped(args.unmapped_report)
+            print(f"未対応の組織名: {args.unmapped_report}")
 
-    edges_by_meeting.to_csv(outdir / "edges_by_meeting.csv", index=False, encoding="utf-8-sig")
-    edges_total.to_csv(outdir / "edges_total.csv", index=False, encoding="utf-8-sig")
-    print(f"edges_by_meeting.csv, edges_total.csv: {outdir}")
-
-    meetings = sorted(df["RAN"].unique().tolist())
-    data_js = {
-        "meetings": meetings,
-        "edgesByMeeting": edges_by_meeting.fillna("").to_dict(orient="records"),
-        "edgesTotal": edges_total.fillna("").to_dict(orient="records"),
-    }
-    content = "window.LIAISON_DATA = " + json.dumps(data_js, ensure_ascii=False) + ";\n"
-    (outdir / "data.js").write_text(content, encoding="utf-8")
-    print(f"data.js: {outdir / 'data.js'}")
+    write_viewer_data(Path(args.outdir), meetings, edges_by_meeting, edges_total, prof,
+                      trend_window=args.trend_window, top_k=args.top_k)
+    prof.finish(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,197 @@
+"""
+2 つの viewer フォルダ（更新前 / 更新後）の data.js を比べ、
+変化の一覧と差分パッチを作る。
+
+- edgesByMeeting を (meeting, edge_key) でハッシュ結合し、追加・削除・重み変化のエッジを出す
+- 会合ごとの LS 件数（LS in 行数 / LS out 行数）が変わった会合を出す
+- 更新後フォルダに data_patch.js（window.LIAISON_PATCH）を書き、index.html に読み込みを足す。
+  viewer は localStorage に基準版（更新前の version）があればパッチだけを当て、
+  無ければ data.js を全量読む
+
+例:
+  cp -r out/viewer_90_110 out/viewer_90_110.prev      # 更新前を残してから再生成
+  python build_liaison_html.py --input out/liaison_90_110.xlsx --outdir out/viewer_90_110
+  python build_liaison_delta.py --old out/viewer_90_110.prev --new out/viewer_90_110
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from build_liaison_data import PATCH_FILE, read_data_js, set_patch_script
+from util.instrument import Profiler, add_profile_args
+
+PATCH_FORMAT = 1
+PATCH_JS_PREFIX = "window.LIAISON_PATCH = "
+EDGE_KEY = ["meeting", "edge_key"]
+WEIGHT_COLUMNS = ["raw_count", "weight_raw", "weight_split"]
+ATOL = 1e-9
+
+
+def _records(rows: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(rows)
+    if df.empty:
+        df = pd.DataFrame(columns=["meeting", "dir", "from", "to", "edge_key", *WEIGHT_COLUMNS])
+    return df
+
+
+def diff_edges(old: pd.DataFrame, new: pd.DataFrame, keys: list[str] = EDGE_KEY) -> pd.DataFrame:
+    """
+    keys でハッシュ結合し、変化のあった行だけを返す。
+    change = added（new のみ）/ removed（old のみ）/
+             reweighted（raw_count・weight_* のどれかが変化）。
+    """
+    labels = [c for c in ("dir", "from", "to") if c not in keys]
+    cols = keys + labels + WEIGHT_COLUMNS
+    m = old[cols].merge(new[cols], on=keys, how="outer", suffixes=("_old", "_new"), indicator=True)
+    moved = np.zeros(len(m), dtype=bool)
+    both = (m["_merge"] == "both").to_numpy()
+    for c in WEIGHT_COLUMNS:
+        a = pd.to_numeric(m[f"{c}_old"]).to_numpy(dtype=np.float64)
+        b = pd.to_numeric(m[f"{c}_new"]).to_numpy(dtype=np.float64)
+        moved |= both & ~np.isclose(a, b, rtol=0.0, atol=ATOL)
+    change = np.select([m["_merge"] == "right_only", m["_merge"] == "left_only", moved],
+                       ["added", "removed", "reweighted"], "")
+    m.insert(0, "change", change)
+    for c in labels:
+        m[c] = m[f"{c}_new"].where(m[f"{c}_new"].notna(), m[f"{c}_old"])
+    out = m[m["change"] != ""]
+    return out[["change", *keys, *labels,
+                *[f"{c}_{s}" for c in WEIGHT_COLUMNS for s in ("old", "new")]]].reset_index(drop=True)
+
+
+def meeting_ls_counts(edges_by_meeting: pd.DataFrame) -> pd.DataFrame:
+    """
+    会合ごとの LS in 行数（in の raw_count 合計）と
+    LS out 行数（out の weight_split 合計 = 1/k の和）.
+    """
+    e = edges_by_meeting
+    if e.empty:
+        return pd.DataFrame(columns=["n_in", "n_out"], dtype=np.int64)
+    n_in = e[e["dir"] == "in"].groupby("meeting")["raw_count"].sum()
+    n_out = e[e["dir"] == "out"].groupby("meeting")["weight_split"].sum().round()
+    out = pd.DataFrame({"n_in": n_in, "n_out": n_out}).fillna(0).astype(np.int64)
+    return out.rename_axis("meeting")
+
+
+def diff_meetings(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """LS 件数が変わった会合（追加・削除された会合を含む）."""
+    a, b = meeting_ls_counts(old), meeting_ls_counts(new)
+    m = a.join(b, how="outer", lsuffix="_old", rsuffix="_new").fillna(0).astype(np.int64)
+    m = m[(m["n_in_old"] != m["n_in_new"]) | (m["n_out_old"] != m["n_out_new"])]
+    return m.reset_index()
+
+
+def build_patch(old: dict, new: dict, edge_changes: pd.DataFrame,
+                total_changes: pd.DataFrame) -> dict:
+    """
+    old の dataset に当てると new になるパッチ。edgesByMeeting / edgesTotal は変化した行の
+    置き換え（upsert）と削除（remove）、nodeTable は変化したノードだけ、
+    meetings は全体を持つ。
+    """
+    new_em = {(e["meeting"], e["edge_key"]): e for e in new["edgesByMeeting"]}
+    new_et = {e["edge_key"]: e for e in new["edgesTotal"]}
+    em_gone = edge_changes["change"] == "removed"
+    et_gone = total_changes["change"] == "removed"
+    old_nodes, new_nodes = old.get("nodeTable") or {}, new.get("nodeTable") or {}
+    return {
+        "format": PATCH_FORMAT,
+        "base": old["version"],
+        "version": new["version"],
+        "meetings": new["meetings"],
+        "edgesByMeeting": {
+            "upsert": [new_em[k] for k in zip(edge_changes.loc[~em_gone, "meeting"],
+                                              edge_changes.loc[~em_gone, "edge_key"])],
+            "remove": [[m, k] for m, k in zip(edge_changes.loc[em_gone, "meeting"],
+                                              edge_changes.loc[em_gone, "edge_key"])],
+        },
+        "edgesTotal": {
+            "upsert": [new_et[k] for k in total_changes.loc[~et_gone, "edge_key"]],
+            "remove": total_changes.loc[et_gone, "edge_key"].tolist(),
+        },
+        "nodeTable": {
+            "set": {n: v for n, v in new_nodes.items() if old_nodes.get(n) != v},
+            "remove": sorted(set(old_nodes) - set(new_nodes)),
+        },
+        "counts": {"edgesByMeeting": len(new["edgesByMeeting"]),
+                   "edgesTotal": len(new["edgesTotal"])},
+    }
+
+
+def render_patch_js(patch: dict) -> str:
+    return PATCH_JS_PREFIX + json.dumps(patch, ensure_ascii=False) + ";\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="viewer の data.js 2 版の差分 → 変化の一覧 + data_patch.js"
+    )
+    parser.add_argument("--old", required=True, help="更新前の viewer フォルダ（data.js を含む）")
+    parser.add_argument("--new", required=True,
+                        help="更新後の viewer フォルダ（data_patch.js をここに書く）")
+    parser.add_argument("--report", default="",
+                        help="変化の一覧 delta_edges.csv / delta_meetings.csv の出力フォルダ"
+                             "（省略時は書かない）")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    prof = Profiler.from_args(args, "build_liaison_delta")
+
+    old_dir, new_dir = Path(args.old), Path(args.new)
+    for d in (old_dir, new_dir):
+        if not (d / "data.js").exists():
+            print(f"ERROR: data.js が見つかりません: {d}", file=sys.stderr)
+            sys.exit(1)
+
+    with prof.span("read_data_js") as sp:
+        try:
+            old, new = read_data_js(old_dir / "data.js"), read_data_js(new_dir / "data.js")
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        sp.bytes_read = sum((d / "data.js").stat().st_size for d in (old_dir, new_dir))
+    print(f"更新前: {old['version']}（{len(old['edgesByMeeting'])} 行） → "
+          f"更新後: {new['version']}（{len(new['edgesByMeeting'])} 行）")
+
+    with prof.span("diff", cprofile=True) as sp:
+        old_em, new_em = _records(old["edgesByMeeting"]), _records(new["edgesByMeeting"])
+        edge_changes = diff_edges(old_em, new_em)
+        total_changes = diff_edges(_records(old["edgesTotal"]), _records(new["edgesTotal"]),
+                                   keys=["edge_key"])
+        meeting_changes = diff_meetings(old_em, new_em)
+        sp.rows = len(old_em) + len(new_em)
+
+    counts = edge_changes["change"].value_counts()
+    print(f"エッジ（meeting 別）: 追加 {counts.get('added', 0)} / 削除 {counts.get('removed', 0)} / "
+          f"重み変化 {counts.get('reweighted', 0)}")
+    for _, r in meeting_changes.iterrows():
+        print(f"  {r['meeting']}: LS in {r['n_in_old']} → {r['n_in_new']}, "
+              f"LS out {r['n_out_old']} → {r['n_out_new']}")
+
+    # 変化が無くても書く
+    # （base = version の空パッチ。viewer はキャッシュをそのまま使える）
+    patch_path = new_dir / PATCH_FILE
+    with prof.span("write_patch") as sp:
+        patch = build_patch(old, new, edge_changes, total_changes)
+        patch_path.write_text(render_patch_js(patch), encoding="utf-8")
+        sp.bytes_written = patch_path.stat().st_size
+    set_patch_script(new_dir, True)
+    print(f"{PATCH_FILE}: {patch_path}（{patch_path.stat().st_size} bytes / "
+          f"data.js {(new_dir / 'data.js').stat().st_size} bytes）")
+
+    if args.report:
+        report = Path(args.report)
+        report.mkdir(parents=True, exist_ok=True)
+        edge_changes.to_csv(report / "delta_edges.csv", index=False, encoding="utf-8-sig")
+        meeting_changes.to_csv(report / "delta_meetings.csv", index=False, encoding="utf-8-sig")
+        print(f"delta_edges.csv, delta_meetings.csv: {report}")
+    prof.finish(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,25 @@ import re
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from pandas.api.types import union_categoricals
+
+from util.instrument import Profiler, add_profile_args
+from util.org_canon import OrgCanonicalizer, add_canon_args
+
+
+LIAISON_COLUMNS = ["RAN", "Source", "Type", "To"]
+# 返信チェーン（build_reply_chains.py）用に TDoc List から残す列
+LINK_COLUMNS = ["TDoc", "Title", "Reply to", "Original LS", "Reply in"]
+OUTPUT_COLUMNS = LIAISON_COLUMNS + LINK_COLUMNS
+LS_TYPES = ["LS in", "LS out"]
+SHEET_NAME = "liaison"
+COLUMN_WIDTHS = {"A": 10, "B": 30, "C": 10, "D": 50, "E": 12, "F": 60, "G": 28, "H": 20,
+                 "I": 20}
+WRITE_CHUNK = 10000
 
 
 def extract_meeting_id(filepath: str) -> str:
@@ -17,6 +34,15 @@ def extract_meeting_id(filepath: str) -> str:
     return m.group()
 
 
+def _text_column(ls: pd.DataFrame, col: str) -> np.ndarray:
+    """任意列を str（前後空白除去）の object 配列で返す。列が無い・欠損・空は None."""
+    if col not in ls.columns:
+        return np.full(len(ls), None, dtype=object)
+    values = ls[col].astype(object).to_numpy()
+    return np.asarray([None if pd.isna(v) or str(v).strip() == "" else str(v).strip()
+                       for v in values], dtype=object)
+
+
 def load_liaison_rows(filepath: str, meeting_id: str) -> pd.DataFrame:
     """1ファイル分の LS in / LS out 行を抽出・正規化して返す."""
     df = pd.read_excel(filepath, sheet_name="TDoc_List", engine="openpyxl")
@@ -25,42 +51,172 @@ def load_liaison_rows(filepath: str, meeting_id: str) -> pd.DataFrame:
         if col not in df.columns:
             raise ValueError(f"必須列 '{col}' が見つかりません: {filepath}")
 
-    ls = df[df["Type"].isin(["LS in", "LS out"])].copy()
+    ls = df[df["Type"].isin(LS_TYPES)]
 
     n_in = (ls["Type"] == "LS in").sum()
     n_out = (ls["Type"] == "LS out").sum()
     print(f"  {meeting_id}: LS in={n_in}, LS out={n_out}, 合計={n_in + n_out}")
 
-    rows = []
-    for _, r in ls.iterrows():
-        src = str(r["Source"]) if pd.notna(r["Source"]) else ""
-        to_ = str(r["To"]) if pd.notna(r["To"]) else ""
-        typ = r["Type"]
+    # 行ごとの dict ではなく列単位で組み立て、値は category（辞書 + コード）で持つ
+    is_in = (ls["Type"] == "LS in").to_numpy()
+    src = ls["Source"].astype(object).where(ls["Source"].notna(), "").astype(str).to_numpy()
+    to_ = ls["To"].astype(object).where(ls["To"].notna(), "").astype(str).to_numpy()
+    # TDoc / Title / Reply to 等はほぼ一意なので category にせずそのまま持つ
+    return pd.DataFrame({
+        "RAN": pd.Categorical([meeting_id] * len(ls)),
+        "Source": pd.Categorical(np.where(is_in, src, "RAN")),
+        "Type": pd.Categorical(ls["Type"].to_numpy(), categories=LS_TYPES),
+        "To": pd.Categorical(np.where(is_in, "RAN", to_)),
+        **{c: _text_column(ls, c) for c in LINK_COLUMNS},
+    }, columns=OUTPUT_COLUMNS)
+
+
+def concat_liaison_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """load_liaison_rows の結果を category のまま連結する（辞書は和集合）."""
+    # LS 行が 0 件の会合は辞書の型が object になり（pandas 3 では非空の辞書は str 型）、
+    # union_categoricals が型の不一致で落ちるので連結から外す（全部空なら 1 つだけ残す）
+    frames = [f for f in frames if len(f)] or frames[:1]
+    cols = {c: union_categoricals([f[c] for f in frames]) for c in LIAISON_COLUMNS}
+    for c in LINK_COLUMNS:
+        cols[c] = np.concatenate([f[c].to_numpy(dtype=object) for f in frames])
+    return pd.DataFrame(cols, columns=OUTPUT_COLUMNS)
+
+
+class LiaisonConcat:
+    """
+    load_liaison_rows の結果を届いた順に受け取り、最後に key の順で連結する
+    （concat_liaison_frames と同じ値）。
+    届いた時点で category の値を共有の辞書のコードに置き換えてフレームは手放すので、
+    全ファイルが揃った後に残る仕事はコード配列の並べ替えと連結だけになる。
+    """
+
+    def __init__(self) -> None:
+        self._dicts: dict[str, dict[str, int]] = {c: {} for c in LIAISON_COLUMNS}
+        self._parts: dict[str, tuple[dict[str, np.ndarray], dict[str, np.ndarray]]] = {}
+        self._empty: pd.DataFrame | None = None
+        self.rows = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._parts
+
+    def add(self, key: str, frame: pd.DataFrame) -> None:
+        """key（files.txt のファイル名）のフレームを取り込む."""
+        if not len(frame):
+            # 0 件の会合は連結から外す（concat_liaison_frames と同じ）。
+            # 全部 0 件の場合用に 1 つ残す
+            self._empty = frame if self._empty is None else self._empty
+            self._parts[key] = ({}, {})
+            return
+        codes = {}
+        for c in LIAISON_COLUMNS:
+            cat = frame[c].array
+            d = self._dicts[c]
+            remap = np.asarray([d.setdefault(v, len(d)) for v in cat.categories] + [-1], dtype=np.int64)
+            codes[c] = remap[cat.codes]
+        links = {c: frame[c].to_numpy(dtype=object) for c in LINK_COLUMNS}
+        self._parts[key] = (codes, links)
+        self.rows += len(frame)
 
-        if typ == "LS in":
-            rows.append({"RAN": meeting_id, "Source": src, "Type": typ, "To": "RAN"})
-        else:
-            rows.append({"RAN": meeting_id, "Source": "RAN", "Type": typ, "To": to_})
+    def result(self, order: list[str]) -> pd.DataFrame | None:
+        """order の順（取り込んでいない key は飛ばす）に連結した表。1 件も無ければ None."""
+        parts = [self._parts[k] for k in order if k in self._parts]
+        parts = [p for p in parts if p[0]]
+        if not parts:
+            return None if self._empty is None else concat_liaison_frames([self._empty])
+        cols = {c: pd.Categorical.from_codes(np.concatenate([p[0][c] for p in parts]),
+                                             categories=list(self._dicts[c])).remove_unused_categories()
+                for c in LIAISON_COLUMNS}
+        for c in LINK_COLUMNS:
+            cols[c] = np.concatenate([p[1][c] for p in parts])
+        return pd.DataFrame(cols, columns=OUTPUT_COLUMNS)
 
-    return pd.DataFrame(rows, columns=["RAN", "Source", "Type", "To"])
 
+def _recode(col: pd.Categorical, fn) -> pd.Categorical:
+    """辞書の各値に fn(値, 出現回数) を適用し、同じ値に潰れた項目をまとめ直す."""
+    cats = list(col.categories)
+    freq = np.bincount(col.codes[col.codes >= 0], minlength=len(cats))
+    mapped = [fn(v, int(n)) for v, n in zip(cats, freq)]
+    new_cats = sorted(set(mapped))
+    index = {v: i for i, v in enumerate(new_cats)}
+    remap = np.asarray([index[v] for v in mapped] + [-1], dtype=np.int64)
+    return pd.Categorical.from_codes(remap[col.codes], categories=new_cats)
 
-def style_workbook(path: str) -> None:
-    """ヘッダ固定・オートフィルタ・列幅を整える."""
-    wb = load_workbook(path)
-    ws = wb["liaison"]
+
+def canonicalize_liaison(result: pd.DataFrame, canon: OrgCanonicalizer) -> pd.DataFrame:
+    """Source / To の組織名を正規化する（category の辞書単位なので表記ごとに 1 回）."""
+    out = result.copy()
+    out["Source"] = _recode(result["Source"].array, canon.canonical_source)
+    out["To"] = _recode(result["To"].array, canon.join)
+    return out
+
+
+def org_name_count(result: pd.DataFrame) -> int:
+    """Source と To（カンマ分割）に現れる組織名の種類数（RAN を含む）."""
+    names = {str(v).strip() for v in result["Source"].cat.categories}
+    for v in result["To"].cat.categories:
+        names.update(t.strip() for t in str(v).split(","))
+    names.discard("")
+    return len(names)
+
+
+def iter_liaison_rows(result: pd.DataFrame, chunk: int = WRITE_CHUNK):
+    """行を chunk 件ずつ Python 値に戻して 1 行ずつ返す（欠損は None = 空セル）."""
+    for start in range(0, len(result), chunk):
+        part = result.iloc[start:start + chunk]
+        cols = []
+        for c in result.columns:
+            values = part[c].astype(object).tolist()
+            for i in np.flatnonzero(part[c].isna().to_numpy()):
+                values[i] = None
+            cols.append(values)
+        yield from zip(*cols)
+
+
+def write_liaison_excel(result: pd.DataFrame, out_path: Path) -> None:
+    """
+    正規化済み行を liaison シートに 1 パスで書き出す。
+    write_only で行を流し込むので、行数によらず書き出し側のメモリは一定。
+    ヘッダ固定・オートフィルタ・列幅は書き込み前に設定する
+    （保存後の読み直しはしない）。
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_NAME)
     ws.freeze_panes = "A2"
-    ws.auto_filter.ref = ws.dimensions
-    for letter, width in {"A": 10, "B": 30, "C": 10, "D": 50}.items():
+    ws.auto_filter.ref = f"A1:{get_column_letter(len(result.columns))}{len(result) + 1}"
+    for letter, width in COLUMN_WIDTHS.items():
         ws.column_dimensions[letter].width = width
-    wb.save(path)
+    ws.append(list(result.columns))
+    for row in iter_liaison_rows(result):
+        ws.append(row)
+    wb.save(out_path)
+
+
+def apply_canon(result: pd.DataFrame, canon: OrgCanonicalizer, report: str,
+                prof: Profiler) -> pd.DataFrame:
+    """組織名を正規化し、種類数の前後と未対応の名前を表示する."""
+    with prof.span("canonicalize", version=canon.version) as sp:
+        before = org_name_count(result)
+        result = canonicalize_liaison(result, canon)
+        sp.rows = len(result)
+    print(f"組織名の正規化: {before} 種 → {org_name_count(result)} 種 / {canon.summary()}")
+    canon.print_unmapped()
+    if report:
+        canon.write_unmapped(report)
+        print(f"未対応の組織名: {report}")
+    return result
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="TDoc List → Liaison Excel")
     parser.add_argument("--list", required=True, help="入力ファイルリスト (1行1パス)")
     parser.add_argument("--out", required=True, help="出力Excelパス")
+    parser.add_argument("--unmapped-report", default="",
+                        help="別名表に無かった組織名と出現回数の CSV 出力先")
+    add_canon_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    prof = Profiler.from_args(args, "build_liaison_excel")
+    canon = OrgCanonicalizer.from_args(args)
 
     list_path = Path(args.list)
     if not list_path.exists():
@@ -74,28 +230,36 @@ def main() -> None:
     ]
 
     all_frames: list[pd.DataFrame] = []
-    for fp in files:
-        p = Path(fp)
-        if not p.is_absolute():
-            p = list_path.parent / p
-        if not p.exists():
-            print(f"ERROR: 入力ファイルが見つかりません: {p}", file=sys.stderr)
-            sys.exit(1)
-
-        meeting_id = extract_meeting_id(str(p))
-        print(f"処理中: {p.name}")
-        frame = load_liaison_rows(str(p), meeting_id)
-        all_frames.append(frame)
-
-    result = pd.concat(all_frames, ignore_index=True)
+    with prof.span("load", cprofile=True) as stage:
+        for fp in files:
+            p = Path(fp)
+            if not p.is_absolute():
+                p = list_path.parent / p
+            if not p.exists():
+                print(f"ERROR: 入力ファイルが見つかりません: {p}", file=sys.stderr)
+                sys.exit(1)
+
+            meeting_id = extract_meeting_id(str(p))
+            print(f"処理中: {p.name}")
+            with prof.span(p.name, "file", meeting=meeting_id) as sp:
+                frame = load_liaison_rows(str(p), meeting_id)
+                sp.rows = len(frame)
+                sp.bytes_read = p.stat().st_size
+            all_frames.append(frame)
+
+        result = concat_liaison_frames(all_frames)
+        stage.rows = len(result)
     print(f"\n出力行数(ヘッダ除く): {len(result)}")
+    if canon is not None:
+        result = apply_canon(result, canon, args.unmapped_report, prof)
 
     out_path = Path(args.out)
-    with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
-        result.to_excel(writer, sheet_name="liaison", index=False)
-
-    style_workbook(str(out_path))
+    with prof.span("write_xlsx", cprofile=True) as sp:
+        write_liaison_excel(result, out_path)
+        sp.rows = len(result)
+        sp.bytes_written = out_path.stat().st_size
     print(f"出力完了: {out_path}")
+    prof.finish(args)
 
 
 if __name__ == "__main__":
@@ -3,8 +3,22 @@
 import argparse
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
 
+from util.instrument import Profiler, add_profile_args, read_trace_events
+from util.org_canon import add_canon_args
+
+
+def _child_profile_args(args, tmpdir: Path, name: str) -> list[str]:
+    """子プロセスにも計測を引き継ぐ引数（trace は tmpdir に書かせて後でマージ）."""
+    extra: list[str] = []
+    if args.profile:
+        extra.extend(["--profile", str(tmpdir / f"{name}.json")])
+    if args.cprofile_dir:
+        extra.extend(["--cprofile-dir", args.cprofile_dir])
+    return extra
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Liaison Excel → Sankey viewer")
@@ -12,36 +26,58 @@ def main() -> None:
     parser.add_argument("--outdir", required=True, help="出力 viewer フォルダ")
     parser.add_argument("--precision", type=int, default=None, help="weight_split の丸め桁数")
     parser.add_argument("--debug", action="store_true", help="app.js にデバッグログを埋め込む")
+    add_canon_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    prof = Profiler.from_args(args, "build_liaison_html")
 
     script_dir = Path(__file__).resolve().parent
+    # 子プロセスの trace を置く一時フォルダ。途中で終了しても必ず消す
+    tmp = tempfile.TemporaryDirectory()
+    try:
+        tmpdir = Path(tmp.name)
+
+        # 1) データ生成
+        cmd_data = [
+            sys.executable,
+            str(script_dir / "build_liaison_data.py"),
+            "--input", args.input,
+            "--outdir", args.outdir,
+        ]
+        if args.precision is not None:
+            cmd_data.extend(["--precision", str(args.precision)])
+        if args.no_canon:
+            cmd_data.append("--no-canon")
+        if args.aliases:
+            cmd_data.extend(["--aliases", args.aliases])
+        cmd_data.extend(_child_profile_args(args, tmpdir, "data"))
+        with prof.span("build_liaison_data", "subprocess"):
+            r1 = subprocess.run(cmd_data)
+        if r1.returncode != 0:
+            sys.exit(r1.returncode)
+
+        # 2) テンプレート生成
+        cmd_tpl = [
+            sys.executable,
+            str(script_dir / "build_liaison_template.py"),
+            "--outdir", args.outdir,
+        ]
+        if args.debug:
+            cmd_tpl.append("--debug")
+        cmd_tpl.extend(_child_profile_args(args, tmpdir, "template"))
+        with prof.span("build_liaison_template", "subprocess"):
+            r2 = subprocess.run(cmd_tpl)
+        if r2.returncode != 0:
+            sys.exit(r2.returncode)
 
-    # 1) データ生成
-    cmd_data = [
-        sys.executable,
-        str(script_dir / "build_liaison_data.py"),
-        "--input", args.input,
-        "--outdir", args.outdir,
-    ]
-    if args.precision is not None:
-        cmd_data.extend(["--precision", str(args.precision)])
-    r1 = subprocess.run(cmd_data)
-    if r1.returncode != 0:
-        sys.exit(r1.returncode)
-
-    # 2) テンプレート生成
-    cmd_tpl = [
-        sys.executable,
-        str(script_dir / "build_liaison_template.py"),
-        "--outdir", args.outdir,
-    ]
-    if args.debug:
-        cmd_tpl.append("--debug")
-    r2 = subprocess.run(cmd_tpl)
-    if r2.returncode != 0:
-        sys.exit(r2.returncode)
-
-    print(f"viewer: {args.outdir} (index.html, app.js, data.js, viewer.css, edges_*.csv)")
+        print(f"viewer: {args.outdir} (index.html, app.js, data.js, viewer.css, edges_*.csv)")
+        if args.profile:
+            children = [e for name in ("data", "template")
+                        for e in read_trace_events(tmpdir / f"{name}.json")]
+            prof.write(args.profile, extra_events=children)
+            print(f"profile: {args.profile} (spans={len(prof.spans)} + 子プロセス {len(children)} events)")
+    finally:
+        tmp.cleanup()
 
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ from pathlib import Path
 
 # プロジェクトルートを path に追加して util を import
 sys.path.insert(0, str(Path(__file__).resolve().parent))
+from util.instrument import Profiler, add_profile_args
 from util.viewer_template_builder import ViewerTemplateBuilder
 
 
@@ -13,17 +14,23 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="viewer テンプレート（index.html, viewer.css, app.js）を生成")
     parser.add_argument("--outdir", required=True, help="出力フォルダ")
     parser.add_argument("--debug", action="store_true", help="app.js に plotly_click デバッグログを埋め込む")
+    add_profile_args(parser)
     args = parser.parse_args()
+    prof = Profiler.from_args(args, "build_liaison_template")
 
     outdir = Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
 
-    builder = ViewerTemplateBuilder()
-    (outdir / "index.html").write_text(builder.render_index_html(), encoding="utf-8")
-    (outdir / "viewer.css").write_text(builder.render_viewer_css(), encoding="utf-8")
-    (outdir / "app.js").write_text(builder.render_app_js(debug=args.debug), encoding="utf-8")
+    with prof.span("render", cprofile=True) as sp:
+        builder = ViewerTemplateBuilder()
+        (outdir / "index.html").write_text(builder.render_index_html(), encoding="utf-8")
+        (outdir / "viewer.css").write_text(builder.render_viewer_css(), encoding="utf-8")
+        (outdir / "app.js").write_text(builder.render_app_js(debug=args.debug), encoding="utf-8")
+        sp.bytes_written = sum((outdir / n).stat().st_size
+                               for n in ("index.html", "viewer.css", "app.js"))
 
     print(f"index.html, viewer.css, app.js: {outdir}")
+    prof.finish(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,372 @@
+"""
+Liaison Excel（TDoc / Title / Reply to / Original LS / Reply in 付き）
+→ LS の返信チェーンと応答会合数。
+
+- TDoc 番号（RP-xxxxxx と発信元の番号 S2-xxxxxxx 等）とタイトルの議題部分をキーにした
+  ハッシュ索引を 1 回作り、各行の Reply to / Reply in をその索引で引いて
+  親（返信先）を決める。行どうしの総当たりはしないので行数に対して線形。
+- Reply to が無い・引けない返信（タイトルが Reply LS ... on <議題>）は、同じ議題で
+  それ以前の会合にある逆向きの LS を親にする。
+- 出力（--outdir）:
+    reply_links.csv    全 LS 行と親・リンク種別・応答会合数・チェーン ID・深さ
+    reply_chains.csv   2 行以上のチェーンだけを チェーン → 深さ → 会合 の順に並べたもの
+    reply_latency.csv  組織ごとの応答会合数の統計（RAN の応答 / 相手組織の応答）
+
+例:
+  python build_reply_chains.py --input out/liaison_90_110.xlsx --outdir out/chains_90_110
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+from bisect import bisect_right
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from build_liaison_excel import LINK_COLUMNS
+from util.edge_matrix import meeting_sort_key
+from util.instrument import Profiler, add_profile_args
+from util.org_canon import split_top_level
+
+INPUT_COLUMNS = ["RAN", "Source", "Type", "To", *LINK_COLUMNS]
+MIN_TOPIC_LEN = 12
+
+_SPACED_ID_RE = re.compile(r"^([A-Z]{1,3}\d?) (\d{5,})$")  # "RP 231521"
+_ID_SEP_RE = re.compile(r"[\s_/]+")
+_REPLY_RE = re.compile(r"\b(?:reply|rely|response)\b", re.IGNORECASE)
+_TITLE_TAIL_RE = re.compile(r"\s*\([^()]*\b(?:to|cc|contact)\s*:[^()]*\)\s*$", re.IGNORECASE)
+_DRAFT_RE = re.compile(r"^\W*\[?\s*draft\s*\]?\s*", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_tdoc(value: str) -> str:
+    """
+    TDoc 番号の表記ゆれ（大文字小文字・空白・_ と /）を吸収する:
+    'ITU-R WP5D_TEMP_895rev1' → 'ITU-R-WP5D-TEMP-895REV1'
+    """
+    s = " ".join(str(value).upper().split())
+    s = _SPACED_ID_RE.sub(r"\1-\2", s)
+    return _ID_SEP_RE.sub("-", s).strip("-.")
+
+
+def tdoc_refs(value) -> list[list[str]]:
+    """
+    Reply to / Reply in / Original LS の値を参照ごとの別名の組に分ける。
+    'S2-2403859 = RP-240031, S5-245222' → [['S2-2403859', 'RP-240031'], ['S5-245222']]
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    groups = []
+    for part in split_top_level(str(value)):
+        ids = [normalize_tdoc(x) for x in part.split("=")]
+        ids = [i for i in ids if i]
+        if ids:
+            groups.append(ids)
+    return groups
+
+
+def is_reply_title(title) -> bool:
+    return isinstance(title, str) and _REPLY_RE.search(title) is not None
+
+
+def title_topic(title) -> str:
+    """
+    タイトルの議題部分（'... on <議題> (to: ...; contact: ...)' の <議題>）を
+    正規化して返す.
+    """
+    if not isinstance(title, str):
+        return ""
+    t = _DRAFT_RE.sub("", _TITLE_TAIL_RE.sub("", title)).lower()
+    i = t.find(" on ")
+    if i >= 0:
+        t = t[i + 4:]
+    return _NON_WORD_RE.sub(" ", t).strip()
+
+
+def read_liaison_links(path: str | Path) -> pd.DataFrame:
+    """liaison シートの LS 行を返信チェーン用の列つきで読む（会合番号の数値順）."""
+    df = pd.read_excel(path, sheet_name="liaison", engine="openpyxl")
+    missing = [c for c in INPUT_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"必須列 {missing} が見つかりません"
+                         f"（build_liaison_excel.py で再生成してください）: {path}")
+    df = df[INPUT_COLUMNS].astype(object).where(df[INPUT_COLUMNS].notna(), None)
+    order = sorted(range(len(df)), key=lambda i: meeting_sort_key(df["RAN"].iat[i])[0])
+    return df.iloc[order].reset_index(drop=True)
+
+
+class ReplyLinker:
+    """
+    LS 行の返信関係を解決する。
+    索引（TDoc 番号 → 行、議題 → 種別ごとの行リスト）を 1 回作り、
+    各行の参照を索引で引くだけ。議題の行リストは会合順なので、
+    「それ以前の会合の最新」は二分探索で引く（O((行数 + 参照数) log 行数)）。
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self.meeting_no = np.asarray([meeting_sort_key(m)[0] for m in df["RAN"]], dtype=np.int64)
+        self.types = df["Type"].to_numpy(dtype=object)
+        self.by_id: dict[str, int] = {}
+        self.by_topic: dict[str, dict[str, list[int]]] = {}
+        self.topics = [title_topic(t) for t in df["Title"]]
+        self.reply_title = np.asarray([is_reply_title(t) for t in df["Title"]], dtype=bool)
+        for i, (tdoc, orig) in enumerate(zip(df["TDoc"], df["Original LS"])):
+            for ids in tdoc_refs(tdoc) + tdoc_refs(orig):
+                for key in ids:
+                    self.by_id.setdefault(key, i)
+            # 議題索引は返信ではない LS（元 LS）だけ。行は会合順なのでリストも会合順
+            if not self.reply_title[i] and len(self.topics[i]) >= MIN_TOPIC_LEN:
+                per_type = self.by_topic.setdefault(self.topics[i], {})
+                per_type.setdefault(self.types[i], []).append(i)
+        self.unresolved: list[tuple[int, str]] = []
+        self.out_of_order: list[tuple[int, int]] = []
+
+    def _lookup(self, groups: list[list[str]], exclude: int) -> int | None:
+        """参照の組のうち索引にある最初の行（同じ組の別名はどれで引けてもよい）."""
+        for ids in groups:
+            for key in ids:
+                j = self.by_id.get(key)
+                if j is not None and j != exclude:
+                    return j
+        return None
+
+    def _in_order(self, parent: int, child: int) -> bool:
+        """後の会合の親は採らない（TDoc 番号の再利用・誤記で応答会合数が負になる）."""
+        if self.meeting_no[parent] <= self.meeting_no[child]:
+            return True
+        self.out_of_order.append((child, parent))
+        return False
+
+    def _by_title(self, i: int) -> int | None:
+        """同じ議題で、それ以前（同じ会合を含む）にある逆向きの元 LS の最新."""
+        best: int | None = None
+        for t, rows in self.by_topic.get(self.topics[i], {}).items():
+            if t == self.types[i]:
+                continue
+            pos = bisect_right(rows, self.meeting_no[i], key=self.meeting_no.__getitem__)
+            if pos and (best is None or rows[pos - 1] > best):
+                best = rows[pos - 1]
+        return best
+
+    def link(self) -> tuple[np.ndarray, np.ndarray]:
+        """行ごとの親の行番号（無ければ -1）とリンク種別（reply_to / reply_in / title / ""）."""
+        n = len(self.df)
+        parent = np.full(n, -1, dtype=np.int64)
+        method = np.full(n, "", dtype=object)
+        forward: dict[int, int] = {}
+        reply_to = self.df["Reply to"].to_numpy(dtype=object)
+        reply_in = self.df["Reply in"].to_numpy(dtype=object)
+        for i in range(n):
+            refs = tdoc_refs(reply_to[i])
+            j = self._lookup(refs, i)
+            if j is not None and self._in_order(j, i):
+                parent[i], method[i] = j, "reply_to"
+            else:
+                if refs and j is None:
+                    self.unresolved.append((i, str(reply_to[i])))
+                if self.reply_title[i]:
+                    j = self._by_title(i)
+                    if j is not None:
+                        parent[i], method[i] = j, "title"
+            # Reply in: この行への返信。返信側に Reply to が無い場合だけ使う
+            for ids in tdoc_refs(reply_in[i]):
+                k = self._lookup([ids], i)
+                if k is not None and self._in_order(i, k):
+                    forward.setdefault(k, i)
+        for k, i in forward.items():
+            if method[k] in ("", "title"):
+                parent[k], method[k] = i, "reply_in"
+        return parent, method
+
+
+def chain_roots(parent: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """各行のチェーン根と深さ。経路をメモ化するので線形。循環はその行で打ち切る."""
+    n = len(parent)
+    root = np.full(n, -1, dtype=np.int64)
+    depth = np.zeros(n, dtype=np.int64)
+    for i in range(n):
+        path: list[int] = []
+        on_path: set[int] = set()
+        j = i
+        while root[j] < 0 and parent[j] >= 0 and j not in on_path:
+            path.append(j)
+            on_path.add(j)
+            j = parent[j]
+        if root[j] < 0:
+            root[j], depth[j] = j, 0
+        for k in reversed(path):
+            if k == j:
+                continue
+            root[k], depth[k] = root[parent[k]], depth[parent[k]] + 1
+    return root, depth
+
+
+def _chain_ids(tdoc: np.ndarray, root: np.ndarray) -> np.ndarray:
+    """チェーン ID = 根の TDoc 番号。根の TDoc が空なら根の行番号（row-<n>）で代える."""
+    ids = tdoc[root]
+    missing = np.asarray([not isinstance(v, str) or not v.strip() for v in ids], dtype=bool)
+    ids[missing] = [f"row-{r}" for r in root[missing]]
+    return ids
+
+
+def build_links(df: pd.DataFrame) -> tuple[pd.DataFrame, ReplyLinker]:
+    """全 LS 行に親・リンク種別・応答会合数・チェーン ID・深さを付けた表."""
+    linker = ReplyLinker(df)
+    parent, method = linker.link()
+    root, depth = chain_roots(parent)
+    has_parent = parent >= 0
+    p = np.where(has_parent, parent, 0)
+    links = pd.DataFrame({
+        "meeting": df["RAN"], "TDoc": df["TDoc"], "Type": df["Type"], "Source": df["Source"],
+        "To": df["To"], "Title": df["Title"],
+        "parent_row": pd.array(np.where(has_parent, parent, 0), dtype="Int64"),
+        "parent_tdoc": np.where(has_parent, df["TDoc"].to_numpy(dtype=object)[p], None),
+        "parent_meeting": np.where(has_parent, df["RAN"].to_numpy(dtype=object)[p], None),
+        "parent_type": np.where(has_parent, df["Type"].to_numpy(dtype=object)[p], None),
+        "link": method,
+        "latency_meetings": pd.array(
+            np.where(has_parent, linker.meeting_no - linker.meeting_no[p], 0), dtype="Int64"),
+        "chain_id": _chain_ids(df["TDoc"].to_numpy(dtype=object), root),
+        "depth": depth,
+    })
+    links.loc[~has_parent, ["parent_row", "latency_meetings"]] = pd.NA
+    chain_size = links.groupby("chain_id")["TDoc"].transform("size")
+    links["chain_size"] = chain_size.to_numpy()
+    return links, linker
+
+
+def chain_table(links: pd.DataFrame) -> pd.DataFrame:
+    """2 行以上のチェーンを、根の会合 → チェーン → 深さ → 会合の順に並べる."""
+    chains = links[links["chain_size"] >= 2].copy()
+    root_meeting = chains.groupby("chain_id")["meeting"].transform(
+        lambda s: min(meeting_sort_key(m)[0] for m in s))
+    chains["_root"] = root_meeting
+    chains["_m"] = [meeting_sort_key(m)[0] for m in chains["meeting"]]
+    chains = chains.sort_values(["_root", "chain_id", "depth", "_m"], kind="stable")
+    return chains.drop(columns=["_root", "_m"]).reset_index(drop=True)
+
+
+def _latency_stats(first: pd.DataFrame, sent: pd.Series, direction: str) -> pd.DataFrame:
+    """first: org ごとの (元 LS, 最初の応答までの会合数)、sent: org ごとの元 LS 件数."""
+    g = first.groupby("org")["latency"]
+    stats = pd.DataFrame({
+        "n_replied": g.size(),
+        "latency_mean": g.mean().round(2),
+        "latency_median": g.median(),
+        "latency_p90": g.quantile(0.9).round(2),
+        "latency_max": g.max(),
+    })
+    out = pd.DataFrame({"n_ls": sent}).join(stats, how="outer")
+    out["n_ls"] = out["n_ls"].fillna(0).astype(np.int64)
+    out["n_replied"] = out["n_replied"].fillna(0).astype(np.int64)
+    out["reply_rate"] = np.where(out["n_ls"] > 0,
+                                 (out["n_replied"] / out["n_ls"].where(out["n_ls"] > 0, 1)).round(3),
+                                 np.nan)
+    out.insert(0, "direction", direction)
+    return out.rename_axis("org").reset_index()
+
+
+def latency_table(links: pd.DataFrame) -> pd.DataFrame:
+    """
+    組織ごとの応答会合数（最初の逆向きの返信までの会合数）。
+      ran_replies: 組織 → RAN の元 LS（LS in）に RAN が LS out で応答するまで
+      org_replies: RAN → 組織の元 LS（LS out、To に組織を含む）に組織が LS in で応答するまで
+    元 LS = 自身は返信ではない（親の無い）LS。
+    親は build_links が解決した行（parent_row）をそのまま使う
+    （TDoc 番号では引き直さない）。
+    """
+    originals = links["link"] == ""
+    child = links[links["parent_row"].notna() & (links["Type"] != links["parent_type"])]
+    replies = pd.DataFrame({
+        "parent": child["parent_row"].to_numpy(dtype=np.int64),
+        "child_source": child["Source"].to_numpy(),
+        "latency": child["latency_meetings"].to_numpy(dtype=np.int64),
+    })
+    replies = replies[originals.to_numpy()[replies["parent"].to_numpy()]]
+    parent_type = links["Type"].to_numpy()[replies["parent"].to_numpy()]
+
+    # RAN の応答: 元 LS in → 最初の LS out
+    r = replies[parent_type == "LS in"].groupby("parent", as_index=False)["latency"].min()
+    r["org"] = links["Source"].to_numpy()[r["parent"].to_numpy()]
+    sent_in = links[originals & (links["Type"] == "LS in")].groupby("Source").size()
+    ran = _latency_stats(r, sent_in, "ran_replies")
+
+    # 組織の応答: 元 LS out → 組織ごとの最初の LS in
+    o = replies[parent_type == "LS out"].groupby(["parent", "child_source"], as_index=False)[
+        "latency"].min().rename(columns={"child_source": "org"})
+    out_rows = links[originals & (links["Type"] == "LS out")]
+    recipients = pd.Series(
+        [t.strip() for v in out_rows["To"] if isinstance(v, str) for t in split_top_level(v)
+         if t.strip()], dtype=object)
+    sent_out = recipients.value_counts()
+    # 宛先表記（To）と返信元表記（Source）は excel 段の正規化で揃う前提。
+    # ラベルは Source 側に合わせる
+    org = _latency_stats(o, sent_out, "org_replies")
+    return pd.concat([ran, org], ignore_index=True).sort_values(
+        ["direction", "n_replied", "n_ls"], ascending=[True, False, False], kind="stable")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Liaison Excel → LS 返信チェーン・応答会合数")
+    parser.add_argument("--input", required=True,
+                        help="正規化 Liaison Excel（TDoc / Title / Reply to 等を含む）")
+    parser.add_argument("--outdir", required=True, help="出力フォルダ")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    prof = Profiler.from_args(args, "build_reply_chains")
+
+    input_path = Path(args.input)
+    if not input_path.exists():
+        print(f"ERROR: 入力ファイルが見つかりません: {input_path}", file=sys.stderr)
+        sys.exit(1)
+
+    with prof.span("read_excel", cprofile=True) as sp:
+        try:
+            df = read_liaison_links(input_path)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        sp.rows = len(df)
+    print(f"読み込み行数: {len(df)}")
+
+    with prof.span("link", cprofile=True) as sp:
+        links, linker = build_links(df)
+        chains = chain_table(links)
+        latency = latency_table(links)
+        sp.rows = len(links)
+
+    counts = links["link"].value_counts()
+    n_chains = chains["chain_id"].nunique()
+    print(f"返信リンク: {int((links['link'] != '').sum())} 件"
+          f"（reply_to {counts.get('reply_to', 0)} / reply_in {counts.get('reply_in', 0)} / "
+          f"title {counts.get('title', 0)}）, "
+          f"索引: TDoc {len(linker.by_id)} 件・議題 {len(linker.by_topic)} 件")
+    print(f"チェーン: {n_chains} 本（最大 {int(links['chain_size'].max()) if len(links) else 0} 行）, "
+          f"未解決の Reply to: {len(linker.unresolved)} 件（対象 LS がこのコーパスに無い）")
+    if linker.out_of_order:
+        print(f"WARN: 親が後の会合になる参照 {len(linker.out_of_order)} 件はリンクしません",
+              file=sys.stderr)
+    for direction, label in (("ran_replies", "RAN の応答"), ("org_replies", "相手組織の応答")):
+        top = latency[(latency["direction"] == direction) & (latency["n_replied"] > 0)].head(5)
+        for _, r in top.iterrows():
+            print(f"  {label}: {r['org']}: {r['n_replied']}/{r['n_ls']} 件, "
+                  f"中央値 {r['latency_median']:g} 会合, 最大 {r['latency_max']:g}")
+
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    with prof.span("write_csv") as sp:
+        links.to_csv(outdir / "reply_links.csv", index=False, encoding="utf-8-sig")
+        chains.to_csv(outdir / "reply_chains.csv", index=False, encoding="utf-8-sig")
+        latency.to_csv(outdir / "reply_latency.csv", index=False, encoding="utf-8-sig")
+        sp.rows = len(links) + len(chains) + len(latency)
+    print(f"reply_links.csv, reply_chains.csv, reply_latency.csv: {outdir}")
+    prof.finish(args)
+
+
+if __name__ == "__main__":
+    main()
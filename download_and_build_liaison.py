@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+download_and_build_liaison.py
+- ダウンロード（download_ran_tdoc_lists）と正規化（build_liaison_excel）を重ねて実行する。
+  1 会合の xlsx が保存され次第、有界キュー経由でパースワーカーに渡すので、
+  ネットワーク待ちと openpyxl のパースが並行する（合計時間 ≒ max(DL, パース)）。
+- パースが追いつかない場合はキューが埋まり、ダウンロード側が待つ
+  （バックプレッシャ）。
+- パース結果は届いた順に LiaisonConcat へ渡してフレームを手放し、
+  最後に files.txt の順で連結する。
+- 出力（manifest.csv / files.txt / liaison.xlsx）は 3 スクリプトを順に実行した場合と同じ。
+
+例:
+  python download_and_build_liaison.py --range 90-110 --outdir out/raw_90_110 \\
+      --out out/liaison_90_110.xlsx --overwrite
+"""
+
+from __future__ import annotations
+
+import argparse
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from build_liaison_excel import (
+    LiaisonConcat,
+    apply_canon,
+    extract_meeting_id,
+    load_liaison_rows,
+    write_liaison_excel,
+)
+from download_ran_tdoc_lists import (
+    BASE,
+    ManifestRow,
+    fetch_meeting,
+    parse_range,
+    write_manifest,
+)
+from manifest_to_files_txt import files_from_manifest
+from util.instrument import Profiler, add_profile_args
+from util.org_canon import OrgCanonicalizer, add_canon_args
+
+_DONE = object()
+
+
+class ParseFailed(Exception):
+    """TDoc List をパースできなかった（列不足・会合番号なし）。path は対象の xlsx."""
+
+    def __init__(self, path: Path, error: ValueError) -> None:
+        super().__init__(str(error))
+        self.path = path
+
+
+def parse_workbook(path: str) -> pd.DataFrame:
+    """1 ファイル分の LS 行を返す（ProcessPoolExecutor から呼べるようトップレベル）。"""
+    return load_liaison_rows(path, extract_meeting_id(path))
+
+
+def _timed_parse(path: str) -> tuple[pd.DataFrame, float]:
+    t0 = time.perf_counter()
+    frame = parse_workbook(path)
+    return frame, time.perf_counter() - t0
+
+
+class DownloadProducer(threading.Thread):
+    """会合を順にダウンロードし、保存した xlsx のパスを有界キューに積むスレッド。"""
+
+    def __init__(self, meetings: list[int], outdir: Path, q: queue.Queue, args,
+                 prof: Profiler, stop: threading.Event) -> None:
+        super().__init__(name="download", daemon=True)
+        self.meetings = meetings
+        self.outdir = outdir
+        self.q = q
+        self.args = args
+        self.prof = prof
+        self.stop = stop
+        self.rows: list[ManifestRow] = []
+        self.blocked_s = 0.0
+        self.error: Optional[BaseException] = None
+
+    def _put(self, item) -> bool:
+        """キューが空くまで待って積む。中断要求があれば False."""
+        t0 = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                self.q.put(item, timeout=0.1)
+                self.blocked_s += time.perf_counter() - t0
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self) -> None:
+        try:
+            for n in self.meetings:
+                if self.stop.is_set():
+                    return
+                with self.prof.span(f"meeting {n}", "meeting", meeting=n) as sp:
+                    row = fetch_meeting(
+                        n, self.outdir, timeout=self.args.timeout, sleep=self.args.sleep,
+                        overwrite=self.args.overwrite, base_url=self.args.base_url,
+                        prof=self.prof,
+                    )
+                    sp.args["status"] = row.status
+                self.rows.append(row)
+                print(f"[{n}] {row.status} {row.http_status} -> {row.saved_path or '-'}")
+                if row.status in ("OK", "SKIPPED_EXISTS") and row.saved_path:
+                    if not self._put(Path(row.saved_path)):
+                        return
+        except BaseException as e:  # パース側に伝えて main で再送出する
+            self.error = e
+        finally:
+            self._put(_DONE)
+
+
+def consume(q: queue.Queue, workers: int, prof: Profiler, stop: threading.Event,
+            sink: LiaisonConcat) -> float:
+    """
+    キューから xlsx を受け取りパースし、結果をパースし終えた順に sink へ渡す。
+    パースできないファイルがあれば stop を立てて ParseFailed を送出する。
+    戻り値: パース時間合計.
+    """
+    parse_s = 0.0
+
+    if workers <= 1:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return parse_s
+            with prof.span(item.name, "file") as sp:
+                t0 = time.perf_counter()
+                print(f"処理中: {item.name}")
+                try:
+                    frame = parse_workbook(str(item))
+                except ValueError as e:
+                    stop.set()
+                    raise ParseFailed(item, e) from e
+                parse_s += time.perf_counter() - t0
+                sp.rows = len(frame)
+                sp.bytes_read = item.stat().st_size
+            sink.add(item.name, frame)
+
+    # 複数ワーカー: 実行中は workers 件まで。空きが出るまでキューから取らない
+    pending: dict[Future, Path] = {}
+    done_reading = False
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or not done_reading:
+            while not done_reading and len(pending) < workers:
+                item = q.get()
+                if item is _DONE:
+                    done_reading = True
+                    break
+                print(f"処理中: {item.name}")
+                pending[pool.submit(_timed_parse, str(item))] = item
+            if not pending:
+                continue
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                path = pending.pop(fut)
+                try:
+                    frame, seconds = fut.result()
+                except ValueError as e:
+                    stop.set()
+                    raise ParseFailed(path, e) from e
+                except BaseException:
+                    stop.set()
+                    raise
+                sink.add(path.name, frame)
+                parse_s += seconds
+    return parse_s
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="TDoc List のダウンロードと Liaison 正規化を重ねて実行"
+    )
+    ap.add_argument("--range", required=True, help="例: 90-110")
+    ap.add_argument("--outdir", required=True, help="xlsx・manifest.csv・files.txt の出力フォルダ")
+    ap.add_argument("--out", required=True, help="出力 Liaison Excel パス")
+    ap.add_argument("--sleep", type=float, default=0.2,
+                    help="リクエスト間スリープ秒（デフォルト 0.2）")
+    ap.add_argument("--timeout", type=int, default=30, help="HTTPタイムアウト秒（デフォルト 30）")
+    ap.add_argument("--overwrite", action="store_true", help="既存ファイルを上書きする")
+    ap.add_argument("--base-url", default=BASE, help=f"TSGR_xxx フォルダの親 URL（デフォルト {BASE}）")
+    ap.add_argument("--manifest", default="",
+                    help="取得結果CSVのパス（デフォルト: <outdir>/manifest.csv）")
+    ap.add_argument("--queue-size", type=int, default=4,
+                    help="DL 済み・未パースの xlsx を溜める上限（デフォルト 4）")
+    ap.add_argument("--parse-workers", type=int, default=1,
+                    help="パースワーカー数（2 以上でプロセス並列、デフォルト 1）")
+    ap.add_argument("--unmapped-report", default="",
+                    help="別名表に無かった組織名と出現回数の CSV 出力先")
+    add_canon_args(ap)
+    add_profile_args(ap)
+    args = ap.parse_args()
+    prof = Profiler.from_args(args, "download_and_build_liaison")
+    canon = OrgCanonicalizer.from_args(args)
+
+    meetings = parse_range(args.range)
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    manifest_path = Path(args.manifest) if args.manifest else (outdir / "manifest.csv")
+
+    q: queue.Queue = queue.Queue(maxsize=max(1, args.queue_size))
+    stop = threading.Event()
+    producer = DownloadProducer(meetings, outdir, q, args, prof, stop)
+    sink = LiaisonConcat()
+    t0 = time.perf_counter()
+    with prof.span("pipeline", cprofile=True) as stage:
+        producer.start()
+        try:
+            parse_s = consume(q, args.parse_workers, prof, stop, sink)
+        except ParseFailed as e:
+            stop.set()
+            producer.join()
+            write_manifest(producer.rows, manifest_path)
+            print(f"manifest（途中まで）: {manifest_path}")
+            print(f"ERROR: {e.path}: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            stop.set()
+            producer.join()
+        stage.rows = sink.rows
+    elapsed = time.perf_counter() - t0
+    if producer.error is not None:
+        raise producer.error
+
+    write_manifest(producer.rows, manifest_path)
+    print(f"manifest: {manifest_path}")
+    files_txt = outdir / "files.txt"
+    names = files_from_manifest(manifest_path)
+    files_txt.write_text("\n".join(names) + "\n", encoding="utf-8")
+    print(f"wrote {files_txt}  n={len(names)}")
+
+    # 3 スクリプトを順に実行した場合と同じく files.txt の順で連結する
+    result = sink.result([Path(name).name for name in names])
+    if result is None:
+        print("ERROR: パースできた TDoc List がありません", file=sys.stderr)
+        sys.exit(1)
+    print(f"\n出力行数(ヘッダ除く): {len(result)}")
+    if canon is not None:
+        result = apply_canon(result, canon, args.unmapped_report, prof)
+
+    out_path = Path(args.out)
+    with prof.span("write_xlsx", cprofile=True) as sp:
+        write_liaison_excel(result, out_path)
+        sp.rows = len(result)
+        sp.bytes_written = out_path.stat().st_size
+    print(f"出力完了: {out_path}")
+    print(f"所要: 全体 {elapsed:.2f}s / パース合計 {parse_s:.2f}s / "
+          f"DL 待ち(キュー満杯) {producer.blocked_s:.2f}s")
+    prof.finish(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,8 @@ from urllib.parse import unquote, urljoin
 
 import requests
 
+from util.instrument import Profiler, add_profile_args
+
 # optional: BeautifulSoup (recommended)
 try:
     from bs4 import BeautifulSoup  # type: ignore
@@ -48,10 +50,16 @@ def parse_range(expr: str) -> list[int]:
     return list(range(a, b + 1))
 
 
-def iter_candidate_docs_urls(n: int) -> Iterable[str]:
+def normalize_base_url(base: str) -> str:
+    """urljoin で TSGR_xxx を連結できるよう、末尾を / に揃える。"""
+    return base if base.endswith("/") else base + "/"
+
+
+def iter_candidate_docs_urls(n: int, base: str = BASE) -> Iterable[str]:
     """通常フォルダ → e会合フォルダの順で候補URLを返す。"""
-    yield urljoin(BASE, f"TSGR_{n}/Docs/")
-    yield urljoin(BASE, f"TSGR_{n}e/Docs/")
+    base = normalize_base_url(base)
+    yield urljoin(base, f"TSGR_{n}/Docs/")
+    yield urljoin(base, f"TSGR_{n}e/Docs/")
 
 
 def fetch_text(
@@ -89,9 +97,10 @@ def find_tdoc_href_from_listing(html: str, n: int) -> Optional[str]:
         return None
 
     for m in re.finditer(
-        r'href="([^"]+)".*?>\s*(TDoc_List_Meeting_RAN#[^<]+\.xlsx)\s*<',
+        # [^>]* で同じ <a> タグ内に限定（.*? だと先頭の別リンクの href を拾う）
+        r'href="([^"]+)"[^>]*>\s*(TDoc_List_Meeting_RAN#[^<]+\.xlsx)\s*<',
         html,
-        re.IGNORECASE | re.DOTALL,
+        re.IGNORECASE,
     ):
         fname = m.group(2).strip()
         mm = TDOC_RE.match(fname)
@@ -147,6 +156,104 @@ class ManifestRow:
     bytes: int
 
 
+def fetch_meeting(
+    n: int, outdir: Path, *, timeout: int, sleep: float, overwrite: bool,
+    base_url: str = BASE, prof: Optional[Profiler] = None,
+) -> ManifestRow:
+    """会合 n の Docs フォルダを探索して TDoc List を保存し、manifest 1 行分を返す。"""
+    prof = prof or Profiler("download_ran_tdoc_lists", enabled=False)
+    chosen_folder = ""
+    file_url = ""
+    status = ""
+    http_status = ""
+    saved_path = ""
+    size = 0
+
+    # 1) どの Docs フォルダに TDoc List があるか探す
+    found = False
+    for docs_url in iter_candidate_docs_urls(n, base_url):
+        with prof.span("listing", "http", url=docs_url) as sp:
+            html, code, err = fetch_text(docs_url, timeout=timeout)
+            sp.bytes_read = len(html) if html is not None else 0
+        time.sleep(sleep)
+
+        if html is None:
+            # フォルダなし or 取得失敗
+            if not chosen_folder:
+                chosen_folder = docs_url
+                status = "NOT_FOUND"
+                http_status = str(code) if code is not None else ""
+            continue
+
+        href = find_tdoc_href_from_listing(html, n)
+        if not href:
+            # Docs は取れたが TDoc List が見つからない
+            if not found:
+                chosen_folder = docs_url
+                status = "NO_TDOC_LIST"
+                http_status = str(code) if code is not None else ""
+            continue
+
+        chosen_folder = docs_url
+        file_url = urljoin(docs_url, href)
+        found = True
+        break
+
+    if not found:
+        if status == "":
+            status = "NOT_FOUND"
+        return ManifestRow(
+            n, chosen_folder, file_url, status, http_status, saved_path, size
+        )
+
+    # 2) ダウンロード（ファイル名の %23 等をデコード）
+    filename = unquote(file_url.split("/")[-1])
+    out_path = outdir / filename
+    with prof.span("fetch_xlsx", "http", url=file_url) as sp:
+        ok, code, dstatus, size = download_file(
+            file_url, out_path, timeout=timeout, overwrite=overwrite
+        )
+        sp.bytes_written = size if ok else 0
+    time.sleep(sleep)
+
+    status = dstatus
+    http_status = str(code) if code is not None else ""
+    saved_path = str(out_path) if (ok or out_path.exists()) else ""
+
+    return ManifestRow(
+        n, chosen_folder, file_url, status, http_status, saved_path, size
+    )
+
+
+def write_manifest(rows: list[ManifestRow], path: Path) -> None:
+    """取得結果を manifest.csv（utf-8-sig）に書き出す。"""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f)
+        w.writerow(
+            [
+                "meeting",
+                "chosen_folder",
+                "url",
+                "status",
+                "http_status",
+                "saved_path",
+                "bytes",
+            ]
+        )
+        for r in rows:
+            w.writerow(
+                [
+                    r.meeting,
+                    r.chosen_folder,
+                    r.url,
+                    r.status,
+                    r.http_status,
+                    r.saved_path,
+                    r.bytes,
+                ]
+            )
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(
         description="3GPP RAN Plenary の TDoc List xlsx を範囲指定で一括ダウンロード"
@@ -170,12 +277,20 @@ def main() -> None:
         default=30,
         help="HTTPタイムアウト秒（デフォルト 30）",
     )
+    ap.add_argument(
+        "--base-url",
+        default=BASE,
+        help=f"TSGR_xxx フォルダの親 URL（デフォルト {BASE}）。"
+        "ローカルのスタンドイン（bench/fake_3gpp_server.py）を指す場合に使う",
+    )
     ap.add_argument(
         "--manifest",
         default="",
         help="取得結果CSVのパス（デフォルト: <outdir>/manifest.csv）",
     )
+    add_profile_args(ap)
     args = ap.parse_args()
+    prof = Profiler.from_args(args, "download_ran_tdoc_lists")
 
     meetings = parse_range(args.range)
     outdir = Path(args.outdir)
@@ -187,99 +302,24 @@ def main() -> None:
     rows: list[ManifestRow] = []
 
     for n in meetings:
-        chosen_folder = ""
-        file_url = ""
-        status = ""
-        http_status = ""
-        saved_path = ""
-        size = 0
-
-        # 1) どの Docs フォルダに TDoc List があるか探す
-        found = False
-        for docs_url in iter_candidate_docs_urls(n):
-            html, code, err = fetch_text(docs_url, timeout=args.timeout)
-            time.sleep(args.sleep)
-
-            if html is None:
-                # フォルダなし or 取得失敗
-                if not chosen_folder:
-                    chosen_folder = docs_url
-                    status = "NOT_FOUND"
-                    http_status = str(code) if code is not None else ""
-                continue
-
-            href = find_tdoc_href_from_listing(html, n)
-            if not href:
-                # Docs は取れたが TDoc List が見つからない
-                if not found:
-                    chosen_folder = docs_url
-                    status = "NO_TDOC_LIST"
-                    http_status = str(code) if code is not None else ""
-                continue
-
-            chosen_folder = docs_url
-            file_url = urljoin(docs_url, href)
-            found = True
-            break
-
-        if not found:
-            if status == "":
-                status = "NOT_FOUND"
-            rows.append(
-                ManifestRow(
-                    n, chosen_folder, file_url, status, http_status, saved_path, size
-                )
+        with prof.span(f"meeting {n}", "meeting", meeting=n) as sp:
+            row = fetch_meeting(
+                n, outdir, timeout=args.timeout, sleep=args.sleep,
+                overwrite=args.overwrite, base_url=args.base_url, prof=prof,
             )
-            print(f"[{n}] {status}")
-            continue
-
-        # 2) ダウンロード（ファイル名の %23 等をデコード）
-        filename = unquote(file_url.split("/")[-1])
-        out_path = outdir / filename
-        ok, code, dstatus, size = download_file(
-            file_url, out_path, timeout=args.timeout, overwrite=args.overwrite
-        )
-        time.sleep(args.sleep)
-
-        status = dstatus
-        http_status = str(code) if code is not None else ""
-        saved_path = str(out_path) if (ok or out_path.exists()) else ""
-
-        rows.append(
-            ManifestRow(
-                n, chosen_folder, file_url, status, http_status, saved_path, size
-            )
-        )
-        print(f"[{n}] {status} {http_status} -> {saved_path or '-'}")
+            sp.bytes_written = row.bytes if row.status == "OK" else 0
+            sp.args["status"] = row.status
+        rows.append(row)
+        if row.status in ("NOT_FOUND", "NO_TDOC_LIST"):
+            print(f"[{n}] {row.status}")
+        else:
+            print(f"[{n}] {row.status} {row.http_status} -> {row.saved_path or '-'}")
 
     # manifest 書き出し
-    with open(manifest_path, "w", newline="", encoding="utf-8-sig") as f:
-        w = csv.writer(f)
-        w.writerow(
-            [
-                "meeting",
-                "chosen_folder",
-                "url",
-                "status",
-                "http_status",
-                "saved_path",
-                "bytes",
-            ]
-        )
-        for r in rows:
-            w.writerow(
-                [
-                    r.meeting,
-                    r.chosen_folder,
-                    r.url,
-                    r.status,
-                    r.http_status,
-                    r.saved_path,
-                    r.bytes,
-                ]
-            )
+    write_manifest(rows, manifest_path)
 
     print(f"manifest: {manifest_path}")
+    prof.finish(args)
 
 
 if __name__ == "__main__":
@@ -13,6 +13,23 @@ import argparse
 import csv
 from pathlib import Path
 
+from util.instrument import Profiler, add_profile_args
+
+
+def files_from_manifest(m: Path) -> list[str]:
+    """manifest の取得済み行（OK / SKIPPED_EXISTS）から files.txt の行（ソート済み）を返す。"""
+    rows: list[str] = []
+    with m.open("r", encoding="utf-8-sig", newline="") as f:
+        for r in csv.DictReader(f):
+            if r.get("status") in ("OK", "SKIPPED_EXISTS") and r.get("saved_path"):
+                path = Path(r["saved_path"])
+                # manifest と同じディレクトリに xlsx がある想定ならファイル名のみでよい
+                if path.parent == m.parent:
+                    rows.append(path.name)
+                else:
+                    rows.append(r["saved_path"])
+    return sorted(set(rows))
+
 
 def main() -> None:
     ap = argparse.ArgumentParser(description="manifest.csv から files.txt を生成")
@@ -22,7 +39,9 @@ def main() -> None:
         default=None,
         help="出力 files.txt のパス（省略時は manifest と同じディレクトリの files.txt）",
     )
+    add_profile_args(ap)
     args = ap.parse_args()
+    prof = Profiler.from_args(args, "manifest_to_files_txt")
 
     m = Path(args.manifest)
     if not m.exists():
@@ -30,20 +49,14 @@ def main() -> None:
 
     out = Path(args.output) if args.output else (m.parent / "files.txt")
 
-    rows: list[str] = []
-    with m.open("r", encoding="utf-8-sig", newline="") as f:
-        for r in csv.DictReader(f):
-            if r.get("status") in ("OK", "SKIPPED_EXISTS") and r.get("saved_path"):
-                path = Path(r["saved_path"])
-                # manifest と同じディレクトリに xlsx がある想定ならファイル名のみでよい
-                if path.parent == m.parent:
-                    rows.append(path.name)
-                else:
-                    rows.append(r["saved_path"])
-
-    rows = sorted(set(rows))
-    out.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    with prof.span("manifest_to_files_txt") as sp:
+        rows = files_from_manifest(m)
+        out.write_text("\n".join(rows) + "\n", encoding="utf-8")
+        sp.rows = len(rows)
+        sp.bytes_read = m.stat().st_size
+        sp.bytes_written = out.stat().st_size
     print(f"wrote {out}  n={len(rows)}")
+    prof.finish(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,44 @@
+"""pytest 共通: ルートを path に追加し、合成コーパスのヘルパと fixture を置く."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench.gen_synthetic_tdoc_lists import SyntheticSpec, generate_corpus  # noqa: E402
+
+# viewer フォルダのデータファイル（index.html と静的ファイルを除く）
+DATA_FILES = ["edges_by_meeting.csv", "edges_total.csv", "data.js", "edge_matrix.npz",
+              "edge_matrix_rows.csv", "edge_matrix_cols.csv", "trends.js", "frames.js"]
+
+
+def make_corpus(outdir: Path, **kw) -> list[Path]:
+    """小さな合成 TDoc_List 群を作る（既定は 4 会合 × 60 行、LS 多め）."""
+    spec = SyntheticSpec(**{"meetings": 4, "rows_per_meeting": 60, "ls_fraction": 0.5,
+                            "nodes": 20, "seed": 1, **kw})
+    return generate_corpus(spec, outdir)
+
+
+def run_script(script: str, *args) -> subprocess.CompletedProcess:
+    """ルートのスクリプトを別プロセスで実行し、終了コード 0 を確かめて結果を返す."""
+    r = subprocess.run([sys.executable, str(ROOT / script), *map(str, args)], cwd=ROOT,
+                       capture_output=True, text=True, encoding="utf-8")
+    assert r.returncode == 0, r.stderr
+    return r
+
+
+@pytest.fixture(scope="session")
+def liaison_xlsx(tmp_path_factory) -> Path:
+    """合成コーパスから build_liaison_excel の手順で作った liaison.xlsx（組織名は未正規化）."""
+    import build_liaison_excel as bx
+
+    d = tmp_path_factory.mktemp("corpus")
+    paths = make_corpus(d / "raw", meetings=6)
+    frames = [bx.load_liaison_rows(str(p), bx.extract_meeting_id(str(p))) for p in paths]
+    out = d / "liaison.xlsx"
+    bx.write_liaison_excel(bx.concat_liaison_frames(frames), out)
+    return out
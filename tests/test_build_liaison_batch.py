@@ -0,0 +1,57 @@
+import json
+
+import pandas as pd
+
+import build_liaison_excel as bx
+from build_liaison_data import read_data_js
+from conftest import DATA_FILES, run_script
+
+
+def _batch(tmp_path, liaison_xlsx, viewers):
+    spec = tmp_path / "spec.json"
+    spec.write_text(json.dumps({"viewers": viewers}), encoding="utf-8")
+    out = tmp_path / "viewers"
+    r = run_script("build_liaison_batch.py", "--input", liaison_xlsx, "--spec", spec,
+                   "--outdir", out, "--precision", 6, "--workers", 2)
+    return out, r
+
+
+def _same(a, b):
+    for name in DATA_FILES:
+        assert (a / name).read_bytes() == (b / name).read_bytes(), name
+
+
+def test_batch_matches_standalone(tmp_path, liaison_xlsx):
+    out, _ = _batch(tmp_path, liaison_xlsx, [{"name": "full"}, {"name": "r92_93", "range": "92-93"}])
+
+    full = tmp_path / "full"
+    run_script("build_liaison_data.py", "--input", liaison_xlsx, "--outdir", full,
+               "--precision", 6)
+    _same(out / "full", full)
+
+    df = pd.read_excel(liaison_xlsx, sheet_name=bx.SHEET_NAME)
+    sub_xlsx = tmp_path / "sub.xlsx"
+    bx.write_liaison_excel(df[df["RAN"].isin(["#92", "#93"])].reset_index(drop=True), sub_xlsx)
+    sub = tmp_path / "sub"
+    run_script("build_liaison_data.py", "--input", sub_xlsx, "--outdir", sub, "--precision", 6)
+    _same(out / "r92_93", sub)
+
+    html = (out / "full" / "index.html").read_text(encoding="utf-8")
+    assets = sorted(p.name for p in (out / "assets").iterdir())
+    assert len(assets) == 2
+    assert all(f"../assets/{a}" in html for a in assets)
+
+
+def test_batch_empty_selection_does_not_abort(tmp_path, liaison_xlsx):
+    out, r = _batch(tmp_path, liaison_xlsx, [
+        {"name": "empty", "range": "300-301"},
+        {"name": "noorg", "orgs": ["NO-SUCH-ORG"]},
+        {"name": "full"},
+    ])
+    assert "WARN: empty" in r.stderr and "WARN: noorg" in r.stderr
+    for name in ("empty", "noorg"):
+        data = read_data_js(out / name / "data.js")
+        assert data["edgesByMeeting"] == [] and data["nodeTable"] == {}
+        assert (out / name / "frames.js").exists()
+    assert read_data_js(out / "empty" / "data.js")["meetings"] == []
+    assert (out / "full" / "edges_total.csv").stat().st_size > 100
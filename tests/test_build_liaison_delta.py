@@ -0,0 +1,65 @@
+import json
+import shutil
+import subprocess
+
+import pandas as pd
+
+import build_liaison_excel as bx
+from build_liaison_data import PATCH_FILE, read_data_js
+from build_liaison_delta import PATCH_JS_PREFIX
+from conftest import run_script
+from util.viewer_template_builder import PATCH_SCRIPT, ViewerTemplateBuilder
+
+NODE = shutil.which("node")
+
+
+def _node_apply_patch(tmp_path, base: dict, patch: dict) -> dict | None:
+    """出荷する app.js の applyPatch（と byKeys）を切り出して node で実行する."""
+    app = ViewerTemplateBuilder().render_app_js()
+    body = app[app.index("  function byKeys(keys) {"):app.index("  function loadFull() {")]
+    script = tmp_path / "apply_patch.js"
+    script.write_text(body + (
+        "const fs = require(\"fs\");\n"
+        "const [base, patch] = process.argv.slice(2).map(p => JSON.parse(fs.readFileSync(p, \"utf8\")));\n"
+        "process.stdout.write(JSON.stringify(applyPatch(base, patch)));\n"), encoding="utf-8")
+    args = []
+    for name, obj in (("base.json", base), ("patch.json", patch)):
+        (tmp_path / name).write_text(json.dumps(obj), encoding="utf-8")
+        args.append(str(tmp_path / name))
+    r = subprocess.run([NODE, str(script), *args], capture_output=True, text=True, encoding="utf-8")
+    assert r.returncode == 0, r.stderr
+    return json.loads(r.stdout)
+
+
+def test_patch_round_trip(tmp_path, liaison_xlsx):
+    # 更新前は最後の会合が無く #92 の LS が一部欠け、更新後は最初の会合が無い
+    # （追加・削除・重み変化が全部出る）
+    df = pd.read_excel(liaison_xlsx, sheet_name=bx.SHEET_NAME)
+    ordered = sorted(df["RAN"].unique(), key=lambda m: int(m[1:]))
+    drop = df.index[df["RAN"] == "#92"][::3]
+    old_xlsx, new_xlsx = tmp_path / "old.xlsx", tmp_path / "new.xlsx"
+    bx.write_liaison_excel(df[df["RAN"] != ordered[-1]].drop(drop).reset_index(drop=True), old_xlsx)
+    bx.write_liaison_excel(df[df["RAN"] != ordered[0]].reset_index(drop=True), new_xlsx)
+
+    old, new = tmp_path / "old", tmp_path / "new"
+    run_script("build_liaison_data.py", "--input", old_xlsx, "--outdir", old, "--precision", 6)
+    run_script("build_liaison_data.py", "--input", new_xlsx, "--outdir", new, "--precision", 6)
+    (new / "index.html").write_text(ViewerTemplateBuilder().render_index_html(), encoding="utf-8")
+    assert PATCH_SCRIPT not in (new / "index.html").read_text(encoding="utf-8")
+
+    run_script("build_liaison_delta.py", "--old", old, "--new", new)
+    text = (new / PATCH_FILE).read_text(encoding="utf-8")
+    patch = json.loads(text[len(PATCH_JS_PREFIX):].rstrip().rstrip(";"))
+    base, target = read_data_js(old / "data.js"), read_data_js(new / "data.js")
+    assert patch["base"] == base["version"] and patch["version"] == target["version"]
+    assert patch["edgesByMeeting"]["remove"] and patch["edgesByMeeting"]["upsert"]
+    if NODE:
+        assert _node_apply_patch(tmp_path, base, patch) == target
+        broken = {**patch, "counts": {**patch["counts"], "edgesTotal": -1}}
+        assert _node_apply_patch(tmp_path, base, broken) is None  # 件数が合わなければ全量読み込み
+    assert PATCH_SCRIPT in (new / "index.html").read_text(encoding="utf-8")
+
+    # data.js を作り直すとパッチも読み込みの行も消える（404 を出さない）
+    run_script("build_liaison_data.py", "--input", new_xlsx, "--outdir", new, "--precision", 6)
+    assert not (new / PATCH_FILE).exists()
+    assert PATCH_SCRIPT not in (new / "index.html").read_text(encoding="utf-8")
@@ -0,0 +1,51 @@
+import pandas as pd
+
+import build_liaison_excel as bx
+from conftest import make_corpus
+
+
+def _load(paths):
+    return [bx.load_liaison_rows(str(p), bx.extract_meeting_id(str(p))) for p in paths]
+
+
+def test_concat_skips_meeting_without_ls_rows(tmp_path):
+    # LS 行 0 件の会合が混ざっても連結できる（空の category は辞書の型が違う）
+    frames = _load(make_corpus(tmp_path / "a", meetings=2)
+                   + make_corpus(tmp_path / "b", meetings=1, start=95, ls_fraction=0.0))
+    assert len(frames[-1]) == 0
+    result = bx.concat_liaison_frames(frames)
+    assert len(result) == sum(len(f) for f in frames)
+    assert list(result.columns) == bx.OUTPUT_COLUMNS
+    assert set(result["RAN"].cat.categories) == {"#90", "#91"}
+
+    out = tmp_path / "liaison.xlsx"
+    bx.write_liaison_excel(result, out)
+    back = pd.read_excel(out, sheet_name=bx.SHEET_NAME)
+    assert len(back) == len(result)
+
+
+def test_concat_all_empty(tmp_path):
+    frames = _load(make_corpus(tmp_path, meetings=2, ls_fraction=0.0))
+    result = bx.concat_liaison_frames(frames)
+    assert len(result) == 0
+    assert list(result.columns) == bx.OUTPUT_COLUMNS
+
+
+def test_liaison_concat_matches_concat_in_any_arrival_order(tmp_path):
+    paths = (make_corpus(tmp_path / "a", meetings=5, start=97)
+             + make_corpus(tmp_path / "b", meetings=1, start=102, ls_fraction=0.0))
+    frames = dict(zip((p.name for p in paths), _load(paths)))
+    order = sorted(frames)  # files.txt の順（#100 < #90 の文字列順）
+    want = bx.concat_liaison_frames([frames[k] for k in order])
+
+    sink = bx.LiaisonConcat()
+    for k in reversed(list(frames)):  # 会合の新しい順に届く
+        sink.add(k, frames[k])
+    got = sink.result(order)
+    assert sink.rows == len(want)
+    pd.testing.assert_frame_equal(got.astype(object), want.astype(object))
+
+    empty = bx.LiaisonConcat()
+    assert empty.result(order) is None
+    empty.add(order[0], frames[paths[-1].name])
+    assert len(empty.result(order)) == 0
@@ -0,0 +1,69 @@
+import pandas as pd
+
+from build_reply_chains import INPUT_COLUMNS, build_links, chain_table, latency_table
+
+
+def _frame(rows):
+    df = pd.DataFrame(rows, columns=INPUT_COLUMNS)
+    return df.astype(object).where(df.notna(), None)
+
+
+def test_parent_from_later_meeting_is_rejected():
+    df = _frame([
+        # (RAN, Source, Type, To, TDoc, Title, Reply to, Original LS, Reply in)
+        ("#100", "SA2", "LS in", "RAN", "RP-1001", "LS on positioning", None, "S2-1", None),
+        ("#100", "RAN", "LS out", "SA2", "RP-1002", "Reply LS on positioning", "S2-1", None, None),
+        # RP-1103 を指す Reply to だが、RP-1103 は後の会合 → リンクしない
+        ("#100", "RAN", "LS out", "SA5", "RP-1003", "Reply LS on charging", "RP-1103", None, None),
+        ("#101", "SA5", "LS in", "RAN", "RP-1103", "LS on charging", None, None, None),
+    ])
+    links, linker = build_links(df)
+    assert links["parent_tdoc"].notna().tolist() == [False, True, False, False]
+    assert linker.out_of_order == [(2, 3)]
+    assert links["latency_meetings"].dropna().min() >= 0
+    latency = latency_table(links)
+    assert (latency["latency_max"].dropna() >= 0).all()
+
+
+def test_chain_id_falls_back_to_row_when_root_tdoc_missing():
+    df = _frame([
+        ("#100", "SA2", "LS in", "RAN", None, "LS on positioning accuracy", None, "S2-1", None),
+        ("#101", "RAN", "LS out", "SA2", "RP-2002", "Reply LS on positioning accuracy", "S2-1", None, None),
+    ])
+    links, _ = build_links(df)
+    assert links["chain_id"].tolist() == ["row-0", "row-0"]
+    assert chain_table(links)["chain_id"].tolist() == ["row-0", "row-0"]
+
+
+def test_latency_uses_resolved_parent_row():
+    df = _frame([
+        # RP-3001 が 2 回出る（#100 の SA2 と、#102 で再掲された SA3 の LS）
+        ("#100", "SA2", "LS in", "RAN", "RP-3001", "LS on beam management", None, "S2-7", None),
+        # 親の TDoc が空でも、議題で引いた親の行で応答会合数を出す
+        ("#100", "CT1", "LS in", "RAN", None, "LS on registration timers", None, None, None),
+        ("#101", "RAN", "LS out", "CT1", "RP-3006", "Reply LS on registration timers", None, None, None),
+        ("#102", "SA3", "LS in", "RAN", "RP-3001", "LS on security keys", None, "S3-9", None),
+        ("#103", "RAN", "LS out", "SA3", "RP-3004", "Reply LS on security keys", "S3-9", None, None),
+    ])
+    links, _ = build_links(df)
+    replies = links[links["parent_row"].notna()]
+    assert links.loc[replies["parent_row"].astype(int), "Source"].tolist() == ["CT1", "SA3"]
+    assert replies["latency_meetings"].tolist() == [1, 1]
+
+    ran = latency_table(links).set_index(["direction", "org"]).loc["ran_replies"]
+    assert ran.loc["SA3", "n_replied"] == 1 and ran.loc["SA3", "latency_max"] == 1
+    assert ran.loc["CT1", "n_replied"] == 1 and ran.loc["CT1", "latency_max"] == 1
+    assert ran.loc["SA2", "n_replied"] == 0
+
+
+def test_title_link_takes_latest_earlier_opposite_ls():
+    df = _frame([
+        ("#100", "SA2", "LS in", "RAN", "RP-4001", "LS on positioning integrity", None, None, None),
+        ("#101", "RAN", "LS out", "SA2", "RP-4002", "LS on positioning integrity", None, None, None),
+        ("#102", "SA2", "LS in", "RAN", "RP-4003", "LS on positioning integrity", None, None, None),
+        ("#102", "RAN", "LS out", "SA2", "RP-4004", "Reply LS on positioning integrity", None, None, None),
+        ("#104", "SA2", "LS in", "RAN", "RP-4005", "LS on positioning integrity", None, None, None),
+    ])
+    links, _ = build_links(df)
+    assert links["link"].tolist() == ["", "", "", "title", ""]
+    assert links["parent_tdoc"].iat[3] == "RP-4003"
@@ -0,0 +1,28 @@
+import queue
+import threading
+
+import pandas as pd
+import pytest
+
+import download_and_build_liaison as dl
+from build_liaison_excel import LiaisonConcat
+from conftest import make_corpus
+from util.instrument import Profiler
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_consume_reports_unparsable_file(tmp_path, workers):
+    good = make_corpus(tmp_path, meetings=1)[0]
+    bad = tmp_path / "TDoc_List_Meeting_RAN#99.xlsx"
+    pd.DataFrame({"TDoc": ["RP-1"], "Type": ["LS in"], "Source": ["SA2"]}).to_excel(
+        bad, sheet_name="TDoc_List", index=False)
+    q: queue.Queue = queue.Queue()
+    for item in (good, bad, dl._DONE):
+        q.put(item)
+    stop = threading.Event()
+
+    with pytest.raises(dl.ParseFailed) as info:
+        dl.consume(q, workers, Profiler("t", enabled=False), stop, LiaisonConcat())
+    assert info.value.path == bad
+    assert "'To'" in str(info.value)
+    assert stop.is_set()
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from bench.gen_synthetic_tdoc_lists import COLUMNS, parse_distribution
+from conftest import make_corpus
+
+
+def test_same_seed_same_corpus(tmp_path):
+    a = make_corpus(tmp_path / "a", meetings=3)
+    b = make_corpus(tmp_path / "b", meetings=3)
+    c = make_corpus(tmp_path / "c", meetings=3, seed=2)
+
+    assert [p.name for p in a] == [p.name for p in b]
+    for pa, pb in zip(a, b):
+        pd.testing.assert_frame_equal(pd.read_excel(pa), pd.read_excel(pb))
+    assert any(not pd.read_excel(pa).equals(pd.read_excel(pc)) for pa, pc in zip(a, c))
+
+
+def test_corpus_matches_spec(tmp_path):
+    paths = make_corpus(tmp_path, meetings=5, start=100, rows_per_meeting=40)
+
+    nums = [int(p.name.split("#")[1].split("-")[0].split(".")[0]) for p in paths]
+    assert nums == list(range(100, 105))
+    listed = (tmp_path / "files.txt").read_text(encoding="utf-8").split()
+    assert listed == sorted(p.name for p in paths)
+    for p in paths:
+        df = pd.read_excel(p, sheet_name="TDoc_List")
+        assert list(df.columns) == COLUMNS
+        assert len(df) == 40
+        assert df["TDoc"].is_unique
+    ls = pd.concat(pd.read_excel(p) for p in paths)
+    ls = ls[ls["Type"].isin(["LS in", "LS out"])]
+    assert (ls.loc[ls["Type"] == "LS out", "Source"] == "RAN").all()
+    assert ls.loc[ls["Type"] == "LS in", "To"].str.startswith("RAN, ").all()
+
+
+def test_parse_distribution():
+    assert parse_distribution("1:0.7, 2:0.3,") == ([1, 2], [0.7, 0.3])
+    assert parse_distribution("3") == ([3], [1.0])
+    for bad in ("", "0:1", "x:1", "1:0"):
+        with pytest.raises(ValueError):
+            parse_distribution(bad)
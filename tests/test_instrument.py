@@ -0,0 +1,63 @@
+import time
+
+from util.instrument import Profiler, read_trace_events
+
+MB = 2**20
+
+
+class FakeRss:
+    """Profiler に渡す RSS 取得関数の代わり（値はテストが決める）."""
+
+    def __init__(self, value: int) -> None:
+        self.value = value
+        self.calls = 0
+
+    def __call__(self) -> int:
+        self.calls += 1
+        return self.value
+
+    def wait(self, n: int = 3) -> None:
+        """サンプリングスレッドが今の値を n 回近く読み終えるまで待つ."""
+        target = self.calls + n
+        deadline = time.monotonic() + 5
+        while self.calls < target:
+            assert time.monotonic() < deadline, "sampler did not run"
+            time.sleep(0.001)
+
+
+def test_samples_stay_bounded_and_nested_peaks(tmp_path):
+    rss = FakeRss(100 * MB)
+    prof = Profiler("t", interval=0.001, max_samples=40, rss_reader=rss)
+    with prof.span("outer"):
+        with prof.span("inner"):
+            rss.value = 300 * MB
+            rss.wait()
+            rss.value = 100 * MB
+            rss.wait()
+        rss.wait(100)
+    with prof.span("after"):
+        rss.wait()
+    trace = tmp_path / "trace.json"
+    prof.write(trace)
+
+    events = read_trace_events(trace)
+    peaks = {e["name"]: e["args"]["rss_peak_mb"] for e in events if e["ph"] == "X"}
+    assert peaks == {"inner": 300.0, "outer": 300.0, "after": 100.0}
+    counters = [e for e in events if e["ph"] == "C"]
+    assert 0 < len(counters) < 40
+    assert [e["ts"] for e in counters] == sorted(e["ts"] for e in counters)
+    assert max(e["args"]["rss_mb"] for e in counters) <= 300.0
+
+
+def test_cprofile_dumps_are_named_by_enclosing_spans(tmp_path):
+    prof = Profiler("batch", cprofile_dir=tmp_path, rss_reader=FakeRss(MB))
+    with prof.span("viewers"):
+        for viewer in ("full", "last5"):
+            with prof.span(viewer, "viewer"):
+                with prof.span("data_js", cprofile=True):
+                    sum(range(1000))
+    with prof.span("write", cprofile=True):
+        pass
+    prof.close()
+    assert sorted(p.name for p in tmp_path.glob("*.prof")) == [
+        "batch.viewers.full.data_js.prof", "batch.viewers.last5.data_js.prof", "batch.write.prof"]
@@ -0,0 +1,64 @@
+import json
+
+import pandas as pd
+
+from build_liaison_data import build_edges
+from util.org_canon import HUB_SOURCE, AliasTable, OrgCanonicalizer
+
+
+def _canon(tmp_path, aliases=None, canonical=("RAN", "SA2", "3GPP OPs")):
+    path = tmp_path / "aliases.json"
+    path.write_text(json.dumps({"version": "t1", "canonical": list(canonical),
+                                "aliases": aliases or {}}), encoding="utf-8")
+    return OrgCanonicalizer(AliasTable.load(path))
+
+
+def test_alias_table_and_rules(tmp_path):
+    canon = _canon(tmp_path, {"3GPP OP": "3GPP OPs", "GSMA NG": "GSMA"})
+    assert canon.table.canonical[-1] == "GSMA"  # aliases の値は canonical に足される
+    assert canon.canonical("3gpp op") == "3GPP OPs"  # 大文字小文字を区別しない
+    assert canon.canonical("ＧＳＭＡ　NG;") == "GSMA"  # 全角・前後の記号
+    assert canon.canonical("TSG RAN WG1") == "RAN1"
+    assert canon.canonical("3GPP TSG SA WG 2") == "SA2"
+    assert canon.canonical("ITU-R WP 5D") == "ITU-R WP5D"
+    assert canon.canonical("Service Aspects (SA2)") == "SA2"
+    assert canon.split("SA WG2, 3GPP OPs (ARIB, ATIS); SA2") == ["SA2", "3GPP OPs"]
+    assert canon.canonical("Unknown Forum", 3) == "Unknown Forum"
+    assert canon.unmapped == {"Unknown Forum": 3}
+    assert canon.misses == len(canon._cache)
+
+
+def test_source_never_collapses_into_ran_hub(tmp_path):
+    canon = _canon(tmp_path, {"RAN plenary": "RAN"})
+    assert canon.canonical_source("RAN") == "RAN"
+    for name in ("TSG RAN", "3GPP TSG RAN", "RAN plenary"):
+        assert canon.canonical(name) == "RAN"
+        assert canon.canonical_source(name) == HUB_SOURCE
+
+    df = pd.DataFrame({
+        "RAN": ["#100", "#100", "#100"],
+        "Source": ["3GPP TSG RAN", "SA WG2", "RAN"],
+        "Type": ["LS in", "LS in", "LS out"],
+        "To": ["RAN", "RAN", "SA2, TSG SA WG2"],
+    })
+    _, total = build_edges(df, canon=canon)
+    pairs = set(zip(total["from"], total["to"]))
+    assert ("RAN", "RAN") not in pairs
+    assert pairs == {(f"{HUB_SOURCE} (src)", "RAN"), ("SA2 (src)", "RAN"), ("RAN", "SA2 (dst)")}
+
+
+def test_destination_never_collapses_into_ran_hub(tmp_path):
+    canon = _canon(tmp_path)
+    assert canon.split("RAN, TSG RAN; 3GPP TSG RAN, SA WG2") == ["RAN", HUB_SOURCE, "SA2"]
+
+    df = pd.DataFrame({
+        "RAN": ["#100", "#100", "#101"],
+        "Source": ["RAN", "RAN", "SA2"],
+        "Type": ["LS out", "LS out", "LS in"],
+        "To": ["TSG RAN, SA2", "3GPP TSG RAN", "TSG RAN"],
+    })
+    edges, total = build_edges(df, canon=canon)
+    assert not ((total["from"] == "RAN") & (total["to"] == "RAN")).any()
+    assert "out|||RAN|||RAN" not in set(edges["edge_key"])
+    assert set(zip(total["from"], total["to"])) == {
+        ("RAN", f"{HUB_SOURCE} (dst)"), ("RAN", "SA2 (dst)"), ("SA2 (src)", "RAN")}
@@ -0,0 +1,102 @@
+"""
+エッジ × 会合の重み行列（raw / split）。
+edges_by_meeting の長い表を疎行列（COO）として持つ。
+
+保存形式（scipy 不要）:
+  edge_matrix.npz        row, col（int32）, weight_raw, weight_split（float64）,
+                         shape（[エッジ数, 会合数]）
+  edge_matrix_rows.csv   row, edge_key, dir, from, to（行 = edges_total の並び）
+  edge_matrix_cols.csv   col, meeting（列 = 会合番号の数値順。#90 < #100）
+
+scipy があれば coo_matrix((weight_raw, (row, col)), shape=shape) でそのまま読める。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MATRIX_FILES = ("edge_matrix.npz", "edge_matrix_rows.csv", "edge_matrix_cols.csv")
+WEIGHTS = ("raw", "split")
+
+
+def meeting_sort_key(meeting: str) -> tuple[int, str]:
+    """'#90' → (90, '#90')。数字の無いラベルは末尾に回す."""
+    m = re.search(r"\d+", str(meeting))
+    return (int(m.group()) if m else 1 << 30, str(meeting))
+
+
+@dataclass
+class EdgeMatrix:
+    """COO 形式のエッジ × 会合行列。rows は edge_key / dir / from / to を持つ表."""
+
+    rows: pd.DataFrame
+    meetings: list[str]
+    row: np.ndarray
+    col: np.ndarray
+    weight_raw: np.ndarray
+    weight_split: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.rows), len(self.meetings)
+
+    @classmethod
+    def from_edges(cls, edges_by_meeting: pd.DataFrame, edges_total: pd.DataFrame,
+                   meetings: list[str] | None = None) -> "EdgeMatrix":
+        """
+        build_edges の出力から作る。行順は edges_total、列順は会合番号の数値順。
+        meetings を渡すとエッジの無い会合も列に含める。
+        """
+        rows = edges_total[["edge_key", "dir", "from", "to"]].reset_index(drop=True)
+        if meetings is None:
+            meetings = edges_by_meeting["meeting"].unique().tolist()
+        meetings = sorted(meetings, key=meeting_sort_key)
+        row = pd.Index(rows["edge_key"]).get_indexer(edges_by_meeting["edge_key"])
+        col = pd.Index(meetings).get_indexer(edges_by_meeting["meeting"])
+        if (row < 0).any():
+            raise ValueError("edges_by_meeting に edges_total に無い edge_key があります")
+        return cls(
+            rows=rows, meetings=meetings,
+            row=row.astype(np.int32), col=col.astype(np.int32),
+            weight_raw=edges_by_meeting["weight_raw"].to_numpy(dtype=np.float64),
+            weight_split=edges_by_meeting["weight_split"].to_numpy(dtype=np.float64),
+        )
+
+    def dense(self, weight: str = "raw") -> np.ndarray:
+        """(エッジ数, 会合数) の密行列。同じ (row, col) が複数あれば加算する."""
+        if weight not in WEIGHTS:
+            raise ValueError(f"weight は {WEIGHTS} のいずれか: {weight!r}")
+        out = np.zeros(self.shape, dtype=np.float64)
+        np.add.at(out, (self.row, self.col),
+                  self.weight_raw if weight == "raw" else self.weight_split)
+        return out
+
+    def save(self, outdir: str | Path) -> list[Path]:
+        """npz と行・列のインデックス CSV を書き出し、書いたパスを返す."""
+        d = Path(outdir)
+        d.mkdir(parents=True, exist_ok=True)
+        npz, rows_csv, cols_csv = (d / n for n in MATRIX_FILES)
+        np.savez_compressed(
+            npz, row=self.row, col=self.col, weight_raw=self.weight_raw,
+            weight_split=self.weight_split, shape=np.asarray(self.shape, dtype=np.int64),
+        )
+        self.rows.rename_axis("row").reset_index().to_csv(rows_csv, index=False,
+                                                          encoding="utf-8-sig")
+        pd.DataFrame({"col": range(len(self.meetings)), "meeting": self.meetings}).to_csv(
+            cols_csv, index=False, encoding="utf-8-sig")
+        return [npz, rows_csv, cols_csv]
+
+    @classmethod
+    def load(cls, outdir: str | Path) -> "EdgeMatrix":
+        d = Path(outdir)
+        npz, rows_csv, cols_csv = (d / n for n in MATRIX_FILES)
+        with np.load(npz) as z:
+            arrays = {k: z[k] for k in ("row", "col", "weight_raw", "weight_split")}
+        rows = pd.read_csv(rows_csv, encoding="utf-8-sig", keep_default_na=False)
+        cols = pd.read_csv(cols_csv, encoding="utf-8-sig", keep_default_na=False)
+        return cls(rows=rows.drop(columns="row"), meetings=cols["meeting"].tolist(), **arrays)
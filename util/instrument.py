@@ -0,0 +1,258 @@
+"""パイプライン共通の計測（--profile）: span ごとの時間・CPU・RSS・I/O を trace に出す。"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+# optional: psutil（/proc が無い環境での RSS 取得）
+try:
+    import psutil  # type: ignore
+except Exception:
+    psutil = None
+
+
+def current_rss() -> int | None:
+    """現在の RSS（バイト）。取得できなければ None."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+class RssSampler:
+    """別スレッドで RSS を定期取得し、区間中のピークを記録する."""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._update(current_rss())
+
+    def _update(self, rss: int | None) -> None:
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._update(current_rss())
+
+
+def _mb(n: int | None) -> float | None:
+    return None if n is None else round(n / (1024 * 1024), 3)
+
+
+class Span:
+    """1 区間の計測値。rows / bytes_read / bytes_written / args は呼び出し側が埋める."""
+
+    def __init__(self, name: str, cat: str, args: dict) -> None:
+        self.name = name
+        self.cat = cat
+        self.args = dict(args)
+        self.rows: int | None = None
+        self.bytes_read: int | None = None
+        self.bytes_written: int | None = None
+        self.ts_us = 0.0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.rss_peak: int | None = None
+        self.tid = 0
+
+    def to_event(self, pid: int) -> dict:
+        args = {
+            "cpu_ms": round(self.cpu_s * 1000, 3),
+            "rss_peak_mb": _mb(self.rss_peak),
+            **{k: v for k, v in (("rows", self.rows), ("bytes_read", self.bytes_read),
+                                 ("bytes_written", self.bytes_written)) if v is not None},
+            **self.args,
+        }
+        return {
+            "name": self.name, "cat": self.cat, "ph": "X", "pid": pid, "tid": self.tid,
+            "ts": round(self.ts_us, 3), "dur": round(self.wall_s * 1e6, 3), "args": args,
+        }
+
+
+class Profiler:
+    """
+    span 単位の計測器。enabled=False のときは Span を返すだけで何も記録しない。
+
+    RSS は 1 本のサンプリングスレッドで取り、取るたびに実行中の各 span の
+    ピークを更新する（入れ子の span でもそれぞれのピークが得られる）。
+    trace の RSS カウンタ用のサンプルは max_samples 件を超えると 1 つおきに間引き、
+    以後の記録間隔も倍にする（長い実行でも件数が一定）。
+    rss_reader は RSS の取得関数（既定は current_rss。テストでは差し替える）。
+    cprofile=True を付けた span は cprofile_dir に cProfile の結果を書き出す。
+    ファイル名は <process_name>.<外側の span>.<name>.prof（同じスレッドで開いている span を
+    外側から並べる）。batch の viewer ごとに同じ段名が出ても上書きしない。
+    """
+
+    def __init__(self, process_name: str, *, enabled: bool = True,
+                 cprofile_dir: str | Path | None = None, interval: float = 0.01,
+                 max_samples: int = 20000,
+                 rss_reader: Callable[[], int | None] = current_rss) -> None:
+        self.process_name = process_name
+        self.enabled = enabled
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir else None
+        self.interval = interval
+        self.max_samples = max(2, max_samples)
+        self.rss_reader = rss_reader
+        self.spans: list[Span] = []
+        self.samples: list[tuple[float, int]] = []
+        self._stride = 1  # samples に残す間隔（サンプリング何回に 1 回か）
+        self._tick = 0
+        self._open_peaks: dict[int, list[int | None]] = {}  # 実行中の span → [ピーク]
+        self._epoch_us = time.time() * 1e6 - time.perf_counter() * 1e6
+        self._lock = threading.Lock()
+        self._local = threading.local()  # スレッドごとの開いている span 名
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        if enabled:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+
+    @classmethod
+    def from_args(cls, args, process_name: str) -> "Profiler":
+        """add_profile_args で追加した引数から Profiler を作る."""
+        return cls(process_name, enabled=bool(args.profile or args.cprofile_dir),
+                   cprofile_dir=args.cprofile_dir or None)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss = self.rss_reader()
+            if rss is not None:
+                with self._lock:
+                    self._record(time.perf_counter(), rss)
+
+    def _record(self, t: float, rss: int) -> None:
+        """
+        1 サンプル分の更新（_lock を持って呼ぶ）。
+        span のピークは毎回、trace 用の samples は stride 回に 1 回.
+        """
+        for cell in self._open_peaks.values():
+            if cell[0] is None or rss > cell[0]:
+                cell[0] = rss
+        self._tick += 1
+        if self._tick % self._stride:
+            return
+        self.samples.append((t, rss))
+        if len(self.samples) >= self.max_samples:
+            self.samples = self.samples[::2]
+            self._stride *= 2
+
+    @contextmanager
+    def span(self, name: str, cat: str = "stage", *, cprofile: bool = False,
+             **args) -> Iterator[Span]:
+        sp = Span(name, cat, args)
+        if not self.enabled:
+            yield sp
+            return
+        prof = cProfile.Profile() if (cprofile and self.cprofile_dir) else None
+        stack = self._span_stack()
+        stack.append(name)
+        dump_name = ".".join(stack)
+        peak: list[int | None] = [self.rss_reader()]
+        with self._lock:
+            self._open_peaks[id(sp)] = peak
+        t0, c0 = time.perf_counter(), time.process_time()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield sp
+        finally:
+            if prof is not None:
+                prof.disable()
+                self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+                safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in dump_name)
+                prof.dump_stats(str(self.cprofile_dir / f"{self.process_name}.{safe}.prof"))
+            t1 = time.perf_counter()
+            sp.ts_us = self._epoch_us + t0 * 1e6
+            sp.wall_s = t1 - t0
+            sp.cpu_s = time.process_time() - c0
+            end_rss = self.rss_reader()
+            with self._lock:
+                del self._open_peaks[id(sp)]
+            sp.rss_peak = max((v for v in (peak[0], end_rss) if v is not None), default=None)
+            sp.tid = threading.get_ident() % 100000
+            stack.pop()
+            with self._lock:
+                self.spans.append(sp)
+
+    def _span_stack(self) -> list[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def trace_events(self) -> list[dict]:
+        """Chrome trace-event 形式のイベント列（X: span, C: RSS カウンタ, M: プロセス名）."""
+        pid = os.getpid()
+        events: list[dict] = [{
+            "name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+            "args": {"name": self.process_name},
+        }]
+        events.extend(sp.to_event(pid) for sp in self.spans)
+        with self._lock:
+            samples = list(self.samples)
+        for t, rss in samples:
+            events.append({
+                "name": "rss", "ph": "C", "pid": pid, "tid": 0,
+                "ts": round(self._epoch_us + t * 1e6, 3), "args": {"rss_mb": _mb(rss)},
+            })
+        return events
+
+    def write(self, path: str | Path, extra_events: list[dict] | None = None) -> None:
+        """Chrome trace-event JSON（chrome://tracing / Perfetto で開ける）を書き出す."""
+        self.close()
+        events = self.trace_events() + list(extra_events or [])
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"},
+                                  ensure_ascii=False), encoding="utf-8")
+
+    def finish(self, args) -> None:
+        """--profile 指定時に trace を書き出して場所を表示する."""
+        self.close()
+        if getattr(args, "profile", ""):
+            self.write(args.profile)
+            print(f"profile: {args.profile} (spans={len(self.spans)})")
+
+
+def add_profile_args(parser) -> None:
+    """各エントリポイント共通の --profile / --cprofile-dir を追加する."""
+    parser.add_argument("--profile", default="",
+                        help="計測結果を Chrome trace-event JSON で書き出すパス")
+    parser.add_argument("--cprofile-dir", default="",
+                        help="段ごとの cProfile 結果（.prof）を書き出すフォルダ")
+
+
+def read_trace_events(path: str | Path) -> list[dict]:
+    """別プロセスが書いた trace JSON のイベント列を読む（無ければ空）."""
+    p = Path(path)
+    if not p.exists():
+        return []
+    return json.loads(p.read_text(encoding="utf-8")).get("traceEvents", [])
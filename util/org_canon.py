@@ -0,0 +1,204 @@
+"""
+組織名（Source / To）の正規化: 版付きの別名表 + 規則 + メモ化キャッシュ。
+
+- 規則: 全角半角の統一・空白の畳み込み・前後の ; , . の除去、3GPP の WG 表記
+  （TSG RAN WG1 / RAN WG1 → RAN1、SA WG2 → SA2、3GPP TSG SA → SA）、
+  ITU の WP / SG 表記（ITU-R WP 5D → ITU-R WP5D）、「名称 (略称)」の片方が既知なら既知名。
+- Source / To とも、RAN そのもの以外の RAN 表記（TSG RAN / 3GPP TSG RAN）は TSG RAN にする。
+  viewer の中心ノード RAN に畳むと RAN → RAN の自己ループになるため。
+- 別名表: util/org_aliases.json（version / canonical / aliases）。キーは大文字小文字を区別しない。
+- 変換結果は生の文字列ごとにキャッシュし、全行・全ファイルで使い回す。
+  規則にも別名表にも当たらなかった名前は出現回数つきで unmapped に集計する。
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+ALIAS_PATH = Path(__file__).with_name("org_aliases.json")
+HUB = "RAN"  # viewer の中心ノード
+HUB_SOURCE = "TSG RAN"  # RAN に正規化される組織名（RAN そのものを除く）の行き先
+
+_WG_RE = re.compile(
+    r"^(?:3GPP[\s_-]*)?(?:TSG[\s_-]*)?(RAN|SA|CT)(?:[\s_-]*(?:WG)?[\s_-]*(\d))?$",
+    re.IGNORECASE,
+)
+_ITU_RE = re.compile(r"^ITU[\s-]*([RT])[\s-]+(WP|SG)[\s-]*(\d+[A-Z]?)$", re.IGNORECASE)
+_PAREN_RE = re.compile(r"^(.*\S)\s*\(([^()]+)\)$")
+_EDGE_PUNCT = " \t.,;:"
+_SEPARATORS = ",;\n"
+
+
+@dataclass
+class AliasTable:
+    """別名表。version は出力・レポートに載せて、どの表で正規化したかを残す。"""
+
+    version: str
+    canonical: list[str] = field(default_factory=list)
+    aliases: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "AliasTable":
+        p = Path(path) if path else ALIAS_PATH
+        data = json.loads(p.read_text(encoding="utf-8"))
+        aliases = {str(k): str(v) for k, v in data.get("aliases", {}).items()}
+        unknown = sorted(set(aliases.values()) - set(data.get("canonical", [])))
+        canonical = list(data.get("canonical", [])) + unknown
+        return cls(version=str(data.get("version", "")), canonical=canonical, aliases=aliases)
+
+
+def clean_name(name: str) -> str:
+    """意味を持たない表記ゆれ（全角・連続空白・前後の記号・片側の括弧）を除く."""
+    s = unicodedata.normalize("NFKC", name)
+    s = " ".join(s.split()).strip(_EDGE_PUNCT)
+    # 分割で切れた「3GPP OPs (ARIB」「TTC)」のような片側だけの括弧
+    if s.count("(") > s.count(")"):
+        s = s[: s.rfind("(")].strip(_EDGE_PUNCT) or s.replace("(", "").strip(_EDGE_PUNCT)
+    elif s.count(")") > s.count("("):
+        s = s.replace(")", "").strip(_EDGE_PUNCT)
+    return s
+
+
+def split_top_level(value: str) -> list[str]:
+    """, ; 改行で分割する。括弧内の区切りでは分割しない（「3GPP OPs (ARIB, ATIS, ...)」）."""
+    parts: list[str] = []
+    buf: list[str] = []
+    depth = 0
+    for ch in value:
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth = max(0, depth - 1)
+        if ch in _SEPARATORS and depth == 0:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+    parts.append("".join(buf))
+    return parts
+
+
+class OrgCanonicalizer:
+    """
+    組織名 → 正規名。1 インスタンスを全ファイルで共有すると、
+    キャッシュと unmapped の集計が実行全体に渡る。
+    count には呼び出し 1 回が表す行数を渡す（一意値ごとに呼ぶ場合の出現回数）。
+    """
+
+    def __init__(self, table: AliasTable | None = None) -> None:
+        self.table = table or AliasTable.load()
+        self._known: dict[str, str] = {n.casefold(): n for n in self.table.canonical}
+        self._known.update({k.casefold(): v for k, v in self.table.aliases.items()})
+        self._cache: dict[str, tuple[str, bool]] = {}
+        self.unmapped: Counter[str] = Counter()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_args(cls, args) -> "OrgCanonicalizer | None":
+        """add_canon_args で追加した引数から作る（--no-canon なら None）."""
+        if getattr(args, "no_canon", False):
+            return None
+        return cls(AliasTable.load(args.aliases or None))
+
+    @property
+    def version(self) -> str:
+        return self.table.version
+
+    def _lookup(self, s: str) -> str | None:
+        hit = self._known.get(s.casefold())
+        if hit is not None:
+            return hit
+        m = _WG_RE.match(s)
+        if m:
+            return m.group(1).upper() + (m.group(2) or "")
+        m = _ITU_RE.match(s)
+        if m:
+            return f"ITU-{m.group(1).upper()} {m.group(2).upper()}{m.group(3).upper()}"
+        return None
+
+    def _resolve(self, name: str) -> tuple[str, bool]:
+        s = clean_name(name)
+        if s == "":
+            return "", True
+        hit = self._lookup(s)
+        if hit is not None:
+            return hit, True
+        m = _PAREN_RE.match(s)
+        if m:
+            for part in (m.group(1), m.group(2)):
+                hit = self._lookup(clean_name(part))
+                if hit is not None:
+                    return hit, True
+        return s, False
+
+    def canonical(self, name: str, count: int = 1) -> str:
+        """1 つの組織名を正規名にする（未対応なら整形だけした名前）."""
+        cached = self._cache.get(name)
+        if cached is None:
+            self.misses += 1
+            cached = self._cache[name] = self._resolve(name)
+        else:
+            self.hits += 1
+        if not cached[1] and count:
+            self.unmapped[cached[0]] += count
+        return cached[0]
+
+    def canonical_source(self, name: str, count: int = 1) -> str:
+        """Source 用。RAN そのもの以外で RAN に正規化される名前は HUB_SOURCE にする."""
+        c = self.canonical(name, count)
+        if c == HUB and clean_name(name) != HUB:
+            return HUB_SOURCE
+        return c
+
+    def canonical_dest(self, name: str, count: int = 1) -> str:
+        """To の 1 宛先用。規則は canonical_source と同じ（LS out の RAN → RAN を作らない）."""
+        return self.canonical_source(name, count)
+
+    def split(self, value: str, count: int = 1) -> list[str]:
+        """To 欄を宛先ごとに分割・正規化する。空要素と正規化後の重複は除く."""
+        out: list[str] = []
+        for part in split_top_level(value):
+            c = self.canonical_dest(part, count)
+            if c and c not in out:
+                out.append(c)
+        return out
+
+    def join(self, value: str, count: int = 1) -> str:
+        """To 欄を正規化して ", " 区切りで返す（Excel 出力用）."""
+        return ", ".join(self.split(value, count))
+
+    def summary(self) -> str:
+        return (f"別名表 v{self.version}: 一意な表記 {len(self._cache)} 件"
+                f"（キャッシュ hit {self.hits} / miss {self.misses}）, "
+                f"未対応 {len(self.unmapped)} 種 {sum(self.unmapped.values())} 件")
+
+    def print_unmapped(self, top: int = 10) -> None:
+        for name, n in self.unmapped.most_common(top):
+            print(f"    未対応: {name!r} x{n}")
+        if len(self.unmapped) > top:
+            print(f"    ...ほか {len(self.unmapped) - top} 種")
+
+    def write_unmapped(self, path: str | Path) -> None:
+        """未対応の組織名を出現回数の降順で CSV に書き出す（別名表を育てる材料）."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with p.open("w", encoding="utf-8-sig", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["name", "count", "alias_version"])
+            for name, n in self.unmapped.most_common():
+                w.writerow([name, n, self.version])
+
+
+def add_canon_args(parser) -> None:
+    """build_liaison_excel / build_liaison_data 共通の --no-canon / --aliases を追加する."""
+    parser.add_argument("--no-canon", action="store_true",
+                        help="組織名の正規化（別名表・規則）を行わない")
+    parser.add_argument("--aliases", default="",
+                        help=f"別名表 JSON のパス（デフォルト {ALIAS_PATH.name}）")
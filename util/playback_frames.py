@@ -0,0 +1,75 @@
+"""
+viewer のタイムライン再生用フレーム（会合ごとのリンク値）。
+エッジ × 会合行列（util.edge_matrix）から作る。
+
+向き（in / out）ごとにノードとリンクの並びを全会合で 1 つに固定し、
+ノードの位置（x, y）もここで決めておく。
+viewer は再生中に Plotly.restyle で link.value だけを差し替えるので、
+会合を進めてもレイアウトの再計算が起きず、ノードが動かない。
+
+  x: RAN 以外は外側の列（in は左、out は右）、RAN は反対側の列
+  y: RAN は中央。相手ノードは全会合の raw 合計の降順に上から並べ、
+     合計の比率に応じた帯の中央に置く
+     （小さいノードも MIN_BAND 分の帯は確保する）
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from util.edge_matrix import WEIGHTS, EdgeMatrix
+from util.trend_analytics import round_nested
+
+# Plotly の fixed 配置は 0 / 1 ちょうどだと端が切れるので内側に寄せる
+EDGE_X = (0.001, 0.999)
+Y_RANGE = (0.01, 0.99)
+MIN_BAND = 0.25  # 1 ノードあたりの帯の下限（等分した幅に対する比率）
+
+
+def _positions(totals: np.ndarray) -> np.ndarray:
+    """相手ノード（totals の降順に並べたもの）の y。帯の高さは totals の比率."""
+    n = len(totals)
+    if n == 0:
+        return np.empty(0)
+    s = totals.sum()
+    share = totals / s if s > 0 else np.full(n, 1.0 / n)
+    band = np.maximum(share, MIN_BAND / n)
+    band /= band.sum()
+    centers = np.cumsum(band) - band / 2
+    return Y_RANGE[0] + (Y_RANGE[1] - Y_RANGE[0]) * centers
+
+
+def build_frames(matrix: EdgeMatrix) -> dict:
+    """
+    viewer の再生モード用の dict（JSON にそのまま出せる）。
+      meetings: 会合（番号の数値順）
+      in / out: nodes（先頭が RAN）, x, y, source, target（nodes の添字）, edgeKeys,
+                raw / split（会合ごとのリンク値の配列。リンクの並びは edgeKeys と同じ）
+    """
+    rows = matrix.rows
+    dense = {w: matrix.dense(w) for w in WEIGHTS}
+    dir_arr = rows["dir"].to_numpy()
+    result: dict = {"meetings": list(matrix.meetings)}
+    for d, side in (("in", "from"), ("out", "to")):
+        idx = np.flatnonzero(dir_arr == d)
+        part = rows.iloc[idx]
+        totals: dict[str, float] = {}
+        for label, v in zip(part[side], dense["raw"][idx].sum(axis=1)):
+            if label != "RAN":
+                totals[label] = totals.get(label, 0.0) + float(v)
+        others = sorted(totals, key=lambda n: (-totals[n], n))
+        nodes = ["RAN", *others]
+        index = {n: i for i, n in enumerate(nodes)}
+        ran_x, other_x = (EDGE_X[1], EDGE_X[0]) if d == "in" else EDGE_X
+        y = _positions(np.asarray([totals[n] for n in others], dtype=np.float64))
+        result[d] = {
+            "nodes": nodes,
+            "x": [ran_x] + [other_x] * len(others),
+            "y": [0.5] + [round(float(v), 4) for v in y],
+            "source": [index[n] for n in part["from"]],
+            "target": [index[n] for n in part["to"]],
+            "edgeKeys": part["edge_key"].tolist(),
+            **{w: round_nested(dense[w][idx].T) if len(idx)
+               else [[] for _ in matrix.meetings] for w in WEIGHTS},
+        }
+    return result
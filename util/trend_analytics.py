@@ -0,0 +1,133 @@
+"""
+エッジ × 会合行列（util.edge_matrix）に対する傾向分析。
+全エッジを 1 回の配列演算で処理する。
+
+- rolling_sum: 直近 window 会合の移動合計
+- growth_slope: 直近 window 会合の最小二乗の傾き（1 会合あたりの増減）
+- top_movers: 傾きの上位・下位 K 件
+- node_series: ノードごとの会合別 in/out（重み合計 = strength と、相手数 = degree）
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from util.edge_matrix import WEIGHTS, EdgeMatrix
+
+DIRS = ("all", "in", "out")
+
+
+def rolling_sum(mat: np.ndarray, window: int) -> np.ndarray:
+    """各行の直近 window 列の合計（先頭側は取れる分だけ）。累積和の差で求める."""
+    if window < 1:
+        raise ValueError(f"window は 1 以上: {window}")
+    cs = np.concatenate([np.zeros((mat.shape[0], 1)), np.cumsum(mat, axis=1)], axis=1)
+    hi = np.arange(1, mat.shape[1] + 1)
+    return cs[:, hi] - cs[:, np.maximum(hi - window, 0)]
+
+
+def growth_slope(mat: np.ndarray, window: int | None = None) -> np.ndarray:
+    """各行の直近 window 列（None なら全列）に当てはめた直線の傾き。1 列以下なら 0."""
+    y = mat if window is None else mat[:, -window:]
+    n = y.shape[1]
+    if n < 2:
+        return np.zeros(mat.shape[0])
+    x = np.arange(n, dtype=np.float64) - (n - 1) / 2.0
+    return (y - y.mean(axis=1, keepdims=True)) @ x / (x @ x)
+
+
+def top_movers(score: np.ndarray, k: int, mask: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    score の上位 k 件（正のもの、降順）と下位 k 件（負のもの、昇順）の行番号。
+    mask を渡すと True の行だけを対象にする。
+    """
+    idx = np.arange(len(score)) if mask is None else np.flatnonzero(mask)
+    s = score[idx]
+    up = idx[s > 0]
+    down = idx[s < 0]
+    if len(up) > k:
+        up = up[np.argpartition(-score[up], k - 1)[:k]]
+    if len(down) > k:
+        down = down[np.argpartition(score[down], k - 1)[:k]]
+    # 同値は行番号（edges_total の並び）で安定させる
+    up = up[np.lexsort((up, -score[up]))]
+    down = down[np.lexsort((down, score[down]))]
+    return up, down
+
+
+def node_series(mat: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                n_nodes: int) -> dict[str, np.ndarray]:
+    """
+    ノード × 会合の系列。
+    out = そのノードが from のエッジの重み合計、in = to のエッジの合計。
+    out_degree / in_degree は重みが正のエッジ（相手）の数。
+    """
+    shape = (n_nodes, mat.shape[1])
+    active = (mat > 0).astype(np.float64)
+    out = {"out": np.zeros(shape), "in": np.zeros(shape),
+           "out_degree": np.zeros(shape), "in_degree": np.zeros(shape)}
+    np.add.at(out["out"], src, mat)
+    np.add.at(out["in"], dst, mat)
+    np.add.at(out["out_degree"], src, active)
+    np.add.at(out["in_degree"], dst, active)
+    return out
+
+
+def round_nested(a: np.ndarray, digits: int = 4) -> list:
+    """
+    JSON 用に丸める（入れ子の配列は入れ子の list に）。
+    整数値は int にして "0.0" のような冗長な表記を避ける。playback_frames でも使う.
+    """
+    r = np.round(a, digits)
+    if np.array_equal(r, np.trunc(r)):
+        return r.astype(np.int64).tolist()
+    if r.ndim > 1:
+        return [round_nested(row, digits) for row in r]
+    return [int(v) if v.is_integer() else v for v in r.tolist()]
+
+
+def analyze(matrix: EdgeMatrix, window: int = 4, k: int = 10) -> dict:
+    """
+    viewer の Trends 表示用の集計（JSON にそのまま出せる dict）。
+    weight（raw / split）× dir（all / in / out）ごとに上位・下位 K 件のエッジと
+    その会合別系列・移動合計、ノードごとの in/out 系列（重み合計）と相手数を返す。
+    """
+    rows = matrix.rows
+    nodes = sorted(set(rows["from"]) | set(rows["to"]))
+    node_index = {n: i for i, n in enumerate(nodes)}
+    src = rows["from"].map(node_index).to_numpy(dtype=np.int64)
+    dst = rows["to"].map(node_index).to_numpy(dtype=np.int64)
+    dir_arr = rows["dir"].to_numpy()
+
+    result: dict = {
+        "meetings": list(matrix.meetings), "window": window, "k": k,
+        "nodes": nodes, "movers": {}, "nodeSeries": {}, "nodeDegree": {},
+    }
+    for weight in WEIGHTS:
+        mat = matrix.dense(weight)
+        rolled = rolling_sum(mat, window)
+        slope = growth_slope(mat, window)
+        total = mat.sum(axis=1)
+        movers = {}
+        for d in DIRS:
+            mask = None if d == "all" else (dir_arr == d)
+            up, down = top_movers(slope, k, mask)
+            movers[d] = {
+                side: [{
+                    "edge_key": rows.at[i, "edge_key"], "dir": rows.at[i, "dir"],
+                    "from": rows.at[i, "from"], "to": rows.at[i, "to"],
+                    "slope": round(float(slope[i]), 4),
+                    "recent": round(float(rolled[i, -1]), 4) if mat.shape[1] else 0.0,
+                    "total": round(float(total[i]), 4),
+                    "series": round_nested(mat[i]), "rolling": round_nested(rolled[i]),
+                } for i in idx]
+                for side, idx in (("up", up), ("down", down))
+            }
+        result["movers"][weight] = movers
+        series = node_series(mat, src, dst, len(nodes))
+        result["nodeSeries"][weight] = {"in": round_nested(series["in"]),
+                                        "out": round_nested(series["out"])}
+        # 相手数は重みの種類によらない
+        result["nodeDegree"] = {"in": round_nested(series["in_degree"]),
+                                "out": round_nested(series["out_degree"])}
+    return result
@@ -1,10 +1,54 @@
 """ViewerTemplateBuilder: index.html / viewer.css / app.js を生成する専用クラス。"""
 
+import hashlib
+from pathlib import PurePosixPath
+
+# viewer 間で共通の静的ファイル（data_patch.js / data.js / trends.js は viewer ごと）
+STATIC_ASSETS = ("viewer.css", "app.js")
+# data_patch.js はパッチを書いたときだけ読み込む
+# （無いファイルを参照すると毎回 404 になる）
+PATCH_SCRIPT = "<script src=\"data_patch.js\"></script>"
+PATCH_ANCHOR = "<script src=\"trends.js\"></script>"
+
 
 class ViewerTemplateBuilder:
     """テンプレート生成専用。index.html, viewer.css, app.js を lines で組み立てて返す。"""
 
-    def render_index_html(self) -> str:
+    def __init__(self, asset_paths: dict[str, str] | None = None) -> None:
+        """
+        asset_paths: index.html から参照する静的ファイルのパス（STATIC_ASSETS の名前 → パス）。
+        省略時は同じフォルダの viewer.css / app.js。複数 viewer で共有する場合は
+        "../assets/app.<hash>.js" のように渡す。
+        """
+        self.asset_paths = {name: name for name in STATIC_ASSETS}
+        self.asset_paths.update(asset_paths or {})
+
+    def render_static_assets(self, debug: bool = False) -> dict[str, str]:
+        """STATIC_ASSETS の名前 → 中身."""
+        return {"viewer.css": self.render_viewer_css(), "app.js": self.render_app_js(debug=debug)}
+
+    @staticmethod
+    def hashed_name(name: str, content: str) -> str:
+        """中身の SHA-256 先頭 10 桁を付けたファイル名（app.js → app.<hash>.js）."""
+        p = PurePosixPath(name)
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:10]
+        return f"{p.stem}.{digest}{p.suffix}"
+
+    @staticmethod
+    def set_patch_script(html: str, enabled: bool) -> str:
+        """
+        既存の index.html に data_patch.js の読み込みを足す / 外す。
+        build_liaison_delta.py がパッチを書いたとき、
+        build_liaison_data.py が data.js を作り直したときに使う。
+        """
+        lines = [line for line in html.split("\n") if line.strip() != PATCH_SCRIPT]
+        if enabled:
+            at = next((i for i, line in enumerate(lines) if line.strip() == PATCH_ANCHOR), len(lines))
+            lines.insert(at, PATCH_SCRIPT)
+        return "\n".join(lines)
+
+    def render_index_html(self, patch: bool = False) -> str:
+        """patch: data_patch.js を読み込むか（build_liaison_delta.py が書いた場合だけ True）."""
         lines = [
             "<!DOCTYPE html>",
             "<html lang=\"ja\">",
@@ -12,10 +56,15 @@ class ViewerTemplateBuilder:
             "<meta charset=\"utf-8\">",
             "<title>RAN Liaison Sankey</title>",
             "<script src=\"https://cdn.plot.ly/plotly-2.35.0.min.js\"></script>",
-            "<link rel=\"stylesheet\" href=\"viewer.css\">",
+            f"<link rel=\"stylesheet\" href=\"{self.asset_paths['viewer.css']}\">",
             "</head>",
             "<body>",
             "<div class=\"controls\">",
+            "  <label for=\"view\">View:</label>",
+            "  <select id=\"view\">",
+            "    <option value=\"sankey\">Sankey</option>",
+            "    <option value=\"trends\">Trends</option>",
+            "  </select>",
             "  <label for=\"dir\">Direction:</label>",
             "  <select id=\"dir\">",
             "    <option value=\"all\">All</option>",
@@ -24,6 +73,12 @@ class ViewerTemplateBuilder:
             "  </select>",
             "  <label>Meeting:</label>",
             "  <div class=\"radio-group\" id=\"meetings\"></div>",
+            "  <div class=\"playback\" id=\"playback\">",
+            "    <button type=\"button\" id=\"playBtn\">▶ Play</button>",
+            "    <input type=\"range\" id=\"timeline\" min=\"0\" max=\"0\" step=\"1\" value=\"0\"",
+            "           aria-label=\"Meeting timeline\" />",
+            "    <span id=\"timelineLabel\"></span>",
+            "  </div>",
             "  <label class=\"toggle-wrap\">",
             "    <input type=\"checkbox\" id=\"splitOut\" />",
             "    <span>Split LS out by recipients (1/k)</span>",
@@ -34,6 +89,20 @@ class ViewerTemplateBuilder:
             "  </div>",
             "</div>",
             "<div id=\"chart\"></div>",
+            "<div id=\"trends\" class=\"trends hidden\">",
+            "  <p id=\"trendsNote\" class=\"trends-note\"></p>",
+            "  <div id=\"moversChart\"></div>",
+            "  <table id=\"moversTable\" class=\"trends-table\">",
+            "    <thead><tr><th></th><th>Dir</th><th>From</th><th>To</th>",
+            "      <th>Slope / meeting</th><th id=\"moversRecent\">Recent</th><th>Total</th></tr></thead>",
+            "    <tbody></tbody>",
+            "  </table>",
+            "  <div class=\"trends-node\">",
+            "    <label for=\"trendNode\">Node:</label>",
+            "    <select id=\"trendNode\"></select>",
+            "  </div>",
+            "  <div id=\"degreeChart\"></div>",
+            "</div>",
             "<div id=\"modal\" class=\"modal hidden\" tabindex=\"-1\" role=\"dialog\">",
             "  <div class=\"modal-content\">",
             "    <div class=\"modal-header\">",
@@ -44,14 +113,16 @@ class ViewerTemplateBuilder:
             "      <p id=\"modalFromTo\"></p>",
             "      <p id=\"modalTotal\"></p>",
             "      <table id=\"modalTable\">",
-            "        <thead><tr><th>Meeting</th><th>Raw</th><th>Displayed</th></tr></thead>",
+            "        <thead><tr><th id=\"modalKeyHead\">Meeting</th><th>Raw</th><th>Displayed</th></tr></thead>",
             "        <tbody></tbody>",
             "      </table>",
             "    </div>",
             "  </div>",
             "</div>",
-            "<script src=\"data.js\"></script>",
-            "<script src=\"app.js\"></script>",
+            *([PATCH_SCRIPT] if patch else []),
+            PATCH_ANCHOR,
+            "<script src=\"frames.js\"></script>",
+            f"<script src=\"{self.asset_paths['app.js']}\"></script>",
             "</body>",
             "</html>",
         ]
@@ -75,12 +146,32 @@ class ViewerTemplateBuilder:
             ".radio-group input:checked + span { background: #3b82f6; color: #fff; border-radius: 16px;",
             "  padding: 4px 10px; margin: -4px -10px; }",
             ".toggle-wrap { font-weight: 400; font-size: 13px; }",
+            ".playback { display: flex; align-items: center; gap: 8px; }",
+            ".playback.hidden { display: none; }",
+            ".playback button { padding: 4px 10px; border: 1px solid #bbb; border-radius: 6px; background: #fff;",
+            "  cursor: pointer; font-size: 13px; }",
+            ".playback input[type=range] { width: 180px; }",
+            ".playback span { font-size: 13px; min-width: 110px; }",
             ".toggle-wrap input { margin-right: 6px; }",
             ".legend { display: flex; gap: 12px; margin-left: auto; font-size: 13px; }",
             ".legend-swatch { width: 14px; height: 8px; border-radius: 3px; display: inline-block; margin-right: 4px; }",
             ".legend-swatch.in { background: rgba(31,119,180,0.55); }",
             ".legend-swatch.out { background: rgba(255,127,14,0.55); }",
             "#chart { width: 100%; min-height: calc(100vh - 56px); }",
+            "#chart.hidden, .trends.hidden { display: none; }",
+            ".trends { padding: 12px 20px; }",
+            ".trends-note { font-size: 13px; color: #555; margin-bottom: 8px; }",
+            "#moversChart, #degreeChart { width: 100%; height: 380px; background: #fff; border-radius: 8px; }",
+            ".trends-table { width: 100%; border-collapse: collapse; font-size: 13px; margin: 12px 0;",
+            "  background: #fff; }",
+            ".trends-table th, .trends-table td { padding: 6px 8px; text-align: left; border-bottom: 1px solid #eee; }",
+            ".trends-table tbody tr { cursor: pointer; }",
+            ".trends-table tbody tr:hover { background: #eef4ff; }",
+            ".trends-table .up { color: #15803d; }",
+            ".trends-table .down { color: #b91c1c; }",
+            ".trends-node { display: flex; align-items: center; gap: 8px; margin: 12px 0 8px; font-size: 14px; }",
+            ".trends-node label { font-weight: 600; }",
+            ".trends-node select { padding: 4px 8px; border: 1px solid #bbb; border-radius: 6px; }",
             ".modal { position: fixed; inset: 0; background: rgba(0,0,0,0.4); z-index: 100;",
             "  display: flex; align-items: center; justify-content: center; }",
             ".modal.hidden { display: none; }",
@@ -95,37 +186,54 @@ class ViewerTemplateBuilder:
             ".modal-body p { margin-bottom: 8px; font-size: 14px; }",
             ".modal-body table { width: 100%; border-collapse: collapse; font-size: 13px; }",
             ".modal-body th, .modal-body td { padding: 6px 8px; text-align: left; border-bottom: 1px solid #eee; }",
+            ".modal-body td.section { font-weight: 600; background: #f5f6fa; }",
         ]
         return "\n".join(lines)
 
     def render_app_js(self, debug: bool = False) -> str:
         """app.js を生成。Problem1/2 対応: Plotly API で plotly_click, edge_key 照合, hovertemplate."""
         lines = [
-            "(function() {",
+            "function startViewer() {",
             "  const debugMode = " + ("true" if debug else "false") + ";",
             "  if (typeof window.LIAISON_DATA === \"undefined\") {",
             "    console.error(\"LIAISON_DATA not found. Load data.js first.\"); return;",
             "  }",
             "  const { meetings: meetingList, edgesByMeeting, edgesTotal } = window.LIAISON_DATA;",
+            "  const nodeTable = window.LIAISON_DATA.nodeTable || null;",
             "  const COLOR_IN = \"rgba(31,119,180,0.55)\";",
             "  const COLOR_OUT = \"rgba(255,127,14,0.55)\";",
-            "  const state = { dir: \"all\", meeting: \"all\", splitOut: false };",
+            "  const trends = window.LIAISON_TRENDS || null;",
+            "  const frames = window.LIAISON_FRAMES || null;",
+            "  const TWEEN_MS = 400, STEP_MS = 1200;",
+            "  const state = { view: \"sankey\", dir: \"all\", meeting: \"all\", splitOut: false, node: \"RAN\" };",
+            "  // 再生モード中は frames.js の固定レイアウトで描き、",
+            "  // shown は表示中の link.value（補間の起点）",
+            "  const playback = { active: false, index: 0, timer: null, anim: null, shown: {} };",
             "",
             "  const dirEl = document.getElementById(\"dir\");",
             "  const meetingsEl = document.getElementById(\"meetings\");",
             "  const splitOutEl = document.getElementById(\"splitOut\");",
             "  const chartEl = document.getElementById(\"chart\");",
+            "  const viewEl = document.getElementById(\"view\");",
+            "  const trendsEl = document.getElementById(\"trends\");",
+            "  const trendNodeEl = document.getElementById(\"trendNode\");",
+            "  const playbackEl = document.getElementById(\"playback\");",
+            "  const playBtn = document.getElementById(\"playBtn\");",
+            "  const timelineEl = document.getElementById(\"timeline\");",
+            "  const timelineLabel = document.getElementById(\"timelineLabel\");",
             "  const modalEl = document.getElementById(\"modal\");",
             "  const modalTitle = document.getElementById(\"modalTitle\");",
             "  const modalFromTo = document.getElementById(\"modalFromTo\");",
             "  const modalTotal = document.getElementById(\"modalTotal\");",
             "  const modalTableBody = document.querySelector(\"#modalTable tbody\");",
+            "  const modalKeyHead = document.getElementById(\"modalKeyHead\");",
             "  function closeModal() { modalEl.classList.add(\"hidden\"); }",
             "  document.getElementById(\"modalClose\").addEventListener(\"click\", closeModal);",
             "  modalEl.addEventListener(\"click\", (e) => { if (e.target === modalEl) closeModal(); });",
             "  document.addEventListener(\"keydown\", (e) => { if (e.key === \"Escape\" && !modalEl.classList.contains(\"hidden\")) closeModal(); });",
             "",
             "  meetingsEl.innerHTML = \"\";",
+            "  const radios = {};",
             "  function addRadio(value, label) {",
             "    const lbl = document.createElement(\"label\");",
             "    const inp = document.createElement(\"input\");",
@@ -133,13 +241,48 @@ class ViewerTemplateBuilder:
             "    if (value === \"all\") inp.checked = true;",
             "    const sp = document.createElement(\"span\"); sp.textContent = label;",
             "    lbl.appendChild(inp); lbl.appendChild(sp);",
-            "    inp.addEventListener(\"change\", () => { state.meeting = value; render(); });",
+            "    inp.addEventListener(\"change\", () => { stopPlayback(); state.meeting = value; render(); });",
+            "    radios[value] = inp;",
             "    meetingsEl.appendChild(lbl);",
             "  }",
             "  addRadio(\"all\", \"all\");",
             "  meetingList.forEach(m => addRadio(m, m));",
             "  dirEl.addEventListener(\"change\", e => { state.dir = e.target.value; render(); });",
             "  splitOutEl.addEventListener(\"change\", e => { state.splitOut = e.target.checked; render(); });",
+            "  viewEl.addEventListener(\"change\", e => { state.view = e.target.value; render(); });",
+            "  if (!trends) {",
+            "    viewEl.querySelector(\"option[value=trends]\").disabled = true;",
+            "  } else {",
+            "    trends.nodes.forEach(n => {",
+            "      const opt = document.createElement(\"option\");",
+            "      opt.value = n; opt.textContent = n;",
+            "      trendNodeEl.appendChild(opt);",
+            "    });",
+            "    if (trends.nodes.indexOf(state.node) < 0) state.node = trends.nodes[0];",
+            "    trendNodeEl.value = state.node;",
+            "    trendNodeEl.addEventListener(\"change\", e => { state.node = e.target.value; renderTrends(); });",
+            "  }",
+            "  if (!frames || !frames.meetings.length) {",
+            "    playbackEl.classList.add(\"hidden\");",
+            "  } else {",
+            "    timelineEl.max = String(frames.meetings.length - 1);",
+            "    timelineEl.addEventListener(\"input\", () => {",
+            "      pausePlayback();",
+            "      showFrame(Number(timelineEl.value));",
+            "    });",
+            "    playBtn.addEventListener(\"click\", () => {",
+            "      if (playback.timer !== null) { pausePlayback(); return; }",
+            "      const next = playback.active ? playback.index + 1 : 0;",
+            "      playBtn.textContent = \"❚❚ Pause\";",
+            "      showFrame(next < frames.meetings.length ? next : 0);",
+            "      playback.timer = setTimeout(playNext, STEP_MS);",
+            "    });",
+            "  }",
+            "",
+            "  function nodeColor(l) {",
+            "    if (l === \"RAN\") return \"#555\";",
+            "    return l.endsWith(\"(src)\") ? \"rgba(31,119,180,0.8)\" : \"rgba(255,127,14,0.8)\";",
+            "  }",
             "",
             "  function edgesToSankey(edges, dir, useSplit) {",
             "    const edgeMap = {};",
@@ -162,8 +305,7 @@ class ViewerTemplateBuilder:
             "    edgesArr.forEach(e => { nodeSet.add(e.from); nodeSet.add(e.to); });",
             "    const labels = [\"RAN\", ...[...nodeSet].filter(n => n !== \"RAN\").sort()];",
             "    const idx = Object.fromEntries(labels.map((l, i) => [l, i]));",
-            "    const nodeColors = labels.map(l => l === \"RAN\" ? \"#555\" :",
-            "      l.endsWith(\"(src)\") ? \"rgba(31,119,180,0.8)\" : \"rgba(255,127,14,0.8)\");",
+            "    const nodeColors = labels.map(nodeColor);",
             "    const hoverFmt = dir === \"out\" && useSplit ? \"Displayed: %{value:.2f}\" : \"Displayed: %{value:.0f}\";",
             "    return {",
             "      node: { label: labels, color: nodeColors, pad: 20, thickness: 18 },",
@@ -217,6 +359,11 @@ class ViewerTemplateBuilder:
             "  }",
             "",
             "  function render() {",
+            "    const showTrends = state.view === \"trends\" && trends;",
+            "    chartEl.classList.toggle(\"hidden\", !!showTrends);",
+            "    trendsEl.classList.toggle(\"hidden\", !showTrends);",
+            "    if (showTrends) { pausePlayback(); renderTrends(); return; }",
+            "    if (playback.active) { renderPlayback(); return; }",
             "    const traces = buildTraces();",
             "    const layout = getLayout();",
             "    Plotly.react(chartEl, traces, layout, { responsive: true }).then(() => {",
@@ -225,6 +372,164 @@ class ViewerTemplateBuilder:
             "    });",
             "  }",
             "",
+            "  // --- タイムライン再生: frames.js（util/playback_frames.py）の",
+            "  // ノード並び・固定位置で 1 回だけ描き、会合を進めるときは Plotly.restyle で",
+            "  // link.value だけを補間しながら差し替える（レイアウトは再計算しない） ---",
+            "  function playbackDirs() { return state.dir === \"all\" ? [\"in\", \"out\"] : [state.dir]; }",
+            "",
+            "  function frameValues(dir, i) {",
+            "    return frames[dir][dir === \"out\" && state.splitOut ? \"split\" : \"raw\"][i];",
+            "  }",
+            "",
+            "  function playbackTraces() {",
+            "    const dirs = playbackDirs();",
+            "    return dirs.map((dir, t) => {",
+            "      const f = frames[dir];",
+            "      const color = dir === \"in\" ? COLOR_IN : COLOR_OUT;",
+            "      const trace = {",
+            "        type: \"sankey\", orientation: \"h\", arrangement: \"fixed\",",
+            "        name: dir === \"in\" ? \"Inbound\" : \"Outbound\", meta: { dir: dir },",
+            "        node: { label: f.nodes, x: f.x, y: f.y, color: f.nodes.map(nodeColor), pad: 20, thickness: 18 },",
+            "        link: {",
+            "          source: f.source, target: f.target, value: playback.shown[dir],",
+            "          color: f.source.map(() => color), customdata: f.edgeKeys,",
+            "          hovertemplate: dir === \"out\" && state.splitOut",
+            "            ? \"Displayed: %{value:.2f}\" : \"Displayed: %{value:.0f}\",",
+            "        },",
+            "      };",
+            "      if (dirs.length === 2) trace.domain = { x: t === 0 ? [0, 0.48] : [0.52, 1], y: [0, 1] };",
+            "      return trace;",
+            "    });",
+            "  }",
+            "",
+            "  function renderPlayback() {",
+            "    cancelTween();",
+            "    playbackDirs().forEach(dir => { playback.shown[dir] = frameValues(dir, playback.index); });",
+            "    Plotly.react(chartEl, playbackTraces(), getLayout(), { responsive: true }).then(() => {",
+            "      if (chartEl.removeAllListeners) chartEl.removeAllListeners(\"plotly_click\");",
+            "      chartEl.on(\"plotly_click\", onPlotClick);",
+            "    });",
+            "  }",
+            "",
+            "  function cancelTween() {",
+            "    if (playback.anim !== null) { cancelAnimationFrame(playback.anim); playback.anim = null; }",
+            "  }",
+            "",
+            "  function tweenTo(i) {",
+            "    cancelTween();",
+            "    const dirs = playbackDirs();",
+            "    const from = dirs.map(d => playback.shown[d]);",
+            "    const to = dirs.map(d => frameValues(d, i));",
+            "    const t0 = performance.now();",
+            "    function step(now) {",
+            "      const a = Math.min(1, (now - t0) / TWEEN_MS);",
+            "      const e = a * a * (3 - 2 * a);",
+            "      const values = a < 1 ? from.map((f, t) => f.map((v, j) => v + (to[t][j] - v) * e)) : to;",
+            "      dirs.forEach((d, t) => { playback.shown[d] = values[t]; });",
+            "      Plotly.restyle(chartEl, { \"link.value\": values }, dirs.map((_, t) => t));",
+            "      playback.anim = a < 1 ? requestAnimationFrame(step) : null;",
+            "    }",
+            "    playback.anim = requestAnimationFrame(step);",
+            "  }",
+            "",
+            "  function showFrame(i) {",
+            "    playback.index = i;",
+            "    state.meeting = frames.meetings[i];",
+            "    timelineEl.value = String(i);",
+            "    timelineLabel.textContent =",
+            "      state.meeting + \" (\" + (i + 1) + \" / \" + frames.meetings.length + \")\";",
+            "    if (radios[state.meeting]) radios[state.meeting].checked = true;",
+            "    if (playback.active && state.view === \"sankey\") { tweenTo(i); return; }",
+            "    playback.active = true;",
+            "    state.view = \"sankey\"; viewEl.value = \"sankey\";",
+            "    render();",
+            "  }",
+            "",
+            "  function playNext() {",
+            "    playback.timer = null;",
+            "    if (playback.index + 1 >= frames.meetings.length) { pausePlayback(); return; }",
+            "    showFrame(playback.index + 1);",
+            "    playback.timer = setTimeout(playNext, STEP_MS);",
+            "  }",
+            "",
+            "  function pausePlayback() {",
+            "    if (playback.timer !== null) { clearTimeout(playback.timer); playback.timer = null; }",
+            "    playBtn.textContent = \"▶ Play\";",
+            "  }",
+            "",
+            "  function stopPlayback() {",
+            "    pausePlayback();",
+            "    cancelTween();",
+            "    playback.active = false;",
+            "    timelineLabel.textContent = \"\";",
+            "  }",
+            "",
+            "  // --- Trends: util/trend_analytics.py が出力した trends.js を描画する ---",
+            "  function meetingMarker() {",
+            "    if (state.meeting === \"all\") return [];",
+            "    return [{ type: \"line\", xref: \"x\", yref: \"paper\", x0: state.meeting, x1: state.meeting,",
+            "      y0: 0, y1: 1, line: { color: \"#999\", dash: \"dot\", width: 1 } }];",
+            "  }",
+            "",
+            "  function renderTrends() {",
+            "    const weight = state.splitOut ? \"split\" : \"raw\";",
+            "    const movers = trends.movers[weight][state.dir];",
+            "    const xs = trends.meetings;",
+            "    document.getElementById(\"trendsNote\").textContent =",
+            "      \"Top \" + trends.k + \" rising / falling flows by least-squares slope over the last \" +",
+            "      trends.window + \" meetings (\" +",
+            "      (weight === \"split\" ? \"split 1/k\" : \"raw\") + \" weights).\";",
+            "    document.getElementById(\"moversRecent\").textContent = \"Last \" + trends.window;",
+            "    const lineTraces = [];",
+            "    [[\"up\", \"solid\"], [\"down\", \"dash\"]].forEach(([side, dash]) => {",
+            "      movers[side].forEach(m => lineTraces.push({",
+            "        type: \"scatter\", mode: \"lines+markers\", x: xs, y: m.rolling,",
+            "        name: (side === \"up\" ? \"▲ \" : \"▼ \") + m.from + \" → \" + m.to,",
+            "        line: { dash: dash, width: 1.5 }, marker: { size: 4 },",
+            "        hovertemplate: \"%{x}: %{y:.2f}<extra>%{fullData.name}</extra>\",",
+            "      }));",
+            "    });",
+            "    Plotly.react(\"moversChart\", lineTraces, {",
+            "      title: { text: \"Rolling \" + trends.window + \"-meeting sum of top movers\", font: { size: 14 } },",
+            "      margin: { l: 50, r: 20, t: 40, b: 60 }, font: { size: 11 }, shapes: meetingMarker(),",
+            "      xaxis: { type: \"category\" }, legend: { font: { size: 10 } },",
+            "    }, { responsive: true });",
+            "",
+            "    const tbody = document.querySelector(\"#moversTable tbody\");",
+            "    tbody.innerHTML = \"\";",
+            "    [[\"up\", \"▲\"], [\"down\", \"▼\"]].forEach(([side, mark]) => {",
+            "      movers[side].forEach(m => {",
+            "        const tr = document.createElement(\"tr\");",
+            "        [mark, m.dir, m.from, m.to, m.slope.toFixed(2), m.recent, m.total].forEach((v, i) => {",
+            "          const td = document.createElement(\"td\");",
+            "          td.textContent = typeof v === \"number\" && v % 1 !== 0 ? v.toFixed(2) : v;",
+            "          if (i === 0 || i === 4) td.className = side;",
+            "          tr.appendChild(td);",
+            "        });",
+            "        tr.addEventListener(\"click\", () => showEdgeModal(m.edge_key, m.dir));",
+            "        tbody.appendChild(tr);",
+            "      });",
+            "    });",
+            "    if (!movers.up.length && !movers.down.length) {",
+            "      tbody.innerHTML = \"<tr><td colspan=\\\"7\\\">該当データなし</td></tr>\";",
+            "    }",
+            "",
+            "    const i = trends.nodes.indexOf(state.node);",
+            "    const s = trends.nodeSeries[weight], deg = trends.nodeDegree;",
+            "    Plotly.react(\"degreeChart\", [",
+            "      { type: \"scatter\", mode: \"lines+markers\", x: xs, y: s.in[i], customdata: deg.in[i],",
+            "        name: \"In (flows into node)\", line: { color: COLOR_IN.replace(\"0.55\", \"1\") },",
+            "        hovertemplate: \"%{x}: %{y:.2f} (counterparts: %{customdata})<extra>In</extra>\" },",
+            "      { type: \"scatter\", mode: \"lines+markers\", x: xs, y: s.out[i], customdata: deg.out[i],",
+            "        name: \"Out (flows from node)\", line: { color: COLOR_OUT.replace(\"0.55\", \"1\") },",
+            "        hovertemplate: \"%{x}: %{y:.2f} (counterparts: %{customdata})<extra>Out</extra>\" },",
+            "    ], {",
+            "      title: { text: \"In / out per meeting: \" + state.node, font: { size: 14 } },",
+            "      margin: { l: 50, r: 20, t: 40, b: 60 }, font: { size: 11 }, shapes: meetingMarker(),",
+            "      xaxis: { type: \"category\" },",
+            "    }, { responsive: true });",
+            "  }",
+            "",
             "  function extractLinkIndex(pt) {",
             "    const trace = pt.data;",
             "    if (!trace || !trace.link || !Array.isArray(trace.link.source)) return -1;",
@@ -238,8 +543,14 @@ class ViewerTemplateBuilder:
             "    return -1;",
             "  }",
             "",
+            "  // ノードの点は sourceLinks / targetLinks を持つ",
+            "  // （pointNumber はノード番号なのでリンクと取り違えない）",
+            "  function isNodePoint(pt) {",
+            "    return !!pt && (Array.isArray(pt.sourceLinks) || Array.isArray(pt.targetLinks));",
+            "  }",
+            "",
             "  function extractEdgeKey(pt) {",
-            "    if (!pt || !pt.data) return null;",
+            "    if (!pt || !pt.data || isNodePoint(pt)) return null;",
             "    const trace = pt.data;",
             "    if (!trace.link || !Array.isArray(trace.link.source)) return null;",
             "    const linkIndex = extractLinkIndex(pt);",
@@ -267,11 +578,16 @@ class ViewerTemplateBuilder:
         lines.extend([
             "    if (!ev.points || ev.points.length === 0) return;",
             "    const pt = ev.points[0];",
+            "    if (isNodePoint(pt)) { showNodeModal(pt.label); return; }",
             "    const edgeKey = extractEdgeKey(pt);",
             "    if (debugMode && typeof console !== \"undefined\") console.log(\"edgeKey\", edgeKey);",
             "    if (!edgeKey) return;",
             "    const trace = pt.data;",
-            "    const dir = (trace.meta && trace.meta.dir) || \"out\";",
+            "    showEdgeModal(edgeKey, (trace.meta && trace.meta.dir) || \"out\");",
+            "  }",
+            "",
+            "  function showEdgeModal(edgeKey, dir) {",
+            "    modalKeyHead.textContent = \"Meeting\";",
             "    const rows = state.meeting === \"all\" ? edgesByMeeting :",
             "      edgesByMeeting.filter(e => e.meeting === state.meeting);",
             "    const filtered = rows.filter(e => e.edge_key === edgeKey);",
@@ -302,7 +618,134 @@ class ViewerTemplateBuilder:
             "    modalEl.classList.remove(\"hidden\");",
             "  }",
             "",
+            "  // --- ノード詳細: build_liaison_data.py の nodeTable",
+            "  // （ノード別の合計・会合別系列・上位の相手）を引くだけ ---",
+            "  function escapeHtml(s) {",
+            "    return String(s).replace(/&/g, \"&amp;\").replace(/</g, \"&lt;\").replace(/>/g, \"&gt;\");",
+            "  }",
+            "",
+            "  function showNodeModal(label) {",
+            "    const detail = nodeTable ? nodeTable[label] : null;",
+            "    modalTitle.textContent = \"Node detail: \" + label;",
+            "    modalKeyHead.textContent = \"Meeting / Counterpart\";",
+            "    if (!detail) {",
+            "      modalFromTo.textContent = \"\";",
+            "      modalTotal.textContent = \"該当データなし\";",
+            "      modalTableBody.innerHTML = \"<tr><td colspan=\\\"3\\\">該当データなし</td></tr>\";",
+            "      modalEl.classList.remove(\"hidden\");",
+            "      return;",
+            "    }",
+            "    const w = state.splitOut ? \"split\" : \"raw\";",
+            "    const all = state.meeting === \"all\";",
+            "    const fmt = v => v % 1 === 0 ? v : v.toFixed(2);",
+            "    const row = (k, raw, disp) =>",
+            "      \"<tr><td>\" + escapeHtml(k) + \"</td><td>\" + raw + \"</td><td>\" + fmt(disp) + \"</td></tr>\";",
+            "    const section = text => \"<tr><td class=\\\"section\\\" colspan=\\\"3\\\">\" + text + \"</td></tr>\";",
+            "    const totals = [], rows = [];",
+            "    const sides = [[\"in\", \"In\", \"sources\"], [\"out\", \"Out\", \"destinations\"]];",
+            "    sides.forEach(([side, name, who]) => {",
+            "      const d = detail[side];",
+            "      if (!d) return;",
+            "      const raw = all ? d.raw : (d.series.raw[state.meeting] || 0);",
+            "      const disp = all ? d[w] : (d.series[w][state.meeting] || 0);",
+            "      totals.push(name + \": Raw \" + raw + \", Displayed \" + fmt(disp));",
+            "      rows.push(section(name + \" – top \" + who + \" (all meetings)\"));",
+            "      d.top[w].forEach(t => rows.push(row(t[0], t[1], w === \"split\" ? t[2] : t[1])));",
+            "      rows.push(section(name + \" – by meeting\"));",
+            "      meetingList.forEach(m => {",
+            "        if ((all || m === state.meeting) && d.series.raw[m]) {",
+            "          rows.push(row(m, d.series.raw[m], d.series[w][m]));",
+            "        }",
+            "      });",
+            "    });",
+            "    modalFromTo.textContent =",
+            "      state.meeting === \"all\" ? \"All meetings\" : \"Meeting: \" + state.meeting;",
+            "    modalTotal.textContent = totals.join(\" | \");",
+            "    modalTableBody.innerHTML = rows.join(\"\");",
+            "    modalEl.classList.remove(\"hidden\");",
+            "  }",
+            "",
             "  render();",
+            "}",
+            "",
+            "// --- データ読み込み: data_patch.js（build_liaison_delta.py）があり、",
+            "// localStorage の基準版が patch.base と一致すれば差分だけ当てる。",
+            "// それ以外は data.js を全量読み込んでキャッシュする ---",
+            "(function() {",
+            "  // 同じオリジンの viewer（batch の full / last5 など）ごとに",
+            "  // 別のキャッシュにする",
+            "  const viewerDir = typeof location === \"undefined\" ? \"\" : location.pathname.replace(/[^/]*$/, \"\");",
+            "  const CACHE_KEY = \"liaison:data:\" + viewerDir;",
+            "  const PATCH_FORMAT = 1;",
+            "  function readCache() {",
+            "    try {",
+            "      const s = localStorage.getItem(CACHE_KEY);",
+            "      return s ? JSON.parse(s) : null;",
+            "    } catch (e) {",
+            "      return null;",
+            "    }",
+            "  }",
+            "  function writeCache(data) {",
+            "    if (!data || !data.version) return;",
+            "    try {",
+            "      localStorage.setItem(CACHE_KEY, JSON.stringify(data));",
+            "    } catch (e) {",
+            "      // 容量超過などはキャッシュなしで続行",
+            "      // （古い基準版が残るとパッチの当て先がずれるので消す）",
+            "      try { localStorage.removeItem(CACHE_KEY); } catch (e2) { /* 無視 */ }",
+            "    }",
+            "  }",
+            "  function byKeys(keys) {",
+            "    return (a, b) => {",
+            "      for (const k of keys) {",
+            "        if (a[k] < b[k]) return -1;",
+            "        if (a[k] > b[k]) return 1;",
+            "      }",
+            "      return 0;",
+            "    };",
+            "  }",
+            "  // 並びは build_liaison_data.py と同じ（meeting, dir, from, to の文字列順）に戻す",
+            "  function applyPatch(base, patch) {",
+            "    const em = new Map(base.edgesByMeeting.map(e => [e.meeting + \"|||\" + e.edge_key, e]));",
+            "    patch.edgesByMeeting.remove.forEach(([m, k]) => em.delete(m + \"|||\" + k));",
+            "    patch.edgesByMeeting.upsert.forEach(e => em.set(e.meeting + \"|||\" + e.edge_key, e));",
+            "    const et = new Map(base.edgesTotal.map(e => [e.edge_key, e]));",
+            "    patch.edgesTotal.remove.forEach(k => et.delete(k));",
+            "    patch.edgesTotal.upsert.forEach(e => et.set(e.edge_key, e));",
+            "    const nodeTable = Object.assign({}, base.nodeTable || {}, patch.nodeTable.set);",
+            "    patch.nodeTable.remove.forEach(n => { delete nodeTable[n]; });",
+            "    const data = {",
+            "      meetings: patch.meetings,",
+            "      edgesByMeeting: [...em.values()].sort(byKeys([\"meeting\", \"dir\", \"from\", \"to\"])),",
+            "      edgesTotal: [...et.values()].sort(byKeys([\"dir\", \"from\", \"to\"])),",
+            "      nodeTable: nodeTable,",
+            "      version: patch.version,",
+            "    };",
+            "    if (data.edgesByMeeting.length !== patch.counts.edgesByMeeting ||",
+            "        data.edgesTotal.length !== patch.counts.edgesTotal) return null;",
+            "    return data;",
+            "  }",
+            "  function loadFull() {",
+            "    const s = document.createElement(\"script\");",
+            "    s.src = \"data.js\";",
+            "    s.onload = () => { writeCache(window.LIAISON_DATA); startViewer(); };",
+            "    s.onerror = () => console.error(\"data.js を読み込めません\");",
+            "    document.head.appendChild(s);",
+            "  }",
+            "",
+            "  if (window.LIAISON_DATA) { writeCache(window.LIAISON_DATA); startViewer(); return; }",
+            "  const patch = window.LIAISON_PATCH;",
+            "  const cached = patch && patch.format === PATCH_FORMAT ? readCache() : null;",
+            "  let data = null;",
+            "  if (cached && cached.version === patch.version) {",
+            "    data = cached;",
+            "  } else if (cached && cached.version === patch.base) {",
+            "    try { data = applyPatch(cached, patch); } catch (e) { data = null; }",
+            "    if (data) writeCache(data);",
+            "  }",
+            "  if (!data) { loadFull(); return; }",
+            "  window.LIAISON_DATA = data;",
+            "  startViewer();",
             "})();",
         ])
         return "\n".join(lines)